@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import gzip
+import zlib
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+try:  # Optional: brotli is only offered when the package is installed
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+# Content types worth compressing; everything else (images, already-compressed
+# archives) goes out as-is
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Streamed token-by-token; per-chunk flushes would cost more than they save
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream",)
+
+
+class StreamCompressor:
+    """Incremental encoder for streaming responses.
+
+    ``compress`` returns everything the chunk produced after a sync flush, so
+    each chunk reaches the client as soon as the route yields it instead of
+    sitting in the encoder's window.
+    """
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+@dataclass(frozen=True)
+class CompressionPolicy:
+    """Which encodings the API offers, at what level, and for which bodies.
+
+    ``encodings`` is in server preference order; brotli is dropped when the
+    package is not installed. Bodies under ``minimum_size`` bytes are sent
+    uncompressed since the framing overhead outweighs the saving.
+    """
+
+    encodings: tuple[str, ...] = ("br", "gzip")
+    minimum_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 5
+
+    @property
+    def available(self) -> tuple[str, ...]:
+        return tuple(encoding for encoding in self.encodings if encoding == "gzip" or (encoding == "br" and brotli))
+
+    def compressible(self, media_type: str | None) -> bool:
+        if not media_type or media_type.startswith(UNCOMPRESSED_MEDIA_TYPES):
+            return False
+        return media_type.startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+    def negotiate(self, accept_encoding: str | None) -> str | None:
+        """Pick the preferred encoding the client accepts (q > 0), or None for identity."""
+
+        if not accept_encoding:
+            return None
+        accepted: dict[str, float] = {}
+        for item in accept_encoding.split(","):
+            name, _, params = item.strip().partition(";")
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[name.strip().lower()] = quality
+        candidates = [
+            encoding
+            for encoding in self.available
+            if accepted.get(encoding, accepted.get("*", 0.0)) > 0
+        ]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda encoding: accepted.get(encoding, accepted.get("*", 0.0)))
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def variants(self, body: bytes, media_type: str | None) -> tuple[tuple[str, bytes], ...]:
+        """Every offered encoding of ``body``, for storing alongside a cached response."""
+
+        if len(body) < self.minimum_size or not self.compressible(media_type):
+            return ()
+        return tuple((encoding, self.compress(encoding, body)) for encoding in self.available)
+
+    def stream(self, encoding: str) -> StreamCompressor:
+        return StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+
+
+def vary_accept_encoding(headers: Iterable[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    """Return ``headers`` with Accept-Encoding merged into Vary."""
+
+    result: list[tuple[bytes, bytes]] = []
+    vary: list[str] = []
+    for key, value in headers:
+        if key.lower() == b"vary":
+            vary.extend(part.strip() for part in value.decode("latin-1").split(",") if part.strip())
+        else:
+            result.append((key, value))
+    if not any(part.lower() == "accept-encoding" for part in vary):
+        vary.append("Accept-Encoding")
+    result.append((b"vary", ", ".join(vary).encode("latin-1")))
+    return result
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException, Response, status
+
+
+def entity_tag(kind: str, resource_id: Any, revision: Any) -> str:
+    """Strong ETag for one revision of a resource.
+
+    ``revision`` is whatever changes on every write: ``version`` for SOPs
+    and project SOPs, ``updated_at`` for project documents.
+    """
+
+    if isinstance(revision, datetime):
+        revision = revision.isoformat()
+    digest = hashlib.blake2b(f"{kind}:{resource_id}:{revision}".encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _parse(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def if_match_satisfied(if_match: str | None, etag: str) -> bool:
+    """RFC 9110 If-Match: strong comparison, ``*`` matches any current representation."""
+
+    if if_match is None:
+        return True
+    tags = _parse(if_match)
+    return "*" in tags or etag in tags
+
+
+def require_if_match(if_match: str | None, etag: str) -> None:
+    """Raise 412 when the client's If-Match no longer names the current revision."""
+
+    if not if_match_satisfied(if_match, etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Resource was modified by someone else; reload it and reapply your changes",
+            headers={"ETag": etag},
+        )
+
+
+def not_modified(if_none_match: str | None, etag: str) -> Response | None:
+    """A 304 response when If-None-Match (weak comparison) matches ``etag``, else None."""
+
+    if if_none_match is None:
+        return None
+    tags = _parse(if_none_match)
+    if "*" in tags or _opaque(etag) in {_opaque(tag) for tag in tags}:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return None
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from collections.abc import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.api.compression import CompressionPolicy, StreamCompressor, vary_accept_encoding
+from app.services.response_cache import CachedResponse, ResponseCache, response_cache
+
+# Cacheable GET routes -> tags of the data each is rendered from
+CACHE_RULES: list[tuple[re.Pattern[str], Callable[[re.Match[str]], frozenset[str]]]] = [
+    (re.compile(r"^/api/sops/?$"), lambda match: frozenset({"sops"})),
+    (re.compile(r"^/api/sops/(?P<id>[^/]+)$"), lambda match: frozenset({f"sop:{match['id'].lower()}"})),
+    (re.compile(r"^/api/project-sops/?$"), lambda match: frozenset({"project-sops"})),
+    (re.compile(r"^/api/projects/?$"), lambda match: frozenset({"projects"})),
+]
+
+# Response headers replayed from the cache besides content-type/ETag/Cache-Control
+_REPLAYED_HEADERS = {b"vary", b"content-language"}
+
+
+def _cache_tags(path: str) -> frozenset[str] | None:
+    for pattern, tags in CACHE_RULES:
+        match = pattern.match(path)
+        if match:
+            return tags(match)
+    return None
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+class ResponseCacheMiddleware:
+    """Serve rarely-changing GET endpoints from ``ResponseCache``.
+
+    Matching 200 responses are stored fully rendered with a strong ETag
+    (the route's own ETag if it set one, else a hash of the body), so
+    repeat reads skip the database and JSON serialization. Every response
+    carries ``Cache-Control`` and ETag, and a matching ``If-None-Match``
+    gets an empty 304 whether or not the entry was cached. Anything else,
+    including non-200 responses, passes through untouched. With a
+    ``compression`` policy, each entry also stores its compressed variants,
+    so hits are served encoded without compressing again.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        cache: ResponseCache = response_cache,
+        cache_control: str = "no-cache",
+        compression: CompressionPolicy | None = None,
+    ) -> None:
+        self.app = app
+        self.cache = cache
+        self.cache_control = cache_control
+        self.compression = compression
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        tags = _cache_tags(scope["path"])
+        if tags is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        if "no-cache" in request_headers.get("cache-control", ""):
+            # Explicit reload: re-render, but still refresh the cache below
+            entry = None
+        else:
+            entry = self.cache.get((scope["path"], scope["query_string"]))
+        if entry is not None:
+            await self._replay(entry, request_headers, send)
+            return
+
+        token = self.cache.begin(tags)
+        # Render the full body even if the route could answer 304 itself, so it can be cached
+        scope = {**scope, "headers": [(key, value) for key, value in scope["headers"] if key != b"if-none-match"]}
+        start: Message | None = None
+        chunks: list[bytes] = []
+        passthrough = False
+
+        async def capture(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    passthrough = True
+                    await send(message)
+                else:
+                    start = message
+                return
+            if passthrough:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._store_and_send(scope, start, b"".join(chunks), tags, token, request_headers, send)
+
+        await self.app(scope, receive, capture)
+
+    async def _store_and_send(
+        self,
+        scope: Scope,
+        start: Message,
+        body: bytes,
+        tags: frozenset[str],
+        token: tuple[tuple[str, int], ...],
+        request_headers: Headers,
+        send: Send,
+    ) -> None:
+        headers = MutableHeaders(raw=list(start["headers"]))
+        if "no-store" in headers.get("cache-control", ""):
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = headers.get("etag") or f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        media_type = headers.get("content-type", "application/json")
+        entry = CachedResponse(
+            body=body,
+            etag=etag,
+            media_type=media_type,
+            tags=tags,
+            headers=tuple((key, value) for key, value in headers.raw if key in _REPLAYED_HEADERS),
+            variants=self.compression.variants(body, media_type) if self.compression else (),
+        )
+        self.cache.put((scope["path"], scope["query_string"]), entry, token)
+        await self._replay(entry, request_headers, send)
+
+    async def _replay(self, entry: CachedResponse, request_headers: Headers, send: Send) -> None:
+        headers = [
+            (b"etag", entry.etag.encode("latin-1")),
+            (b"cache-control", self.cache_control.encode("latin-1")),
+            *entry.headers,
+        ]
+        if entry.variants:
+            headers = vary_accept_encoding(headers)
+        if _etag_matches(request_headers.get("if-none-match"), entry.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        body = entry.body
+        if entry.variants and self.compression:
+            encoding = self.compression.negotiate(request_headers.get("accept-encoding"))
+            variant = entry.variant(encoding) if encoding else None
+            if variant is not None:
+                body = variant
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+        headers += [
+            (b"content-type", entry.media_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ]
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class CompressionMiddleware:
+    """gzip / brotli for JSON and text responses, negotiated via Accept-Encoding.
+
+    Complete bodies under the policy's ``minimum_size`` go out as-is.
+    Streaming responses (NDJSON exports, chunked bodies) are compressed
+    chunk by chunk with a sync flush, so clients still see each chunk as it
+    is produced. Responses that already carry a Content-Encoding, such as
+    precompressed cache hits, pass through. The route's ETag is kept so
+    ``If-Match`` on a later write still compares against the same tag.
+    """
+
+    def __init__(self, app: ASGIApp, policy: CompressionPolicy) -> None:
+        self.app = app
+        self.policy = policy
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.policy.negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        compressor: StreamCompressor | None = None
+        passthrough = False
+
+        async def compress(message: Message) -> None:
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                if (
+                    start["status"] in (204, 206, 304)
+                    or "content-encoding" in headers
+                    or not self.policy.compressible(headers.get("content-type"))
+                    or (not more_body and len(body) < self.policy.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                headers["content-encoding"] = encoding
+                raw = vary_accept_encoding(headers.raw)
+                if not more_body:
+                    body = self.policy.compress(encoding, body)
+                    raw = [(key, value) for key, value in raw if key != b"content-length"]
+                    raw.append((b"content-length", str(len(body)).encode("latin-1")))
+                    await send({**start, "headers": raw})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = self.policy.stream(encoding)
+                await send({**start, "headers": [(key, value) for key, value in raw if key != b"content-length"]})
+
+            chunk = compressor.compress(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, compress)
@@ -1,3 +1,3 @@
-from . import chat, sops, projects, project_sops, ai_edits
+from . import chat, sops, projects, project_sops, ai_edits, export, changes
 
-__all__ = ["chat", "sops", "projects", "project_sops", "ai_edits"]
+__all__ = ["chat", "sops", "projects", "project_sops", "ai_edits", "export", "changes"]
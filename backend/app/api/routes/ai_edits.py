@@ -1,21 +1,32 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import Any, Dict
+from collections.abc import Iterator
+from typing import Any, Dict, List, Optional
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
 from app.schemas.ai_edit import (
     AIEditApplyRequest,
     AIEditApplyResponse,
+    AIEditBatchApplyRequest,
+    AIEditBatchApplyResponse,
+    AIEditBatchApplyResult,
     AIEditErrorResponse,
+    AIEditJobCreate,
+    AIEditJobItemRead,
+    AIEditJobRead,
+    AIEditStreamEvent,
     AIEditSuggestionRequest,
     AIEditSuggestionResponse,
     FieldSuggestion,
 )
-from app.services import ai_edit_service
+from app.services import ai_edit_job_service, ai_edit_service
 from app.services.project_service import BusinessCaseService, ProjectCharterService
 
 logger = logging.getLogger(__name__)
@@ -23,6 +34,28 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _load_current_document(db: Session, request: AIEditSuggestionRequest) -> Dict[str, Any]:
+    """Load the current document for a suggestion request as a column dict."""
+
+    if request.document_type == 'business-case':
+        # Get current business case for the project
+        doc = BusinessCaseService.get_current_business_case(db, UUID(request.project_id))
+        if not doc:
+            raise HTTPException(status_code=404, detail="Business case not found")
+
+    elif request.document_type == 'project-charter':
+        # Get current project charter for the project
+        doc = ProjectCharterService.get_current_project_charter(db, UUID(request.project_id))
+        if not doc:
+            raise HTTPException(status_code=404, detail="Project charter not found")
+
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported document type: {request.document_type}")
+
+    # Convert to dict, handling SQLAlchemy model
+    return {c.name: getattr(doc, c.name) for c in doc.__table__.columns}
+
+
 @router.post("/suggest", response_model=AIEditSuggestionResponse)
 async def generate_ai_suggestions(
     request: AIEditSuggestionRequest,
@@ -32,28 +65,7 @@ async def generate_ai_suggestions(
 
     try:
         # Get the current document data
-        current_document: Dict[str, Any] = {}
-
-        from uuid import UUID
-
-        if request.document_type == 'business-case':
-            # Get current business case for the project
-            doc = BusinessCaseService.get_current_business_case(db, UUID(request.project_id))
-            if not doc:
-                raise HTTPException(status_code=404, detail="Business case not found")
-            # Convert to dict, handling SQLAlchemy model
-            current_document = {c.name: getattr(doc, c.name) for c in doc.__table__.columns}
-
-        elif request.document_type == 'project-charter':
-            # Get current project charter for the project
-            doc = ProjectCharterService.get_current_project_charter(db, UUID(request.project_id))
-            if not doc:
-                raise HTTPException(status_code=404, detail="Project charter not found")
-            # Convert to dict, handling SQLAlchemy model
-            current_document = {c.name: getattr(doc, c.name) for c in doc.__table__.columns}
-
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported document type: {request.document_type}")
+        current_document = _load_current_document(db, request)
 
         # Generate AI suggestions
         suggestions_data = ai_edit_service.generate_ai_suggestions(
@@ -109,6 +121,70 @@ async def generate_ai_suggestions(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/suggest/stream")
+async def stream_ai_suggestions(
+    request: AIEditSuggestionRequest,
+    db: Session = Depends(get_db)
+) -> StreamingResponse:
+    """Stream AI suggestions as NDJSON while field groups are generated in parallel.
+
+    Each line is an ``AIEditStreamEvent``: a ``suggestion`` event as soon as a
+    field's suggestion has been generated, a ``group`` (or ``error``) event
+    as each field group finishes, and a final ``done`` event.
+    """
+
+    try:
+        current_document = _load_current_document(db, request)
+        suggestion_events = ai_edit_service.stream_ai_suggestions(
+            db=db,
+            document_type=request.document_type,
+            current_document=current_document,
+            user_instructions=request.user_instructions,
+            project_id=request.project_id
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logger.error(f"AI suggestion generation failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def events() -> Iterator[str]:
+        for event in suggestion_events:
+            if event.kind == "error":
+                yield _ndjson(AIEditStreamEvent(type="error", group=event.group, fields=event.fields, detail=event.error))
+
+            elif event.kind == "group":
+                yield _ndjson(AIEditStreamEvent(
+                    type="group",
+                    group=event.group,
+                    fields=event.fields,
+                    overall_reasoning=event.overall_reasoning
+                ))
+
+            else:
+                try:
+                    suggestion = FieldSuggestion(**event.suggestion)
+                except Exception as e:
+                    logger.warning(f"Skipping field {event.field}: failed to create FieldSuggestion: {e}")
+                    continue
+                yield _ndjson(AIEditStreamEvent(type="suggestion", field=event.field, suggestion=suggestion))
+
+        yield _ndjson(AIEditStreamEvent(
+            type="done",
+            document_type=request.document_type,
+            project_id=request.project_id,
+            document_id=request.document_id
+        ))
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+def _ndjson(event: AIEditStreamEvent) -> str:
+    # Drop unset top-level keys only; suggestion values may legitimately be null
+    payload = {key: value for key, value in event.model_dump(mode="json").items() if value is not None}
+    return json.dumps(payload) + "\n"
+
+
 @router.post("/apply", response_model=AIEditApplyResponse)
 async def apply_ai_suggestions(
     request: AIEditApplyRequest,
@@ -145,4 +221,116 @@ async def apply_ai_suggestions(
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Unexpected error applying AI suggestions: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/apply/batch", response_model=AIEditBatchApplyResponse)
+def apply_ai_suggestions_batch(
+    request: AIEditBatchApplyRequest,
+    db: Session = Depends(get_db)
+) -> AIEditBatchApplyResponse:
+    """Apply accepted AI suggestions to the current document of many projects in one transaction."""
+
+    try:
+        results = ai_edit_service.apply_ai_suggestions_batch(
+            db=db,
+            document_type=request.document_type,
+            items=[item.model_dump() for item in request.items],
+            user_id=request.user_id or "ai_user",
+            all_or_nothing=request.all_or_nothing
+        )
+    except ValueError as e:
+        logger.error(f"Batch AI suggestion application failed: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Unexpected error applying AI suggestions in batch: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+    applied = sum(1 for result in results if result.success)
+    return AIEditBatchApplyResponse(
+        document_type=request.document_type,
+        applied=applied,
+        failed=len(results) - applied,
+        results=[
+            AIEditBatchApplyResult(
+                project_id=result.project_id,
+                document_id=result.document_id,
+                success=result.success,
+                applied_fields=result.applied_fields,
+                error=result.error
+            )
+            for result in results
+        ]
+    )
+
+
+@router.post("/jobs", response_model=AIEditJobRead, status_code=status.HTTP_202_ACCEPTED)
+def create_ai_edit_job(payload: AIEditJobCreate, db: Session = Depends(get_db)) -> AIEditJobRead:
+    """Queue an AI suggestion run over many projects; poll the job for progress."""
+
+    try:
+        job = ai_edit_job_service.create_job(
+            db,
+            document_type=payload.document_type,
+            user_instructions=payload.user_instructions,
+            project_ids=payload.project_ids,
+            created_by=payload.created_by
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+    ai_edit_job_service.job_runner.submit(job.id)
+    db.refresh(job)
+    return AIEditJobRead.model_validate(job)
+
+
+@router.get("/jobs", response_model=List[AIEditJobRead])
+def list_ai_edit_jobs(limit: int = 50, db: Session = Depends(get_db)) -> List[AIEditJobRead]:
+    return [AIEditJobRead.model_validate(job) for job in ai_edit_job_service.list_jobs(db, limit=limit)]
+
+
+@router.get("/jobs/{job_id}", response_model=AIEditJobRead)
+def get_ai_edit_job(job_id: UUID, db: Session = Depends(get_db)) -> AIEditJobRead:
+    job = ai_edit_job_service.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="AI edit job not found")
+    return AIEditJobRead.model_validate(job)
+
+
+@router.get("/jobs/{job_id}/items", response_model=List[AIEditJobItemRead])
+def list_ai_edit_job_items(
+    job_id: UUID,
+    item_status: Optional[str] = Query(None, alias="status"),
+    db: Session = Depends(get_db)
+) -> List[AIEditJobItemRead]:
+    """Stored per-project suggestions, optionally filtered by item status."""
+
+    if ai_edit_job_service.get_job(db, job_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="AI edit job not found")
+    items = ai_edit_job_service.list_job_items(db, job_id, status=item_status)
+    return [AIEditJobItemRead.model_validate(item) for item in items]
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=AIEditJobRead)
+def cancel_ai_edit_job(job_id: UUID, db: Session = Depends(get_db)) -> AIEditJobRead:
+    try:
+        job = ai_edit_job_service.cancel_job(db, job_id)
+    except ValueError as exc:
+        code = status.HTTP_404_NOT_FOUND if "not found" in str(exc) else status.HTTP_409_CONFLICT
+        raise HTTPException(status_code=code, detail=str(exc)) from exc
+    return AIEditJobRead.model_validate(job)
+
+
+@router.post("/jobs/{job_id}/retry", response_model=AIEditJobRead)
+def retry_ai_edit_job(job_id: UUID, db: Session = Depends(get_db)) -> AIEditJobRead:
+    """Re-run the failed items of a finished job."""
+
+    try:
+        job = ai_edit_job_service.retry_failed_items(db, job_id)
+    except ValueError as exc:
+        code = status.HTTP_404_NOT_FOUND if "not found" in str(exc) else status.HTTP_409_CONFLICT
+        raise HTTPException(status_code=code, detail=str(exc)) from exc
+
+    ai_edit_job_service.job_runner.submit(job.id)
+    db.refresh(job)
+    return AIEditJobRead.model_validate(job)
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+
+from app.api.responses import dumps
+from app.core.config import settings
+from app.services.change_feed import RESYNC_EVENT, Subscription, change_feed, valid_topic
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/changes", tags=["changes"])
+
+# Client reconnect delay advertised in the stream, in milliseconds
+RETRY_MS = 3000
+
+
+def _sse(event: str, data: bytes | str) -> str:
+    if isinstance(data, bytes):
+        data = data.decode()
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+async def _event_stream(request: Request, subscription: Subscription) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {RETRY_MS}\n" + _sse("ready", dumps({"topics": sorted(subscription.topics)}))
+        while True:
+            if subscription.overflowed:
+                # Events were dropped; the client has to refetch and reconnect
+                yield _sse("resync", "{}")
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.change_feed_keepalive_s)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if event is None:
+                # The feed is shutting down
+                return
+            if event.get("topic") == RESYNC_EVENT["topic"]:
+                yield _sse("resync", "{}")
+                continue
+            yield _sse("change", dumps(event))
+    finally:
+        change_feed.unsubscribe(subscription)
+
+
+@router.get("")
+async def stream_changes(
+    request: Request,
+    topics: list[str] = Query(..., alias="topic", min_length=1),
+) -> StreamingResponse:
+    """Server-sent events for committed changes to the given topics.
+
+    A topic is a table (``sops``, ``project_sops``, ``projects``, ``business_cases``,
+    ``project_charters``, ``chat_messages``) or a table scoped to one parent,
+    e.g. ``business_cases:<project id>`` or ``chat_messages:<thread id>``.
+    Each ``change`` event carries ``{topic, op, id}`` plus the parent key;
+    a ``resync`` event means changes may have been missed.
+    """
+
+    if not settings.change_feed_enabled or not change_feed.running:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Change feed is not available on this deployment",
+        )
+    unknown = [topic for topic in topics if not valid_topic(topic)]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown topic(s): {', '.join(unknown)}",
+        )
+
+    subscription = change_feed.subscribe(topics)
+    return StreamingResponse(
+        _event_stream(request, subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from app.api.responses import model_response
 from app.db.session import get_db
 from app.schemas.chat import (
     ChatMessageCreate,
@@ -13,25 +14,28 @@ from app.schemas.chat import (
     ChatThreadRead,
 )
 from app.services import chat_service
+from app.services.token_accounting import PromptTooLargeError
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 @router.get("/threads", response_model=ChatThreadList)
-def list_threads(db: Session = Depends(get_db)) -> ChatThreadList:
+def list_threads(db: Session = Depends(get_db)) -> Response:
     threads = chat_service.list_threads(db)
-    return ChatThreadList(
-        items=[
-            ChatThreadRead(
-                id=thread.id,
-                title=thread.title,
-                sop_id=thread.sop_id,
-                chat_type=thread.chat_type,
-                created_at=thread.created_at,
-                updated_at=thread.updated_at,
-            )
-            for thread in threads
-        ]
+    return model_response(
+        ChatThreadList(
+            items=[
+                ChatThreadRead(
+                    id=thread.id,
+                    title=thread.title,
+                    sop_id=thread.sop_id,
+                    chat_type=thread.chat_type,
+                    created_at=thread.created_at,
+                    updated_at=thread.updated_at,
+                )
+                for thread in threads
+            ]
+        )
     )
 
 
@@ -49,29 +53,31 @@ def create_thread(payload: ChatThreadCreate, db: Session = Depends(get_db)) -> C
 
 
 @router.get("/threads/{thread_id}", response_model=ChatThreadDetail)
-def get_thread(thread_id: str, db: Session = Depends(get_db)) -> ChatThreadDetail:
+def get_thread(thread_id: str, db: Session = Depends(get_db)) -> Response:
     thread = chat_service.get_thread_with_messages(db, thread_id)
     if thread is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Thread not found")
 
-    return ChatThreadDetail(
-        id=thread.id,
-        title=thread.title,
-        sop_id=thread.sop_id,
-        chat_type=thread.chat_type,
-        created_at=thread.created_at,
-        updated_at=thread.updated_at,
-        messages=[
-            ChatMessageRead(
-                id=message.id,
-                thread_id=message.thread_id,
-                role=message.role,
-                content=message.content,
-                created_at=message.created_at,
-                updated_at=message.updated_at,
-            )
-            for message in sorted(thread.messages, key=lambda m: m.created_at)
-        ],
+    return model_response(
+        ChatThreadDetail(
+            id=thread.id,
+            title=thread.title,
+            sop_id=thread.sop_id,
+            chat_type=thread.chat_type,
+            created_at=thread.created_at,
+            updated_at=thread.updated_at,
+            messages=[
+                ChatMessageRead(
+                    id=message.id,
+                    thread_id=message.thread_id,
+                    role=message.role,
+                    content=message.content,
+                    created_at=message.created_at,
+                    updated_at=message.updated_at,
+                )
+                for message in sorted(thread.messages, key=lambda m: m.created_at)
+            ],
+        )
     )
 
 
@@ -84,6 +90,8 @@ def post_message(
 ) -> list[ChatMessageRead]:
     try:
         messages = chat_service.append_message(db, thread_id, payload)
+    except PromptTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
 
@@ -113,6 +121,8 @@ def post_project_message(
 ) -> list[ChatMessageRead]:
     try:
         messages = chat_service.append_project_message(db, thread_id, payload)
+    except PromptTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc)) from exc
 
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import csv
+import io
+import logging
+from collections.abc import Iterator
+from datetime import date, datetime, timezone
+from typing import Any, Literal
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from app.api.responses import dumps
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services import export_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+ExportEntity = Literal["projects", "business_cases", "project_charters"]
+
+# Rows are buffered into chunks of about this size before being sent, so
+# compression and the socket see a few large writes rather than one per row
+CHUNK_SIZE = 64 * 1024
+
+
+def _ndjson_chunks(entities: list[str], include_versions: bool) -> Iterator[bytes]:
+    # The generator opens its own session: FastAPI closes yield dependencies
+    # (get_db) before a StreamingResponse body starts iterating
+    with SessionLocal() as db:
+        export_service.begin_snapshot(db)
+        buffer = bytearray()
+        for entity in entities:
+            record_type = export_service.RECORD_TYPES[entity]
+            records = export_service.iter_records(db, entity, include_versions, settings.export_batch_size)
+            for record in records:
+                buffer += dumps({"record_type": record_type, **record})
+                buffer += b"\n"
+                if len(buffer) >= CHUNK_SIZE:
+                    yield bytes(buffer)
+                    buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunks(entity: str, include_versions: bool) -> Iterator[bytes]:
+    columns = export_service.export_columns(entity)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    with SessionLocal() as db:
+        for record in export_service.iter_records(db, entity, include_versions, settings.export_batch_size):
+            writer.writerow([_csv_cell(record[column]) for column in columns])
+            if buffer.tell() >= CHUNK_SIZE:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _logged(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # Headers are already sent by the time a row fails; log it, since the
+    # client only sees a truncated body
+    try:
+        yield from chunks
+    except Exception as exc:
+        logger.error(f"Export failed mid-stream: {exc}")
+        raise
+
+
+@router.get("")
+def export_portfolio(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    entities: list[ExportEntity] | None = Query(None, alias="entity"),
+    include_versions: bool = False,
+) -> StreamingResponse:
+    """Stream projects and their current documents (or every version) in one request.
+
+    NDJSON carries every requested entity, one object per line tagged with
+    ``record_type``; CSV carries exactly one entity per request. Repeat
+    ``entity`` to choose what is exported (default: all of them).
+    """
+
+    selected = list(dict.fromkeys(entities or export_service.EXPORT_ENTITIES))
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    if export_format == "csv":
+        if len(selected) != 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="CSV export takes exactly one entity",
+            )
+        chunks = _csv_chunks(selected[0], include_versions)
+        media_type = "text/csv; charset=utf-8"
+        filename = f"playbook-{selected[0]}-{stamp}.csv"
+    else:
+        chunks = _ndjson_chunks(selected, include_versions)
+        media_type = "application/x-ndjson"
+        filename = f"playbook-export-{stamp}.ndjson"
+
+    return StreamingResponse(
+        _logged(chunks),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
+from app.api.etags import entity_tag, not_modified, require_if_match
+from app.api.responses import model_response
+from app.db.models import ProjectSOP
 from app.db.session import get_db
 from app.schemas.project_sop import (
     ProjectSOPCreate,
@@ -13,27 +16,34 @@ from app.schemas.project_sop import (
     ProjectSOPUpdate,
 )
 from app.services import project_sop_service
+from app.services.concurrency import ConcurrentUpdateError
 
 router = APIRouter(prefix="/project-sops", tags=["project-sops"])
 
 
+def _etag(project_sop: ProjectSOP) -> str:
+    return entity_tag("project-sop", project_sop.id, project_sop.version)
+
+
 @router.get("/", response_model=ProjectSOPList)
-def list_project_sops(db: Session = Depends(get_db)) -> ProjectSOPList:
+def list_project_sops(db: Session = Depends(get_db)) -> Response:
     """List all global document type templates."""
     project_sops = project_sop_service.list_project_sops(db)
-    return ProjectSOPList(
-        items=[
-            ProjectSOPSummary(
-                id=sop.id,
-                document_type=sop.document_type,
-                title=sop.title,
-                version=sop.version,
-                display_order=sop.display_order,
-                is_active=sop.is_active,
-                updated_at=sop.updated_at,
-            )
-            for sop in project_sops
-        ]
+    return model_response(
+        ProjectSOPList(
+            items=[
+                ProjectSOPSummary(
+                    id=sop.id,
+                    document_type=sop.document_type,
+                    title=sop.title,
+                    version=sop.version,
+                    display_order=sop.display_order,
+                    is_active=sop.is_active,
+                    updated_at=sop.updated_at,
+                )
+                for sop in project_sops
+            ]
+        )
     )
 
 
@@ -59,37 +69,62 @@ def create_project_sop(payload: ProjectSOPCreate, db: Session = Depends(get_db))
 
 
 @router.get("/{sop_id}", response_model=ProjectSOPRead)
-def get_project_sop(sop_id: str, db: Session = Depends(get_db)) -> ProjectSOPRead:
+def get_project_sop(
+    sop_id: str,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     """Get a specific global document type template."""
     project_sop = project_sop_service.get_project_sop(db, sop_id)
     if project_sop is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project SOP not found")
 
-    return ProjectSOPRead(
-        id=project_sop.id,
-        document_type=project_sop.document_type,
-        title=project_sop.title,
-        version=project_sop.version,
-        content=project_sop.content,
-        display_order=project_sop.display_order,
-        is_active=project_sop.is_active,
-        created_at=project_sop.created_at,
-        updated_at=project_sop.updated_at,
+    etag = _etag(project_sop)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+
+    return model_response(
+        ProjectSOPRead(
+            id=project_sop.id,
+            document_type=project_sop.document_type,
+            title=project_sop.title,
+            version=project_sop.version,
+            content=project_sop.content,
+            display_order=project_sop.display_order,
+            is_active=project_sop.is_active,
+            created_at=project_sop.created_at,
+            updated_at=project_sop.updated_at,
+        ),
+        headers={"ETag": etag},
     )
 
 
 @router.put("/{sop_id}", response_model=ProjectSOPRead)
-def update_project_sop(sop_id: str, payload: ProjectSOPUpdate, db: Session = Depends(get_db)) -> ProjectSOPRead:
+def update_project_sop(
+    sop_id: str,
+    payload: ProjectSOPUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> ProjectSOPRead:
     """Update a global document type template."""
     project_sop = project_sop_service.get_project_sop(db, sop_id)
     if project_sop is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project SOP not found")
+    require_if_match(if_match, _etag(project_sop))
 
     try:
-        updated_sop = project_sop_service.update_project_sop(db, sop_id, payload)
+        updated_sop = project_sop_service.update_project_sop(
+            db, sop_id, payload, expected_version=project_sop.version if if_match is not None else None
+        )
+    except ConcurrentUpdateError as exc:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
+    response.headers["ETag"] = _etag(updated_sop)
+
     return ProjectSOPRead(
         id=updated_sop.id,
         document_type=updated_sop.document_type,
@@ -116,25 +151,27 @@ def delete_project_sop(sop_id: str, db: Session = Depends(get_db)) -> None:
 
 
 @router.get("/{sop_id}/history", response_model=ProjectSOPHistoryList)
-def list_project_sop_history(sop_id: str, db: Session = Depends(get_db)) -> ProjectSOPHistoryList:
+def list_project_sop_history(sop_id: str, db: Session = Depends(get_db)) -> Response:
     """List history for a global document type template."""
     project_sop = project_sop_service.get_project_sop(db, sop_id)
     if project_sop is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project SOP not found")
 
     history_entries = project_sop_service.list_project_sop_history(db, sop_id)
-    return ProjectSOPHistoryList(
-        items=[
-            {
-                "id": entry.id,
-                "project_sop_id": entry.project_sop_id,
-                "document_type": entry.document_type,
-                "title": entry.title,
-                "version": entry.version,
-                "content": entry.content,
-                "edited_by": entry.edited_by,
-                "created_at": entry.created_at,
-            }
-            for entry in history_entries
-        ]
+    return model_response(
+        ProjectSOPHistoryList(
+            items=[
+                {
+                    "id": entry.id,
+                    "project_sop_id": entry.project_sop_id,
+                    "document_type": entry.document_type,
+                    "title": entry.title,
+                    "version": entry.version,
+                    "content": entry.content,
+                    "edited_by": entry.edited_by,
+                    "created_at": entry.created_at,
+                }
+                for entry in history_entries
+            ]
+        )
     )
\ No newline at end of file
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from typing import Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
+from app.api.etags import entity_tag, not_modified, require_if_match
+from app.api.responses import model_response
+from app.db.models import BusinessCase, ProjectCharter
+from app.core.config import settings
 from app.db.session import get_db
 from app.schemas.project import (
     ProjectCreate,
+    ProjectImportCreated,
+    ProjectImportError,
+    ProjectImportResult,
     ProjectList,
     ProjectRead,
     ProjectUpdate,
@@ -20,32 +30,40 @@ from app.schemas.project import (
     ProjectCharterRead,
     ProjectCharterUpdate,
 )
+from app.services import project_import_service
+from app.services.concurrency import ConcurrentUpdateError
 from app.services.project_service import ProjectService, BusinessCaseService, ProjectCharterService
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
+def _etag(document: BusinessCase | ProjectCharter) -> str:
+    return entity_tag(document.__tablename__, document.id, document.updated_at)
+
+
 # Project routes
 @router.get("/", response_model=ProjectList)
-def list_projects(include_inactive: bool = False, db: Session = Depends(get_db)) -> ProjectList:
+def list_projects(include_inactive: bool = False, db: Session = Depends(get_db)) -> Response:
     """List all projects."""
     projects = ProjectService.list_projects(db, include_inactive=include_inactive)
-    return ProjectList(
-        items=[
-            {
-                'id': project.id,
-                'project_name': project.project_name,
-                'project_code': project.project_code,
-                'business_area': project.business_area,
-                'sponsor': project.sponsor,
-                'status': project.status,
-                'overall_health': project.overall_health,
-                'priority': project.priority,
-                'display_order': project.display_order,
-                'updated_at': project.updated_at,
-            }
-            for project in projects
-        ]
+    return model_response(
+        ProjectList(
+            items=[
+                {
+                    'id': project.id,
+                    'project_name': project.project_name,
+                    'project_code': project.project_code,
+                    'business_area': project.business_area,
+                    'sponsor': project.sponsor,
+                    'status': project.status,
+                    'overall_health': project.overall_health,
+                    'priority': project.priority,
+                    'display_order': project.display_order,
+                    'updated_at': project.updated_at,
+                }
+                for project in projects
+            ]
+        )
     )
 
 
@@ -59,14 +77,64 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db)) -> Pro
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
 
+async def _body_lines(request: Request) -> AsyncIterator[str]:
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8-sig")
+    if pending:
+        yield pending.rstrip(b"\r").decode("utf-8-sig")
+
+
+@router.post("/import", response_model=ProjectImportResult)
+async def import_projects(
+    request: Request,
+    import_format: Literal["ndjson", "csv"] | None = Query(None, alias="format"),
+    created_by: str | None = None,
+    db: Session = Depends(get_db),
+) -> ProjectImportResult:
+    """Bulk-create projects (with their initial documents) from an NDJSON or CSV body.
+
+    The body is parsed as it streams in and imported in batches of
+    ``PROJECT_IMPORT_BATCH_SIZE`` rows, each in its own transaction. Rows
+    that fail validation or hit an existing name/code are reported in
+    ``errors``; the rest are created. The format defaults from Content-Type.
+    """
+    if import_format is None:
+        import_format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+
+    parser = project_import_service.RowParser(import_format)
+    importer = project_import_service.ProjectImporter(db, created_by=created_by)
+    batch: list[project_import_service.ParsedRow] = []
+    async for line in _body_lines(request):
+        batch.extend(parser.feed(line))
+        if len(batch) >= settings.project_import_batch_size:
+            await run_in_threadpool(importer.import_batch, batch)
+            batch = []
+    batch.extend(parser.close())
+    if batch:
+        await run_in_threadpool(importer.import_batch, batch)
+
+    result = importer.result
+    return ProjectImportResult(
+        total_rows=result.total_rows,
+        created_count=len(result.created),
+        failed_count=len(result.errors),
+        created=[ProjectImportCreated.model_validate(item) for item in result.created],
+        errors=[ProjectImportError.model_validate(item) for item in sorted(result.errors, key=lambda error: error.row)],
+    )
+
+
 @router.get("/{project_id}", response_model=ProjectRead)
-def get_project(project_id: UUID, db: Session = Depends(get_db)) -> ProjectRead:
+def get_project(project_id: UUID, db: Session = Depends(get_db)) -> Response:
     """Get a project by ID."""
     project = ProjectService.get_project(db, project_id)
     if project is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project not found")
 
-    return ProjectRead.model_validate(project)
+    return model_response(ProjectRead.model_validate(project))
 
 
 @router.put("/{project_id}", response_model=ProjectRead)
@@ -89,11 +157,13 @@ def delete_project(project_id: UUID, db: Session = Depends(get_db)) -> None:
 
 # Business Case routes
 @router.get("/{project_id}/business-cases", response_model=BusinessCaseList)
-def list_business_cases(project_id: UUID, db: Session = Depends(get_db)) -> BusinessCaseList:
+def list_business_cases(project_id: UUID, db: Session = Depends(get_db)) -> Response:
     """List business cases for a project."""
     business_cases = BusinessCaseService.list_business_cases(db, project_id=project_id)
-    return BusinessCaseList(
-        items=[BusinessCaseRead.model_validate(bc) for bc in business_cases]
+    return model_response(
+        BusinessCaseList(
+            items=[BusinessCaseRead.model_validate(bc) for bc in business_cases]
+        )
     )
 
 
@@ -113,17 +183,30 @@ def create_business_case(project_id: UUID, payload: BusinessCaseCreate, db: Sess
 
 
 @router.get("/{project_id}/business-cases/current", response_model=BusinessCaseRead)
-def get_current_business_case(project_id: UUID, db: Session = Depends(get_db)) -> BusinessCaseRead:
+def get_current_business_case(
+    project_id: UUID,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     """Get the current version of business case for a project."""
     business_case = BusinessCaseService.get_current_business_case(db, project_id)
     if business_case is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No business case found for this project")
 
-    return BusinessCaseRead.model_validate(business_case)
+    etag = _etag(business_case)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+    return model_response(BusinessCaseRead.model_validate(business_case), headers={"ETag": etag})
 
 
 @router.get("/{project_id}/business-cases/{business_case_id}", response_model=BusinessCaseRead)
-def get_business_case(project_id: UUID, business_case_id: UUID, db: Session = Depends(get_db)) -> BusinessCaseRead:
+def get_business_case(
+    project_id: UUID,
+    business_case_id: UUID,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     """Get a specific business case."""
     business_case = BusinessCaseService.get_business_case(db, business_case_id)
     if business_case is None:
@@ -132,7 +215,11 @@ def get_business_case(project_id: UUID, business_case_id: UUID, db: Session = De
     if business_case.project_id != project_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Business case not found for this project")
 
-    return BusinessCaseRead.model_validate(business_case)
+    etag = _etag(business_case)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+    return model_response(BusinessCaseRead.model_validate(business_case), headers={"ETag": etag})
 
 
 @router.put("/{project_id}/business-cases/{business_case_id}", response_model=BusinessCaseRead)
@@ -140,16 +227,24 @@ def update_business_case(
     project_id: UUID,
     business_case_id: UUID,
     payload: BusinessCaseUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     db: Session = Depends(get_db)
 ) -> BusinessCaseRead:
-    """Update an existing business case."""
+    """Update an existing business case; send the ETag from a GET as If-Match to guard against lost updates."""
     business_case = BusinessCaseService.get_business_case(db, business_case_id)
     if business_case is None or business_case.project_id != project_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Business case not found")
+    require_if_match(if_match, _etag(business_case))
 
     try:
-        updated_business_case = BusinessCaseService.update_business_case(db, business_case_id, payload)
+        updated_business_case = BusinessCaseService.update_business_case(
+            db, business_case_id, payload, expected_updated_at=business_case.updated_at if if_match is not None else None
+        )
+        response.headers["ETag"] = _etag(updated_business_case)
         return BusinessCaseRead.model_validate(updated_business_case)
+    except ConcurrentUpdateError as exc:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
@@ -175,11 +270,13 @@ def create_business_case_version(
 
 # Project Charter routes
 @router.get("/{project_id}/charters", response_model=ProjectCharterList)
-def list_project_charters(project_id: UUID, db: Session = Depends(get_db)) -> ProjectCharterList:
+def list_project_charters(project_id: UUID, db: Session = Depends(get_db)) -> Response:
     """List project charters for a project."""
     charters = ProjectCharterService.list_project_charters(db, project_id=project_id)
-    return ProjectCharterList(
-        items=[ProjectCharterRead.model_validate(charter) for charter in charters]
+    return model_response(
+        ProjectCharterList(
+            items=[ProjectCharterRead.model_validate(charter) for charter in charters]
+        )
     )
 
 
@@ -199,17 +296,30 @@ def create_project_charter(project_id: UUID, payload: ProjectCharterCreate, db:
 
 
 @router.get("/{project_id}/charters/current", response_model=ProjectCharterRead)
-def get_current_project_charter(project_id: UUID, db: Session = Depends(get_db)) -> ProjectCharterRead:
+def get_current_project_charter(
+    project_id: UUID,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     """Get the current version of project charter for a project."""
     charter = ProjectCharterService.get_current_project_charter(db, project_id)
     if charter is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No project charter found for this project")
 
-    return ProjectCharterRead.model_validate(charter)
+    etag = _etag(charter)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+    return model_response(ProjectCharterRead.model_validate(charter), headers={"ETag": etag})
 
 
 @router.get("/{project_id}/charters/{charter_id}", response_model=ProjectCharterRead)
-def get_project_charter(project_id: UUID, charter_id: UUID, db: Session = Depends(get_db)) -> ProjectCharterRead:
+def get_project_charter(
+    project_id: UUID,
+    charter_id: UUID,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     """Get a specific project charter."""
     charter = ProjectCharterService.get_project_charter(db, charter_id)
     if charter is None:
@@ -218,7 +328,11 @@ def get_project_charter(project_id: UUID, charter_id: UUID, db: Session = Depend
     if charter.project_id != project_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project charter not found for this project")
 
-    return ProjectCharterRead.model_validate(charter)
+    etag = _etag(charter)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+    return model_response(ProjectCharterRead.model_validate(charter), headers={"ETag": etag})
 
 
 @router.put("/{project_id}/charters/{charter_id}", response_model=ProjectCharterRead)
@@ -226,16 +340,24 @@ def update_project_charter(
     project_id: UUID,
     charter_id: UUID,
     payload: ProjectCharterUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
     db: Session = Depends(get_db)
 ) -> ProjectCharterRead:
-    """Update an existing project charter."""
+    """Update an existing project charter; send the ETag from a GET as If-Match to guard against lost updates."""
     charter = ProjectCharterService.get_project_charter(db, charter_id)
     if charter is None or charter.project_id != project_id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Project charter not found")
+    require_if_match(if_match, _etag(charter))
 
     try:
-        updated_charter = ProjectCharterService.update_project_charter(db, charter_id, payload)
+        updated_charter = ProjectCharterService.update_project_charter(
+            db, charter_id, payload, expected_updated_at=charter.updated_at if if_match is not None else None
+        )
+        response.headers["ETag"] = _etag(updated_charter)
         return ProjectCharterRead.model_validate(updated_charter)
+    except ConcurrentUpdateError as exc:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
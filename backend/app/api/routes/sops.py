@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
+from app.api.etags import entity_tag, not_modified, require_if_match
+from app.api.responses import model_response
+from app.db.models import SOP
 from app.db.session import get_db
 from app.schemas.sop import (
     SOPCreate,
@@ -10,28 +13,38 @@ from app.schemas.sop import (
     SOPHistoryRead,
     SOPList,
     SOPRead,
+    SOPRelated,
+    SOPRelatedList,
     SOPSummary,
     SOPUpdate,
 )
 from app.services import sop_service
+from app.services.concurrency import ConcurrentUpdateError
+from app.services.embedding_index_service import get_embedding_index
 
 router = APIRouter(prefix="/sops", tags=["sops"])
 
 
+def _etag(sop: SOP) -> str:
+    return entity_tag("sop", sop.id, sop.version)
+
+
 @router.get("/", response_model=SOPList)
-def list_sops(db: Session = Depends(get_db)) -> SOPList:
+def list_sops(db: Session = Depends(get_db)) -> Response:
     sops = sop_service.list_sops(db)
-    return SOPList(
-        items=[
-            SOPSummary(
-                id=sop.id,
-                title=sop.title,
-                version=sop.version,
-                display_order=sop.display_order,
-                updated_at=sop.updated_at,
-            )
-            for sop in sops
-        ]
+    return model_response(
+        SOPList(
+            items=[
+                SOPSummary(
+                    id=sop.id,
+                    title=sop.title,
+                    version=sop.version,
+                    display_order=sop.display_order,
+                    updated_at=sop.updated_at,
+                )
+                for sop in sops
+            ]
+        )
     )
 
 
@@ -50,29 +63,57 @@ def create_sop(payload: SOPCreate, db: Session = Depends(get_db)) -> SOPRead:
 
 
 @router.get("/{sop_id}", response_model=SOPRead)
-def get_sop(sop_id: str, db: Session = Depends(get_db)) -> SOPRead:
+def get_sop(
+    sop_id: str,
+    if_none_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> Response:
     sop = sop_service.get_sop(db, sop_id)
     if sop is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SOP not found")
 
-    return SOPRead(
-        id=sop.id,
-        title=sop.title,
-        version=sop.version,
-        content=sop.content,
-        display_order=sop.display_order,
-        created_at=sop.created_at,
-        updated_at=sop.updated_at,
+    etag = _etag(sop)
+    cached = not_modified(if_none_match, etag)
+    if cached is not None:
+        return cached
+    return model_response(
+        SOPRead(
+            id=sop.id,
+            title=sop.title,
+            version=sop.version,
+            content=sop.content,
+            display_order=sop.display_order,
+            created_at=sop.created_at,
+            updated_at=sop.updated_at,
+        ),
+        headers={"ETag": etag},
     )
 
 
 @router.put("/{sop_id}", response_model=SOPRead)
-def update_sop(sop_id: str, payload: SOPUpdate, db: Session = Depends(get_db)) -> SOPRead:
+def update_sop(
+    sop_id: str,
+    payload: SOPUpdate,
+    response: Response,
+    if_match: str | None = Header(None),
+    db: Session = Depends(get_db),
+) -> SOPRead:
+    expected_version = None
+    if if_match is not None:
+        current = sop_service.get_sop(db, sop_id)
+        if current is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SOP not found")
+        require_if_match(if_match, _etag(current))
+        expected_version = current.version
+
     try:
-        sop = sop_service.update_sop(db, sop_id, payload)
+        sop = sop_service.update_sop(db, sop_id, payload, expected_version=expected_version)
+    except ConcurrentUpdateError as exc:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
+    response.headers["ETag"] = _etag(sop)
     return SOPRead(
         id=sop.id,
         title=sop.title,
@@ -85,23 +126,55 @@ def update_sop(sop_id: str, payload: SOPUpdate, db: Session = Depends(get_db)) -
 
 
 @router.get("/{sop_id}/history", response_model=SOPHistoryList)
-def list_history(sop_id: str, db: Session = Depends(get_db)) -> SOPHistoryList:
+def list_history(sop_id: str, db: Session = Depends(get_db)) -> Response:
     sop = sop_service.get_sop(db, sop_id)
     if sop is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SOP not found")
 
     history_entries = sop_service.list_sop_history(db, sop_id)
-    return SOPHistoryList(
-        items=[
-            SOPHistoryRead(
-                id=entry.id,
-                sop_id=entry.sop_id,
-                title=entry.title,
-                version=entry.version,
-                content=entry.content,
-                edited_by=entry.edited_by,
-                created_at=entry.created_at,
-            )
-            for entry in history_entries
-        ]
+    return model_response(
+        SOPHistoryList(
+            items=[
+                SOPHistoryRead(
+                    id=entry.id,
+                    sop_id=entry.sop_id,
+                    title=entry.title,
+                    version=entry.version,
+                    content=entry.content,
+                    edited_by=entry.edited_by,
+                    created_at=entry.created_at,
+                )
+                for entry in history_entries
+            ]
+        )
     )
+
+
+@router.get("/{sop_id}/related", response_model=SOPRelatedList)
+def list_related(sop_id: str, limit: int = Query(5, ge=1, le=50), db: Session = Depends(get_db)) -> SOPRelatedList:
+    sop = sop_service.get_sop(db, sop_id)
+    if sop is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="SOP not found")
+
+    try:
+        ranked = get_embedding_index().related_sops(db, str(sop.id), limit=limit)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc)) from exc
+
+    related_sops = sop_service.get_sops_by_id(db, [related_id for related_id, _ in ranked])
+    items = []
+    for related_id, score in ranked:
+        related = related_sops.get(related_id)
+        if related is None:
+            continue
+        items.append(
+            SOPRelated(
+                id=related.id,
+                title=related.title,
+                version=related.version,
+                display_order=related.display_order,
+                updated_at=related.updated_at,
+                score=score,
+            )
+        )
+    return SOPRelatedList(items=items)
@@ -1,9 +1,58 @@
 from functools import lru_cache
-from typing import Literal
+from typing import Any, Literal
 
+from pydantic import BaseModel, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class LLMEndpointConfig(BaseModel):
+    """One provider endpoint / deployment in the LLM routing pool."""
+
+    name: str
+    provider: Literal["openai", "azure"] = "openai"
+    api_key: str | None = None
+    # OpenAI-compatible base URL, e.g. a proxy or the local fake provider
+    base_url: str | None = None
+    azure_endpoint: str | None = None
+    api_version: str | None = None
+    # Model name for OpenAI, deployment name for Azure
+    model: str
+    embedding_model: str | None = None
+    # Lower values are preferred; endpoints with equal priority compete on latency
+    priority: int = 0
+    timeout_s: float | None = None
+    # Task-profile model name -> deployment/model to use on this endpoint
+    deployments: dict[str, str] = Field(default_factory=dict)
+    # Strongest response_format this endpoint accepts; None picks json_schema for
+    # OpenAI and json_object for Azure (json_schema needs api-version 2024-08-01+)
+    structured_output: Literal["json_schema", "json_object", "none"] | None = None
+
+
+LLMTask = Literal["chat", "project_chat", "title", "ai_edit", "summarize"]
+
+
+class LLMTaskProfile(BaseModel):
+    """Model selection and generation limits for one kind of LLM call."""
+
+    # None uses the endpoint's default model / deployment
+    model: str | None = None
+    # Upper bound on completion length; keeps cheap tasks from running long
+    max_tokens: int | None = Field(default=None, gt=0)
+    temperature: float = Field(default=0.2, ge=0.0, le=2.0)
+    # Prompt budget checked locally before the call; older chat turns are
+    # dropped to fit, and a prompt that still does not fit fails fast
+    max_prompt_tokens: int | None = Field(default=None, gt=0)
+
+
+DEFAULT_LLM_TASK_PROFILES: dict[str, dict[str, Any]] = {
+    "chat": {"max_tokens": 1500, "temperature": 0.2, "max_prompt_tokens": 100_000},
+    "project_chat": {"max_tokens": 1500, "temperature": 0.2, "max_prompt_tokens": 100_000},
+    "title": {"max_tokens": 16, "temperature": 0.0, "max_prompt_tokens": 4_000},
+    "ai_edit": {"max_tokens": 4000, "temperature": 0.2, "max_prompt_tokens": 32_000},
+    "summarize": {"max_tokens": 600, "temperature": 0.0, "max_prompt_tokens": 16_000},
+}
+
+
 class Settings(BaseSettings):
     """Application configuration with environment-variable overrides."""
 
@@ -17,6 +66,111 @@ class Settings(BaseSettings):
     azure_openai_endpoint: str | None = None
     azure_openai_deployment_name: str = "gpt-4o-mini"
     azure_openai_api_version: str = "2024-02-01"
+    azure_openai_embedding_deployment_name: str = "text-embedding-3-small"
+
+    # Client-side limits, applied per provider + model. Concurrency adapts
+    # between 1 and llm_max_concurrency based on 429/503 responses.
+    llm_max_concurrency: int = 8
+    llm_requests_per_minute: int = 500
+    llm_tokens_per_minute: int = 200_000
+    llm_completion_token_estimate: int = 500
+    llm_rate_limit_max_wait_s: float = 60.0
+    llm_max_retries: int = 4
+    llm_retry_base_delay_ms: int = 500
+    llm_retry_max_delay_ms: int = 20_000
+    llm_request_timeout_s: float = 60.0
+
+    # Routing pool (JSON list in LLM_ENDPOINTS). When empty, a single endpoint
+    # is built from llm_provider and the openai_* / azure_openai_* settings.
+    llm_endpoints: list[LLMEndpointConfig] = Field(default_factory=list)
+    # Retries spent on one endpoint before failing over to the next
+    llm_failover_after_retries: int = 1
+    llm_circuit_failure_threshold: int = 5
+    llm_circuit_reset_s: float = 30.0
+    # Hedged requests for the interactive chat path: if the first endpoint has
+    # not answered after its p95 latency (or this default), ask a second one.
+    llm_hedge_interactive: bool = False
+    llm_hedge_delay_ms: int = 3000
+
+    # tiktoken encoding used for prompt budgets (approximated offline without tiktoken)
+    llm_tokenizer_encoding: str = "o200k_base"
+    # Per-task model routing (JSON object in LLM_TASK_PROFILES). Entries are
+    # merged field-by-field over DEFAULT_LLM_TASK_PROFILES.
+    llm_task_profiles: dict[LLMTask, LLMTaskProfile] = Field(
+        default_factory=lambda: {task: LLMTaskProfile(**profile) for task, profile in DEFAULT_LLM_TASK_PROFILES.items()}
+    )
+
+    # Embedding index: "provider" calls the LLM provider's embedding API,
+    # "hashing" is a deterministic offline embedder for local runs and tests.
+    embedding_backend: Literal["provider", "hashing"] = "provider"
+    openai_embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: int = 384
+    embedding_batch_size: int = 64
+    embedding_batch_window_ms: int = 10
+    embedding_index_path: str | None = None
+    embedding_index_mmap: bool = False
+    # Background re-sync of the index (SOP writes also trigger one immediately)
+    embedding_index_sync_interval_s: float = Field(default=60.0, gt=0)
+
+    # AI edit pipeline: fields per LLM call and how many calls run at once
+    ai_edit_field_group_size: int = 6
+    ai_edit_max_parallel_groups: int = 4
+    # AI edit prompt size: SOP tokens per call, and how much of context-only
+    # fields (outside the group being edited) is shown
+    ai_edit_sop_token_budget: int = 3000
+    ai_edit_context_array_limit: int = 5
+    ai_edit_context_string_limit: int = 400
+    # AI edit jobs (/api/ai-edits/jobs): projects processed at once per job, projects
+    # started per minute, and how long a job's lease lasts without a heartbeat.
+    # Each worker re-checks for queued / orphaned jobs every sweep interval and
+    # waits up to the shutdown timeout for in-flight items before requeueing its jobs
+    ai_edit_job_concurrency: int = 4
+    ai_edit_job_projects_per_minute: int = 30
+    ai_edit_job_lease_s: int = 120
+    ai_edit_job_sweep_interval_s: float = Field(default=30.0, gt=0)
+    ai_edit_job_shutdown_timeout_s: float = Field(default=20.0, ge=0)
+
+    # Rendered-response cache for GET /api/sops, /api/project-sops and /api/projects.
+    # Writes invalidate it in-process and, on Postgres, on every worker through the
+    # change feed; the TTL only bounds staleness while the feed is not live.
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 512
+    response_cache_ttl_s: float | None = 60.0
+    response_cache_control: str = "no-cache"
+
+    # Response compression: encodings offered in preference order ("br" needs the
+    # brotli extra), and the smallest complete body worth compressing
+    compression_enabled: bool = True
+    compression_encodings: list[Literal["br", "gzip"]] = Field(default_factory=lambda: ["br", "gzip"])
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = Field(default=6, ge=1, le=9)
+    compression_brotli_quality: int = Field(default=5, ge=0, le=11)
+
+    # GET /api/export: rows fetched per server-side cursor round trip
+    export_batch_size: int = Field(default=1000, gt=0)
+    # POST /api/projects/import: rows validated and inserted per transaction
+    project_import_batch_size: int = Field(default=500, gt=0)
+    # ProjectSOP templates are cached per process. Writes invalidate every worker
+    # through the change feed; while it is not live (SQLite) the table is re-checked this often
+    project_sop_cache_poll_interval_s: float = 5.0
+    # GET /api/changes (Postgres only): one LISTEN connection per worker fans out to
+    # every stream; events buffered per client before it is told to resync, and the
+    # idle interval between keepalive comments
+    change_feed_enabled: bool = True
+    change_feed_queue_size: int = Field(default=256, gt=0)
+    change_feed_keepalive_s: float = Field(default=15.0, gt=0)
+
+    @field_validator("llm_task_profiles", mode="before")
+    @classmethod
+    def _merge_task_profiles(cls, value: Any) -> Any:
+        if not isinstance(value, dict):
+            return value
+        merged = {task: dict(profile) for task, profile in DEFAULT_LLM_TASK_PROFILES.items()}
+        for task, overrides in value.items():
+            if isinstance(overrides, LLMTaskProfile):
+                overrides = overrides.model_dump(exclude_unset=True)
+            merged.setdefault(task, {}).update(overrides)
+        return merged
 
     model_config = SettingsConfigDict(env_file="../.env", env_file_encoding="utf-8", env_prefix="", extra="ignore")
 
@@ -9,6 +9,8 @@ from app.db.models.project_sop import (
     ProjectSOP,
     ProjectSOPHistory,
 )
+from app.db.models.ai_edit_job import AIEditJob, AIEditJobItem
+from app.db.models.project_code_counter import ProjectCodeCounter
 
 __all__ = [
     "Base",
@@ -21,4 +23,7 @@ __all__ = [
     "ProjectCharter",
     "ProjectSOP",
     "ProjectSOPHistory",
+    "AIEditJob",
+    "AIEditJobItem",
+    "ProjectCodeCounter",
 ]
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import uuid
+
+from sqlalchemy import Column, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.db.models.base import Base, TimestampMixin
+from app.db.types import GUID, JSONDocument, UTCDateTime
+
+
+class AIEditJob(Base, TimestampMixin):
+    """A portfolio-wide AI suggestion run: one instruction applied to many projects' documents."""
+    __tablename__ = "ai_edit_jobs"
+
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
+    document_type = Column(String(50), nullable=False)
+    user_instructions = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, completed, failed, cancelled
+    total_items = Column(Integer, nullable=False, default=0)
+    completed_items = Column(Integer, nullable=False, default=0)
+    failed_items = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+
+    # Lease held by the worker running the job
+    worker_id = Column(String(255))
+    heartbeat_at = Column(UTCDateTime)
+    started_at = Column(UTCDateTime)
+    finished_at = Column(UTCDateTime)
+
+    created_by = Column(String(255))
+
+    # Relationships
+    items = relationship("AIEditJobItem", back_populates="job", cascade="all, delete-orphan", passive_deletes=True)
+
+
+class AIEditJobItem(Base, TimestampMixin):
+    """One project within an AI edit job; its suggestions are stored for later review."""
+    __tablename__ = "ai_edit_job_items"
+    __table_args__ = (UniqueConstraint("job_id", "project_id"),)
+
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
+    job_id = Column(GUID, ForeignKey("ai_edit_jobs.id", ondelete="CASCADE"), nullable=False)
+    project_id = Column(GUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, completed, failed
+    document_id = Column(GUID)
+    document_updated_at = Column(UTCDateTime)  # revision the suggestions are based on
+    suggestions = Column(JSONDocument)
+    overall_reasoning = Column(Text)
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    completed_at = Column(UTCDateTime)
+
+    # Relationships
+    job = relationship("AIEditJob", back_populates="items")
@@ -1,5 +1,15 @@
+from sqlalchemy import Column, func
 from sqlalchemy.orm import DeclarativeBase
 
+from app.db.types import UTCDateTime, utcnow
+
 
 class Base(DeclarativeBase):
     pass
+
+
+class TimestampMixin:
+    # Stamped by the ORM, so SQLite behaves like Postgres' set_updated_at
+    # trigger; the server defaults still cover rows written with raw SQL
+    created_at = Column(UTCDateTime, default=utcnow, server_default=func.now(), nullable=False)
+    updated_at = Column(UTCDateTime, default=utcnow, onupdate=utcnow, server_default=func.now(), nullable=False)
@@ -4,22 +4,17 @@ import uuid
 from decimal import Decimal
 from typing import Optional
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, JSON, Numeric, String, Text, func
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, Numeric, String, Text, func
 from sqlalchemy.orm import relationship
 
-from app.db.models.base import Base
-
-
-class TimestampMixin:
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+from app.db.models.base import Base, TimestampMixin
+from app.db.types import GUID, JSONDocument, UTCDateTime
 
 
 class Project(Base, TimestampMixin):
     __tablename__ = "projects"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
     project_name = Column(String(255), nullable=False, unique=True)
     project_code = Column(String(50), unique=True)
 
@@ -52,8 +47,8 @@ class Project(Base, TimestampMixin):
     # Metadata
     is_active = Column(Boolean, default=True)
     display_order = Column(Integer, default=0)
-    tags = Column(JSON)
-    custom_fields = Column(JSON)
+    tags = Column(JSONDocument)
+    custom_fields = Column(JSONDocument)
 
     # Audit fields
     created_by = Column(String(255))
@@ -67,9 +62,9 @@ class Project(Base, TimestampMixin):
 class BusinessCase(Base, TimestampMixin):
     __tablename__ = "business_cases"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
-    project_sop_id = Column(UUID(as_uuid=True), ForeignKey("project_sops.id"), nullable=True)
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
+    project_id = Column(GUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    project_sop_id = Column(GUID, ForeignKey("project_sops.id"), nullable=True)
     version = Column(String(10), default="1.0")
     title = Column(String(255))
 
@@ -84,48 +79,48 @@ class BusinessCase(Base, TimestampMixin):
     proposed_end_date = Column(Date)
     estimated_duration_months = Column(Integer)
     sponsor = Column(String(255))
-    approvals = Column(JSON)
+    approvals = Column(JSONDocument)
 
     # Core narrative sections
     project_description = Column(Text)
-    background = Column(JSON)
-    objectives = Column(JSON)
-    deliverables = Column(JSON)
-    scope_in = Column(JSON)
-    scope_out = Column(JSON)
+    background = Column(JSONDocument)
+    objectives = Column(JSONDocument)
+    deliverables = Column(JSONDocument)
+    scope_in = Column(JSONDocument)
+    scope_out = Column(JSONDocument)
 
     # Dependencies & planning inputs
-    interdependencies = Column(JSON)
-    key_assumptions = Column(JSON)
-    constraints = Column(JSON)
+    interdependencies = Column(JSONDocument)
+    key_assumptions = Column(JSONDocument)
+    constraints = Column(JSONDocument)
 
     # Risk & opportunity analysis
-    risks = Column(JSON)
-    opportunities = Column(JSON)
+    risks = Column(JSONDocument)
+    opportunities = Column(JSONDocument)
 
     # Financial analysis
-    costs = Column(JSON)
-    benefits = Column(JSON)
+    costs = Column(JSONDocument)
+    benefits = Column(JSONDocument)
     roi_percentage = Column(Numeric(5, 2))
     npv_value = Column(Numeric(15, 2))
     payback_period_months = Column(Integer)
-    financial_assumptions = Column(JSON)
+    financial_assumptions = Column(JSONDocument)
 
     # Analysis & recommendation
-    options_considered = Column(JSON)
+    options_considered = Column(JSONDocument)
     recommended_option = Column(Text)
     recommendation_rationale = Column(Text)
-    success_criteria = Column(JSON)
+    success_criteria = Column(JSONDocument)
 
     # Approval workflow
     status = Column(String(20), default="draft")
     approval_level = Column(String(20))
-    submitted_date = Column(DateTime(timezone=True))
-    approved_date = Column(DateTime(timezone=True))
+    submitted_date = Column(UTCDateTime)
+    approved_date = Column(UTCDateTime)
     approved_by = Column(String(255))
 
     # Version control
-    supersedes_version = Column(UUID(as_uuid=True), ForeignKey("business_cases.id"))
+    supersedes_version = Column(GUID, ForeignKey("business_cases.id"))
     is_current_version = Column(Boolean, default=True)
 
     # Audit fields
@@ -141,10 +136,10 @@ class BusinessCase(Base, TimestampMixin):
 class ProjectCharter(Base, TimestampMixin):
     __tablename__ = "project_charters"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
-    business_case_id = Column(UUID(as_uuid=True), ForeignKey("business_cases.id"))
-    project_sop_id = Column(UUID(as_uuid=True), ForeignKey("project_sops.id"), nullable=True)
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
+    project_id = Column(GUID, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    business_case_id = Column(GUID, ForeignKey("business_cases.id"))
+    project_sop_id = Column(GUID, ForeignKey("project_sops.id"), nullable=True)
     version = Column(String(10), default="1.0")
     title = Column(String(255))
 
@@ -158,64 +153,64 @@ class ProjectCharter(Base, TimestampMixin):
     # Authority & governance
     sponsor = Column(String(255), nullable=False)
     project_manager = Column(String(255))
-    steering_committee = Column(JSON)
+    steering_committee = Column(JSONDocument)
     governance_structure = Column(Text)
 
     # Team structure
-    project_team = Column(JSON)
-    key_stakeholders = Column(JSON)
-    external_dependencies = Column(JSON)
+    project_team = Column(JSONDocument)
+    key_stakeholders = Column(JSONDocument)
+    external_dependencies = Column(JSONDocument)
 
     # Business justification
     business_case_summary = Column(Text)
     strategic_alignment = Column(Text)
-    business_benefits = Column(JSON)
-    success_criteria = Column(JSON)
+    business_benefits = Column(JSONDocument)
+    success_criteria = Column(JSONDocument)
 
     # Project definition
     project_objectives = Column(Text)
-    scope_deliverables = Column(JSON)
-    scope_exclusions = Column(JSON)
-    assumptions = Column(JSON)
-    constraints = Column(JSON)
+    scope_deliverables = Column(JSONDocument)
+    scope_exclusions = Column(JSONDocument)
+    assumptions = Column(JSONDocument)
+    constraints = Column(JSONDocument)
 
     # Resource requirements
-    resource_requirements = Column(JSON)
+    resource_requirements = Column(JSONDocument)
     budget_authority = Column(Numeric(15, 2))
     budget_tolerance = Column(Numeric(5, 2))
 
     # Schedule & milestones
-    key_dates_milestones = Column(JSON)
+    key_dates_milestones = Column(JSONDocument)
     schedule_tolerance = Column(Integer)
-    critical_deadlines = Column(JSON)
+    critical_deadlines = Column(JSONDocument)
 
     # Risk management
-    threats_opportunities = Column(JSON)
+    threats_opportunities = Column(JSONDocument)
     risk_tolerance = Column(String(20))
-    escalation_criteria = Column(JSON)
+    escalation_criteria = Column(JSONDocument)
 
     # Authority & decision rights
-    decision_authority = Column(JSON)
+    decision_authority = Column(JSONDocument)
     change_control_process = Column(Text)
-    reporting_requirements = Column(JSON)
+    reporting_requirements = Column(JSONDocument)
 
     # Quality & compliance
-    quality_standards = Column(JSON)
-    compliance_requirements = Column(JSON)
+    quality_standards = Column(JSONDocument)
+    compliance_requirements = Column(JSONDocument)
     acceptance_criteria = Column(Text)
 
     # Approval workflow
     status = Column(String(20), default="draft")
     approval_level = Column(String(20))
-    submitted_date = Column(DateTime(timezone=True))
-    approved_date = Column(DateTime(timezone=True))
+    submitted_date = Column(UTCDateTime)
+    approved_date = Column(UTCDateTime)
     approved_by = Column(String(255))
     approval_comments = Column(Text)
 
     # Version control
-    supersedes_version = Column(UUID(as_uuid=True), ForeignKey("project_charters.id"))
+    supersedes_version = Column(GUID, ForeignKey("project_charters.id"))
     is_current_version = Column(Boolean, default=True)
-    change_log = Column(JSON)
+    change_log = Column(JSONDocument)
 
     # Audit fields
     created_by = Column(String(255))
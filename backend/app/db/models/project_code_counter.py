@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from sqlalchemy import Column, Integer, String, func
+
+from app.db.models.base import Base
+from app.db.types import UTCDateTime, utcnow
+
+
+class ProjectCodeCounter(Base):
+    """Last number handed out for one project code prefix (e.g. ``PRJ-2024``)."""
+    __tablename__ = "project_code_counters"
+
+    prefix = Column(String(50), primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(UTCDateTime, default=utcnow, server_default=func.now(), onupdate=utcnow, nullable=False)
@@ -1,11 +1,61 @@
 from collections.abc import Generator
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from app.core.config import settings
 
-engine = create_engine(settings.database_url, future=True, echo=False)
+
+def _enable_sqlite_foreign_keys(dbapi_connection: Any, _connection_record: Any) -> None:
+    # SQLite ignores FOREIGN KEY / ON DELETE CASCADE unless asked per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def build_engine(database_url: str) -> Engine:
+    """Engine for ``database_url``; SQLite URLs work without any external service.
+
+    ``sqlite+pysqlite:///:memory:`` gives a throwaway database: one connection
+    shared by every thread (``StaticPool``) with the schema created from the
+    models, so the API runs (e.g. for tests and benchmarks) with no setup.
+    Sessions share that connection, so their transactions are not isolated.
+    """
+
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url, future=True, echo=False)
+
+    in_memory = url.database in (None, "", ":memory:")
+    engine = create_engine(
+        url,
+        future=True,
+        echo=False,
+        connect_args={"check_same_thread": False},
+        **({"poolclass": StaticPool} if in_memory else {}),
+    )
+    event.listen(engine, "connect", _enable_sqlite_foreign_keys)
+    if in_memory:
+        from app.db.models import Base
+
+        Base.metadata.create_all(engine)
+    return engine
+
+
+def shares_connection(engine: Engine) -> bool:
+    """Whether every session of ``engine`` runs on one connection (in-memory SQLite).
+
+    Background threads must not use such an engine: their commits and
+    rollbacks would land in whatever transaction a request has open.
+    """
+
+    return isinstance(engine.pool, StaticPool)
+
+
+engine = build_engine(settings.database_url)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
 
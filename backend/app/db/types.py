@@ -0,0 +1,53 @@
+"""Column types that behave the same on Postgres and SQLite.
+
+- ``GUID`` is native ``UUID`` on Postgres and ``CHAR(32)`` elsewhere, always
+  ``uuid.UUID`` in Python; like Postgres it also accepts UUID strings as
+  parameters, which is how most routes pass ids.
+- ``JSONDocument`` is ``JSONB`` on Postgres (matching db/schema.sql) and
+  plain ``JSON`` elsewhere.
+- ``UTCDateTime`` stores aware datetimes as UTC and always returns aware
+  values, even on SQLite, which has no time zone support.
+"""
+
+from __future__ import annotations
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import JSON, DateTime, TypeDecorator, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
+
+__all__ = ["GUID", "JSONDocument", "UTCDateTime", "utcnow"]
+
+JSONDocument = JSON().with_variant(JSONB(), "postgresql")
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class GUID(TypeDecorator):
+    impl = Uuid
+    cache_ok = True
+
+    def process_bind_param(self, value: uuid.UUID | str | None, dialect: Any) -> uuid.UUID | None:
+        if isinstance(value, str):
+            return uuid.UUID(value)
+        return value
+
+
+class UTCDateTime(TypeDecorator):
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value: datetime | None, dialect: Any) -> datetime | None:
+        if value is not None and value.tzinfo is not None:
+            # SQLite drops the offset, so everything it stores must be UTC
+            value = value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value: datetime | None, dialect: Any) -> datetime | None:
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
@@ -0,0 +1,204 @@
+"""OpenAI-compatible fake LLM provider for exercising routing and failover offline.
+
+Serves ``/v1/chat/completions`` and ``/v1/embeddings`` (plus the Azure
+``/openai/deployments/{deployment}/...`` variants) with configurable latency
+and failure injection. ``"stream": true`` chat requests are answered as
+server-sent events, one small chunk per ``--stream-chunk-ms``. Point an endpoint at it with
+``{"name": "fake-a", "base_url": "http://localhost:9001/v1", "api_key": "fake", "model": "fake"}``
+in ``LLM_ENDPOINTS``.
+
+Run several instances to simulate a pool::
+
+    python -m app.devtools.fake_llm_provider --port 9001 --latency-ms 50
+    python -m app.devtools.fake_llm_provider --port 9002 --latency-ms 800 --error-rate 0.2
+
+``--reply-file`` returns that file's contents instead of echoing the prompt,
+e.g. a canned AI edit suggestions JSON document.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import Any
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.services.embeddings import HashingEmbedder
+
+
+class FakeProviderConfig:
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        retry_after_s: float | None = None,
+        embedding_dimensions: int = 64,
+        reply: str | None = None,
+        stream_chunk_chars: int = 8,
+        stream_chunk_ms: float = 20.0,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after_s = retry_after_s
+        self.embedding_dimensions = embedding_dimensions
+        self.reply = reply
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_chunk_ms = stream_chunk_ms
+
+
+def create_app(config: FakeProviderConfig | None = None) -> FastAPI:
+    config = config or FakeProviderConfig()
+    embedder = HashingEmbedder(config.embedding_dimensions)
+    fake = FastAPI(title="Fake LLM provider")
+    fake.state.config = config
+    fake.state.requests = 0
+
+    async def _simulate() -> JSONResponse | None:
+        fake.state.requests += 1
+        cfg: FakeProviderConfig = fake.state.config
+        delay = max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        if random.random() < cfg.error_rate:
+            headers = {}
+            if cfg.retry_after_s is not None:
+                headers["retry-after"] = str(cfg.retry_after_s)
+            return JSONResponse(
+                status_code=cfg.error_status,
+                content={"error": {"message": "Injected failure", "type": "fake_error", "code": cfg.error_status}},
+                headers=headers,
+            )
+        return None
+
+    def _words(text: str) -> int:
+        return max(1, len(text) // 4)
+
+    async def chat_completions(request: Request, deployment: str | None = None) -> Any:
+        failure = await _simulate()
+        if failure is not None:
+            return failure
+
+        body = await request.json()
+        messages = body.get("messages", [])
+        last_user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+        model = deployment or body.get("model")
+        cfg: FakeProviderConfig = fake.state.config
+        content = cfg.reply if cfg.reply is not None else f"[fake:{model}] {last_user[:200]}"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        if body.get("stream"):
+            return StreamingResponse(_stream_chunks(completion_id, model, content), media_type="text/event-stream")
+
+        prompt_tokens = sum(_words(str(m.get("content", ""))) for m in messages)
+        completion_tokens = _words(content)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [
+                {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    async def _stream_chunks(completion_id: str, model: str | None, content: str) -> Any:
+        cfg: FakeProviderConfig = fake.state.config
+        size = max(1, cfg.stream_chunk_chars)
+        for start in range(0, len(content), size):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + size]}, "finish_reason": None}],
+            }
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(cfg.stream_chunk_ms / 1000)
+        final = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+        }
+        yield f"data: {json.dumps(final)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    async def embeddings(request: Request, deployment: str | None = None) -> Any:
+        failure = await _simulate()
+        if failure is not None:
+            return failure
+
+        body = await request.json()
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        vectors = embedder.embed([str(text) for text in inputs])
+        tokens = sum(_words(str(text)) for text in inputs)
+        return {
+            "object": "list",
+            "model": deployment or body.get("model"),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": vector.tolist()}
+                for index, vector in enumerate(vectors)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    fake.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+    fake.add_api_route("/v1/embeddings", embeddings, methods=["POST"])
+    fake.add_api_route("/openai/deployments/{deployment}/chat/completions", chat_completions, methods=["POST"])
+    fake.add_api_route("/openai/deployments/{deployment}/embeddings", embeddings, methods=["POST"])
+
+    @fake.get("/stats")
+    def stats() -> dict[str, int]:
+        return {"requests": fake.state.requests}
+
+    return fake
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--retry-after-s", type=float, default=None)
+    parser.add_argument("--reply-file", default=None)
+    parser.add_argument("--stream-chunk-chars", type=int, default=8)
+    parser.add_argument("--stream-chunk-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    config = FakeProviderConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after_s=args.retry_after_s,
+        reply=open(args.reply_file, encoding="utf-8").read() if args.reply_file else None,
+        stream_chunk_chars=args.stream_chunk_chars,
+        stream_chunk_ms=args.stream_chunk_ms,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,86 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import chat, sops, projects, project_sops, ai_edits
+from app.api.compression import CompressionPolicy
+from app.api.middleware import CompressionMiddleware, ResponseCacheMiddleware
+from app.api.responses import ORJSONResponse
+from app.api.routes import chat, sops, projects, project_sops, ai_edits, export, changes
+from app.core.config import settings
+from app.db.session import engine
+from app.services.ai_edit_job_service import job_runner
+from app.services.change_feed import change_feed
+from app.services.embedding_index_service import index_syncer
+from app.services.llm_provider import llm_client
+from app.services.project_sop_cache import project_sop_cache
+from app.services.response_cache import response_cache
+from app.services.token_accounting import token_metrics
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Pick up AI edit jobs left queued or orphaned by a previous process, and keep doing so
+    job_runner.start()
+    index_syncer.start()
+    # The change feed serves GET /api/changes and tells the ProjectSOP and response caches
+    # about other workers' writes, so it runs on Postgres even when the endpoint is disabled
+    if engine.dialect.name == "postgresql":
+        change_feed.start(engine.url.set(drivername="postgresql").render_as_string(hide_password=False))
+    yield
+    await change_feed.stop()
+    index_syncer.stop()
+    # Blocks until in-flight items are checkpointed (bounded), so run it off the event loop
+    await asyncio.to_thread(job_runner.stop)
+
+
+app = FastAPI(
+    title="PMO Playbook API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+compression = (
+    CompressionPolicy(
+        encodings=tuple(settings.compression_encodings),
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+    if settings.compression_enabled
+    else None
+)
 
-app = FastAPI(title="PMO Playbook API", version="0.1.0")
+project_sop_cache.follow(change_feed)
+if settings.response_cache_enabled:
+    response_cache.follow(change_feed)
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        cache_control=settings.response_cache_control,
+        compression=compression,
+    )
 
+# Wraps the cache; precompressed hits pass through it untouched
+if compression is not None:
+    app.add_middleware(CompressionMiddleware, policy=compression)
+
+# Outermost, so cached and compressed responses get CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 app.include_router(sops.router, prefix="/api")
@@ -20,8 +88,15 @@ app.include_router(chat.router, prefix="/api")
 app.include_router(projects.router, prefix="/api")
 app.include_router(project_sops.router, prefix="/api")
 app.include_router(ai_edits.router, prefix="/api/ai-edits")
+app.include_router(export.router, prefix="/api")
+app.include_router(changes.router, prefix="/api")
 
 
 @app.get("/health", tags=["health"])
 def health_check() -> dict[str, str]:
     return {"status": "ok"}
+
+
+@app.get("/health/llm", tags=["health"])
+def llm_health_check() -> dict[str, Any]:
+    return {"endpoints": llm_client.router.snapshot(), "prompt_tokens": token_metrics.snapshot()}
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+from uuid import UUID
 
 from pydantic import BaseModel, Field
 
@@ -32,6 +34,21 @@ class AIEditSuggestionResponse(BaseModel):
     document_id: str = Field(..., description="ID of the document")
 
 
+class AIEditStreamEvent(BaseModel):
+    """One NDJSON line of a streamed AI edit suggestion response."""
+
+    type: Literal["suggestion", "group", "error", "done"] = Field(..., description="Event type")
+    field: Optional[str] = Field(None, description="Field name for suggestion events")
+    suggestion: Optional[FieldSuggestion] = Field(None, description="Suggestion for suggestion events")
+    group: Optional[int] = Field(None, description="Field group index for group and error events")
+    fields: Optional[List[str]] = Field(None, description="Fields covered by the group")
+    overall_reasoning: Optional[str] = Field(None, description="Group-level explanation of suggested changes")
+    detail: Optional[str] = Field(None, description="Error details for error events")
+    document_type: Optional[str] = Field(None, description="Type of document, sent with the done event")
+    project_id: Optional[str] = Field(None, description="ID of the project, sent with the done event")
+    document_id: Optional[str] = Field(None, description="ID of the document, sent with the done event")
+
+
 class AIEditApplyRequest(BaseModel):
     """Request model for applying AI edit suggestions."""
 
@@ -50,6 +67,92 @@ class AIEditApplyResponse(BaseModel):
     message: str = Field(..., description="Success or error message")
 
 
+class AIEditBatchApplyItem(BaseModel):
+    """One project's accepted changes in a batch apply."""
+
+    project_id: str = Field(..., description="ID of the project")
+    document_id: Optional[str] = Field(None, description="ID of the current document the changes were reviewed against")
+    expected_updated_at: Optional[datetime] = Field(None, description="updated_at of the document the changes were reviewed against")
+    if_match: Optional[str] = Field(None, description="ETag of the document the changes were reviewed against")
+    accepted_changes: Dict[str, Any] = Field(..., description="Dictionary of field names to new values that user accepted")
+
+
+class AIEditBatchApplyRequest(BaseModel):
+    """Request model for applying AI edit suggestions to many projects at once."""
+
+    document_type: str = Field(..., description="Type of document (business-case, project-charter)")
+    items: List[AIEditBatchApplyItem] = Field(..., min_length=1, description="Accepted changes per project")
+    user_id: Optional[str] = Field("ai_user", description="ID of user applying changes")
+    all_or_nothing: bool = Field(False, description="Apply nothing if any document fails validation")
+
+
+class AIEditBatchApplyResult(BaseModel):
+    """Per-document outcome of a batch apply."""
+
+    project_id: str = Field(..., description="ID of the project")
+    document_id: Optional[str] = Field(None, description="ID of the updated document")
+    success: bool = Field(..., description="Whether the changes were applied")
+    applied_fields: Optional[List[str]] = Field(None, description="Fields that were updated")
+    error: Optional[str] = Field(None, description="Why the changes were not applied")
+
+
+class AIEditBatchApplyResponse(BaseModel):
+    """Response model for a batch apply."""
+
+    document_type: str = Field(..., description="Type of document the changes were applied to")
+    applied: int = Field(..., description="Number of documents updated")
+    failed: int = Field(..., description="Number of documents not updated")
+    results: List[AIEditBatchApplyResult] = Field(..., description="Per-document results, in request order")
+
+
+class AIEditJobCreate(BaseModel):
+    """Request model for running an AI edit instruction across many projects."""
+
+    document_type: str = Field(..., description="Type of document (business-case, project-charter)")
+    user_instructions: str = Field(..., description="Instructions applied to every project's document")
+    project_ids: Optional[List[UUID]] = Field(None, description="Projects to include; all active projects with a current document if omitted")
+    created_by: Optional[str] = Field(None, description="ID of user starting the job")
+
+
+class AIEditJobRead(BaseModel):
+    """Status and progress of an AI edit job."""
+
+    id: UUID
+    document_type: str
+    user_instructions: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    total_items: int
+    completed_items: int
+    failed_items: int
+    error: Optional[str] = None
+    created_by: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AIEditJobItemRead(BaseModel):
+    """Stored suggestions for one project of an AI edit job."""
+
+    id: UUID
+    project_id: UUID
+    status: Literal["pending", "completed", "failed"]
+    document_id: Optional[UUID] = None
+    document_updated_at: Optional[datetime] = None
+    suggestions: Optional[Dict[str, FieldSuggestion]] = None
+    overall_reasoning: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
 class AIEditErrorResponse(BaseModel):
     """Error response model for AI edit operations."""
 
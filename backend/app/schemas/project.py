@@ -95,6 +95,34 @@ class ProjectList(BaseModel):
     items: List[ProjectSummary]
 
 
+# Bulk import schemas
+class ProjectImportCreated(BaseModel):
+    row: int
+    id: UUID
+    project_name: str
+    project_code: Optional[str]
+
+    class Config:
+        from_attributes = True
+
+
+class ProjectImportError(BaseModel):
+    row: int
+    project_name: Optional[str] = None
+    error: str
+
+    class Config:
+        from_attributes = True
+
+
+class ProjectImportResult(BaseModel):
+    total_rows: int
+    created_count: int
+    failed_count: int
+    created: List[ProjectImportCreated]
+    errors: List[ProjectImportError]
+
+
 # Business Case schemas
 class BusinessCaseBase(BaseModel):
     version: Optional[str] = "1.0"
@@ -55,3 +55,11 @@ class SOPHistoryList(BaseModel):
 
 class SOPList(BaseModel):
     items: list[SOPSummary]
+
+
+class SOPRelated(SOPSummary):
+    score: float = Field(description="Cosine similarity of the closest matching sections")
+
+
+class SOPRelatedList(BaseModel):
+    items: list[SOPRelated]
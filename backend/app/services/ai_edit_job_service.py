@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import Settings, settings
+from app.db.models.ai_edit_job import AIEditJob, AIEditJobItem
+from app.db.models.project import BusinessCase, Project, ProjectCharter
+from app.db.session import SessionLocal, engine, shares_connection
+from app.services import ai_edit_service
+from app.services.llm_rate_limit import TokenBucket
+from app.services.project_service import BusinessCaseService, ProjectCharterService
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_MODELS = {
+    "business-case": BusinessCase,
+    "project-charter": ProjectCharter,
+}
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+# Identifies this process in job leases
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def create_job(
+    db: Session,
+    document_type: str,
+    user_instructions: str,
+    project_ids: list[UUID] | None = None,
+    created_by: str | None = None,
+) -> AIEditJob:
+    """Create a queued job with one pending item per project.
+
+    Without ``project_ids`` the job covers every active project that has a
+    current document of ``document_type``.
+    """
+
+    model = DOCUMENT_MODELS.get(document_type)
+    if model is None:
+        raise ValueError(f"Unsupported document type: {document_type}")
+    if not user_instructions.strip():
+        raise ValueError("User instructions must not be empty")
+
+    if project_ids is None:
+        stmt = (
+            select(Project.id)
+            .join(model, model.project_id == Project.id)
+            .where(Project.is_active == True, model.is_current_version == True)
+            .order_by(Project.display_order, Project.project_name)
+        )
+        project_ids = list(db.execute(stmt).scalars())
+    else:
+        project_ids = list(dict.fromkeys(project_ids))
+        found = set(db.execute(select(Project.id).where(Project.id.in_(project_ids))).scalars())
+        missing = [str(project_id) for project_id in project_ids if project_id not in found]
+        if missing:
+            raise ValueError(f"Projects not found: {', '.join(missing)}")
+
+    if not project_ids:
+        raise ValueError("No projects to process")
+
+    job = AIEditJob(
+        document_type=document_type,
+        user_instructions=user_instructions,
+        status="queued",
+        total_items=len(project_ids),
+        created_by=created_by,
+    )
+    db.add(job)
+    db.flush()
+    db.execute(insert(AIEditJobItem), [{"job_id": job.id, "project_id": project_id} for project_id in project_ids])
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_job(db: Session, job_id: UUID) -> AIEditJob | None:
+    return db.get(AIEditJob, job_id)
+
+
+def list_jobs(db: Session, limit: int = 50) -> list[AIEditJob]:
+    stmt = select(AIEditJob).order_by(AIEditJob.created_at.desc()).limit(limit)
+    return db.execute(stmt).scalars().all()
+
+
+def list_job_items(db: Session, job_id: UUID, status: str | None = None) -> list[AIEditJobItem]:
+    stmt = select(AIEditJobItem).where(AIEditJobItem.job_id == job_id)
+    if status:
+        stmt = stmt.where(AIEditJobItem.status == status)
+    return db.execute(stmt.order_by(AIEditJobItem.created_at, AIEditJobItem.id)).scalars().all()
+
+
+def cancel_job(db: Session, job_id: UUID) -> AIEditJob:
+    """Cancel a queued or running job; items already in flight still finish."""
+
+    job = db.get(AIEditJob, job_id)
+    if job is None:
+        raise ValueError("AI edit job not found")
+    if job.status not in ACTIVE_JOB_STATUSES:
+        raise ValueError(f"Job is already {job.status}")
+    job.status = "cancelled"
+    job.finished_at = _now()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def retry_failed_items(db: Session, job_id: UUID) -> AIEditJob:
+    """Reset a finished job's failed items to pending and queue the job again."""
+
+    job = db.get(AIEditJob, job_id)
+    if job is None:
+        raise ValueError("AI edit job not found")
+    if job.status in ACTIVE_JOB_STATUSES:
+        raise ValueError("Job is still running")
+
+    reset = db.execute(
+        update(AIEditJobItem)
+        .where(AIEditJobItem.job_id == job_id, AIEditJobItem.status == "failed")
+        .values(status="pending", error=None)
+    ).rowcount
+    if not reset and job.completed_items + job.failed_items >= job.total_items:
+        raise ValueError("Job has no failed items to retry")
+
+    job.status = "queued"
+    job.failed_items = max(0, job.failed_items - reset)
+    job.error = None
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _load_document(db: Session, document_type: str, project_id: UUID) -> Any:
+    if document_type == "business-case":
+        return BusinessCaseService.get_current_business_case(db, project_id)
+    return ProjectCharterService.get_current_project_charter(db, project_id)
+
+
+def _jsonable(value: Any) -> Any:
+    # Suggestions echo current values (dates, decimals) that the JSON column cannot store as-is
+    return json.loads(json.dumps(value, default=str))
+
+
+class AIEditJobRunner:
+    """Runs AI edit jobs in background threads with bounded concurrency and a rate limit.
+
+    Each finished item is committed together with the job's counters and
+    heartbeat, so the table is the checkpoint: a job picked up again (after
+    a restart, or by another worker once the lease has gone stale) only
+    processes the items that are still pending.
+
+    Checkpoints only land while this worker holds the lease and the item
+    is still pending, so a job taken over by another worker is never
+    double counted. ``start`` runs a sweep thread that refreshes the
+    heartbeat of this worker's jobs every quarter lease, independently of
+    item progress, and periodically resumes queued jobs and jobs whose
+    lease went stale (a worker that died without handing its jobs back).
+    ``stop`` waits for running jobs to wind down and hands anything still
+    running back to the queue before the process exits.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        app_settings: Settings | None = None,
+        background: bool = True,
+    ) -> None:
+        self.settings = app_settings or settings
+        self._session_factory = session_factory
+        # Off when sessions share one connection: jobs then stay queued
+        self.background = background
+        self._rate = TokenBucket(self.settings.ai_edit_job_projects_per_minute)
+        self._active: set[UUID] = set()
+        self._threads: dict[UUID, threading.Thread] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._sweeper: threading.Thread | None = None
+
+    def submit(self, job_id: UUID) -> bool:
+        """Claim ``job_id`` for this worker and run it in the background.
+
+        Returns False when the job is already running here, is not runnable,
+        another worker holds a live lease on it, or background work is off.
+        """
+
+        if not self.background:
+            return False
+        with self._lock:
+            if job_id in self._active or self._stopping.is_set():
+                return False
+            self._active.add(job_id)
+
+        try:
+            with self._session_factory() as db:
+                claimed = self._claim(db, job_id)
+        except Exception:
+            with self._lock:
+                self._active.discard(job_id)
+            raise
+        if not claimed:
+            with self._lock:
+                self._active.discard(job_id)
+            return False
+
+        thread = threading.Thread(target=self._run, args=(job_id,), name=f"ai-edit-job-{job_id}", daemon=True)
+        with self._lock:
+            self._threads[job_id] = thread
+        thread.start()
+        return True
+
+    def resume_pending(self) -> list[UUID]:
+        """Submit every queued job and every running job whose lease has expired."""
+
+        stale = _now() - timedelta(seconds=self.settings.ai_edit_job_lease_s)
+        with self._session_factory() as db:
+            job_ids = db.execute(
+                select(AIEditJob.id)
+                .where(
+                    or_(
+                        AIEditJob.status == "queued",
+                        (AIEditJob.status == "running")
+                        & or_(AIEditJob.heartbeat_at.is_(None), AIEditJob.heartbeat_at < stale),
+                    )
+                )
+                .order_by(AIEditJob.created_at)
+            ).scalars().all()
+        resumed = [job_id for job_id in job_ids if self.submit(job_id)]
+        if resumed:
+            logger.info(f"Resumed {len(resumed)} AI edit jobs")
+        return resumed
+
+    def start(self) -> None:
+        """Resume pending jobs now, then keep sweeping for queued and orphaned ones."""
+
+        if self._sweeper is not None:
+            return
+        if not self.background:
+            logger.warning("AI edit jobs will not run: the database engine shares one connection (in-memory SQLite)")
+            return
+        self._stopping.clear()
+        self._sweeper = threading.Thread(target=self._sweep, name="ai-edit-job-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop starting new items and hand this worker's jobs back to the queue.
+
+        Waits up to ``timeout`` seconds (``ai_edit_job_shutdown_timeout_s``)
+        for in-flight items to be checkpointed; any job still running here
+        afterwards is requeued directly so the next worker resumes it
+        without waiting out the lease.
+        """
+
+        self._stopping.set()
+        timeout = self.settings.ai_edit_job_shutdown_timeout_s if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        if self._sweeper is not None:
+            self._sweeper.join(timeout=max(0.0, deadline - time.monotonic()))
+            self._sweeper = None
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+        try:
+            with self._session_factory() as db:
+                requeued = db.execute(
+                    update(AIEditJob)
+                    .where(AIEditJob.status == "running", AIEditJob.worker_id == WORKER_ID)
+                    .values(status="queued", worker_id=None, heartbeat_at=None)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                db.commit()
+        except Exception as exc:
+            logger.error(f"Could not hand AI edit jobs back to the queue: {exc}")
+            return
+        if requeued:
+            logger.info(f"Handed {requeued} interrupted AI edit jobs back to the queue")
+
+    def _sweep(self) -> None:
+        # Heartbeats go out well within the lease so a slow LLM call never lets it go stale
+        tick = min(self.settings.ai_edit_job_sweep_interval_s, self.settings.ai_edit_job_lease_s / 4)
+        next_resume = 0.0
+        while not self._stopping.is_set():
+            try:
+                self._heartbeat()
+                if time.monotonic() >= next_resume:
+                    self.resume_pending()
+                    next_resume = time.monotonic() + self.settings.ai_edit_job_sweep_interval_s
+            except Exception as exc:
+                logger.error(f"AI edit job sweep failed: {exc}")
+            self._stopping.wait(tick)
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            active = list(self._active)
+        if not active:
+            return
+        with self._session_factory() as db:
+            db.execute(
+                update(AIEditJob)
+                .where(AIEditJob.id.in_(active), AIEditJob.status == "running", AIEditJob.worker_id == WORKER_ID)
+                .values(heartbeat_at=_now())
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def _claim(self, db: Session, job_id: UUID) -> bool:
+        now = _now()
+        stale = now - timedelta(seconds=self.settings.ai_edit_job_lease_s)
+        claimed = db.execute(
+            update(AIEditJob)
+            .where(
+                AIEditJob.id == job_id,
+                or_(
+                    AIEditJob.status == "queued",
+                    (AIEditJob.status == "running")
+                    & or_(AIEditJob.heartbeat_at.is_(None), AIEditJob.heartbeat_at < stale),
+                ),
+            )
+            # A resumed job keeps its first start time, so its runtime covers every attempt
+            .values(
+                status="running",
+                worker_id=WORKER_ID,
+                heartbeat_at=now,
+                started_at=func.coalesce(AIEditJob.started_at, literal(now, AIEditJob.started_at.type)),
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return claimed == 1
+
+    def _run(self, job_id: UUID) -> None:
+        try:
+            with self._session_factory() as db:
+                job = db.get(AIEditJob, job_id)
+                document_type, user_instructions = job.document_type, job.user_instructions
+                pending = db.execute(
+                    select(AIEditJobItem.id, AIEditJobItem.project_id)
+                    .where(AIEditJobItem.job_id == job_id, AIEditJobItem.status == "pending")
+                    .order_by(AIEditJobItem.created_at, AIEditJobItem.id)
+                ).all()
+
+            concurrency = max(1, self.settings.ai_edit_job_concurrency)
+            slots = threading.Semaphore(concurrency)
+            interrupted = False
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"ai-edit-job-{job_id}") as executor:
+                for item_id, project_id in pending:
+                    slots.acquire()
+                    if self._stopping.is_set() or not self._still_owned(job_id):
+                        slots.release()
+                        interrupted = True
+                        break
+                    wait = self._rate.reserve(1)
+                    if wait > 0 and self._stopping.wait(wait):
+                        slots.release()
+                        interrupted = True
+                        break
+                    future = executor.submit(
+                        self._process_item, job_id, item_id, project_id, document_type, user_instructions
+                    )
+                    future.add_done_callback(lambda done: self._on_item_done(job_id, done, slots))
+
+            self._finish(job_id, interrupted)
+        except Exception as exc:
+            logger.error(f"AI edit job {job_id} failed: {exc}", exc_info=True)
+            self._update_job(job_id, status="failed", error=str(exc), finished_at=_now())
+        finally:
+            with self._lock:
+                self._active.discard(job_id)
+                self._threads.pop(job_id, None)
+
+    @staticmethod
+    def _on_item_done(job_id: UUID, future: Any, slots: threading.Semaphore) -> None:
+        slots.release()
+        exc = future.exception()
+        if exc is not None:
+            # The checkpoint itself failed; the item stays pending and is retried on resume
+            logger.error(f"AI edit job {job_id}: could not record item result: {exc}")
+
+    def _still_owned(self, job_id: UUID) -> bool:
+        with self._session_factory() as db:
+            row = db.execute(select(AIEditJob.status, AIEditJob.worker_id).where(AIEditJob.id == job_id)).first()
+        return row is not None and row.status == "running" and row.worker_id == WORKER_ID
+
+    def _process_item(
+        self,
+        job_id: UUID,
+        item_id: UUID,
+        project_id: UUID,
+        document_type: str,
+        user_instructions: str,
+    ) -> None:
+        with self._session_factory() as db:
+            item_values: dict[str, Any]
+            try:
+                document = _load_document(db, document_type, project_id)
+                if document is None:
+                    raise ValueError(f"No current {document_type.replace('-', ' ')} for project")
+                current_document = {c.name: getattr(document, c.name) for c in document.__table__.columns}
+                result = ai_edit_service.generate_ai_suggestions(
+                    db=db,
+                    document_type=document_type,
+                    current_document=current_document,
+                    user_instructions=user_instructions,
+                    project_id=str(project_id),
+                )
+                item_values = {
+                    "status": "completed",
+                    "document_id": document.id,
+                    "document_updated_at": document.updated_at,
+                    "suggestions": _jsonable(result.get("suggestions", {})),
+                    "overall_reasoning": result.get("overall_reasoning", ""),
+                    "error": None,
+                }
+                counter = AIEditJob.completed_items
+            except Exception as exc:
+                db.rollback()
+                logger.warning(f"AI edit job {job_id}: project {project_id} failed: {exc}")
+                item_values = {"status": "failed", "error": str(exc)}
+                counter = AIEditJob.failed_items
+
+            # Checkpoint: the item's outcome, the job's progress and the lease heartbeat in one
+            # commit, and only while this worker still holds the lease. The job row is updated
+            # (and locked) first, so a worker taking the job over waits for this commit.
+            now = _now()
+            owned = db.execute(
+                update(AIEditJob)
+                .where(AIEditJob.id == job_id, AIEditJob.worker_id == WORKER_ID)
+                .values(heartbeat_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if not owned:
+                db.rollback()
+                logger.warning(f"AI edit job {job_id}: lease lost, discarding result for project {project_id}")
+                return
+            recorded = db.execute(
+                update(AIEditJobItem)
+                .where(AIEditJobItem.id == item_id, AIEditJobItem.status == "pending")
+                .values(**item_values, attempts=AIEditJobItem.attempts + 1, completed_at=now)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if recorded:
+                db.execute(
+                    update(AIEditJob)
+                    .where(AIEditJob.id == job_id)
+                    .values({counter: counter + 1})
+                    .execution_options(synchronize_session=False)
+                )
+            else:
+                logger.warning(f"AI edit job {job_id}: item for project {project_id} was already recorded")
+            db.commit()
+
+    def _finish(self, job_id: UUID, interrupted: bool) -> None:
+        with self._session_factory() as db:
+            if interrupted and self._stopping.is_set():
+                # Hand the job back so the next worker to start resumes it without waiting out the lease
+                values: dict[str, Any] = {"status": "queued", "worker_id": None, "heartbeat_at": None}
+            elif interrupted:
+                return
+            else:
+                values = {"status": "completed", "finished_at": _now()}
+            db.execute(
+                update(AIEditJob)
+                .where(AIEditJob.id == job_id, AIEditJob.status == "running", AIEditJob.worker_id == WORKER_ID)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+
+    def _update_job(self, job_id: UUID, **values: Any) -> None:
+        try:
+            with self._session_factory() as db:
+                db.execute(
+                    update(AIEditJob)
+                    .where(AIEditJob.id == job_id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                db.commit()
+        except Exception as exc:
+            logger.error(f"Could not update AI edit job {job_id}: {exc}")
+
+
+job_runner = AIEditJobRunner(background=not shares_connection(engine))
@@ -2,14 +2,26 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Any, Dict, List, Optional
-from datetime import date
+import queue
+import re
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import date, datetime, timezone
 
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.services.json_schema import schema_errors
+from app.services.json_stream import recover_suggestions, SuggestionStreamParser
 from app.services.llm_provider import llm_client
-from app.services.project_sop_service import get_project_sop_by_document_type
+from app.services.prompt_context import compact_document, select_sop_sections
+from app.services.project_sop_cache import project_sop_cache
 from app.services.project_service import BusinessCaseService, ProjectCharterService
+from app.services.token_accounting import count_tokens, stable_message
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +60,9 @@ BUSINESS_CASE_REQUIRED_FIELDS = set()  # No NOT NULL fields besides system field
 
 PROJECT_CHARTER_REQUIRED_FIELDS = {'sponsor'}  # sponsor is NOT NULL in database
 
+# System-managed columns that are never suggested or applied
+SYSTEM_FIELDS = {'id', 'created_at', 'updated_at', 'created_by', 'version', 'project_id'}
+
 # ============================================================================
 # FIELD TYPE SCHEMAS
 # ============================================================================
@@ -168,142 +183,323 @@ PROJECT_CHARTER_FIELD_TYPES = {
     'resource_requirements': dict,
 }
 
+# List fields holding plain strings; every other list field holds objects
+LIST_OF_STRING_FIELDS = {'scope_in', 'scope_out', 'scope_exclusions', 'quality_standards'}
 
-def _coerce_field_value(field_name: str, value: Any, expected_type: type) -> Any:
+
+def _field_types_for(document_type: str) -> Dict[str, type]:
+    if document_type == 'business-case':
+        return BUSINESS_CASE_FIELD_TYPES
+    if document_type == 'project-charter':
+        return PROJECT_CHARTER_FIELD_TYPES
+    raise ValueError(f"Unknown document type: {document_type}")
+
+
+def partition_fields(field_types: Dict[str, type], group_size: int) -> List[List[str]]:
     """
-    Coerce a field value to match the expected type.
+    Split a document's field schema into groups for parallel suggestion calls.
+
+    Scalar fields (strings, dates, numbers) produce short output and share one
+    group. List and dict fields dominate generation time, so they are chunked
+    into groups of at most ``group_size`` fields in schema order.
 
     Args:
-        field_name: Name of the field
-        value: The value to coerce
-        expected_type: The expected Python type
+        field_types: Field type schema (e.g. BUSINESS_CASE_FIELD_TYPES)
+        group_size: Maximum number of list/dict fields per group
 
     Returns:
-        Coerced value matching expected type, or None if coercion fails
+        List of field-name groups; every non-system field appears exactly once
     """
-    # If value is None, return None
-    if value is None:
-        return None
+    scalar_fields = [
+        name for name, expected_type in field_types.items()
+        if expected_type not in (list, dict) and name not in SYSTEM_FIELDS
+    ]
+    structured_fields = [
+        name for name, expected_type in field_types.items()
+        if expected_type in (list, dict) and name not in SYSTEM_FIELDS
+    ]
 
-    # Handle string type
-    if expected_type == str:
-        # Don't accept strings that look like error messages or placeholders
-        if isinstance(value, str) and value.lower() in ('no reason provided', 'n/a', 'none', 'null', ''):
-            logger.warning(f"Skipping placeholder string for {field_name}: '{value}'")
-            return None
-        return str(value) if value else None
+    size = max(1, group_size)
+    groups = [scalar_fields] if scalar_fields else []
+    groups.extend(structured_fields[start:start + size] for start in range(0, len(structured_fields), size))
+    return groups
 
-    # Handle integer type
-    if expected_type == int:
-        try:
-            if isinstance(value, str):
-                # Remove any non-numeric characters except minus sign
-                cleaned = ''.join(c for c in value if c.isdigit() or c == '-')
-                return int(cleaned) if cleaned and cleaned != '-' else None
-            return int(value)
-        except (ValueError, TypeError):
-            logger.warning(f"Could not convert {field_name}={value} to int, skipping")
-            return None
 
-    # Handle float/Decimal type (for roi_percentage, npv_value, budget_authority, etc.)
-    if expected_type == float:
-        try:
-            if isinstance(value, str):
-                # Remove any non-numeric characters except minus sign and decimal point
-                cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
-                return float(cleaned) if cleaned and cleaned not in ('-', '.', '-.') else None
-            return float(value)
-        except (ValueError, TypeError):
-            logger.warning(f"Could not convert {field_name}={value} to float, skipping")
+# ============================================================================
+# FIELD VALIDATION
+#
+# The field type tables and enum sets are compiled once at import into one
+# validator closure per document type. Each field gets a coercer chosen by its
+# type; values that already have the right type (and common ISO/numeric
+# strings) take a fast path, everything else falls back to the lenient
+# parsing below.
+# ============================================================================
+
+_PLACEHOLDER_STRINGS = frozenset({'no reason provided', 'n/a', 'none', 'null', ''})
+_PLACEHOLDER_LISTS = _PLACEHOLDER_STRINGS | {'[]'}
+_PLACEHOLDER_DICTS = _PLACEHOLDER_STRINGS | {'{}'}
+_DATE_FORMATS = ('%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%m-%d-%Y')
+
+_INT_PATTERN = re.compile(r'-?[0-9]+', re.ASCII)
+_FLOAT_PATTERN = re.compile(r'-?[0-9]+(?:\.[0-9]+)?', re.ASCII)
+_ISO_DATE_PATTERN = re.compile(r'([0-9]{4})-([0-9]{2})-([0-9]{2})', re.ASCII)
+
+
+def _coerce_str(field_name: str, value: Any) -> Any:
+    if isinstance(value, str):
+        if value.lower() in _PLACEHOLDER_STRINGS:
+            # Don't accept strings that look like error messages or placeholders
+            logger.warning(f"Skipping placeholder string for {field_name}: '{value}'")
             return None
+        return str(value)
+    return str(value) if value else None
 
-    # Handle date type
-    if expected_type == date:
-        if isinstance(value, date):
-            return value
+
+def _coerce_int(field_name: str, value: Any) -> Any:
+    if type(value) is int:
+        return value
+    try:
         if isinstance(value, str):
-            try:
-                from datetime import datetime
-                # Handle various date formats
-                for fmt in ['%Y-%m-%d', '%Y/%m/%d', '%d-%m-%Y', '%m-%d-%Y']:
-                    try:
-                        return datetime.strptime(value, fmt).date()
-                    except ValueError:
-                        continue
-                # Try ISO format
-                return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
-            except (ValueError, AttributeError):
-                logger.warning(f"Could not convert {field_name}={value} to date, skipping")
-                return None
+            if _INT_PATTERN.fullmatch(value):
+                return int(value)
+            # Remove any non-numeric characters except minus sign
+            cleaned = ''.join(c for c in value if c.isdigit() or c == '-')
+            return int(cleaned) if cleaned and cleaned != '-' else None
+        return int(value)
+    except (ValueError, TypeError):
+        logger.warning(f"Could not convert {field_name}={value} to int, skipping")
         return None
 
-    # Handle list type
-    if expected_type == list:
-        # If it's already a list, return it
-        if isinstance(value, list):
-            return value if len(value) > 0 else None
 
-        # If it's a string, try to parse as JSON array
+def _coerce_float(field_name: str, value: Any) -> Any:
+    if type(value) is float:
+        return value
+    if type(value) is int:
+        return float(value)
+    try:
         if isinstance(value, str):
-            # Skip placeholder strings
-            if value.lower() in ('no reason provided', 'n/a', 'none', 'null', '', '[]'):
-                logger.warning(f"Skipping placeholder list for {field_name}: '{value}'")
-                return None
+            if _FLOAT_PATTERN.fullmatch(value):
+                return float(value)
+            # Remove any non-numeric characters except minus sign and decimal point
+            cleaned = ''.join(c for c in value if c.isdigit() or c in '.-')
+            return float(cleaned) if cleaned and cleaned not in ('-', '.', '-.') else None
+        return float(value)
+    except (ValueError, TypeError):
+        logger.warning(f"Could not convert {field_name}={value} to float, skipping")
+        return None
 
-            # Try parsing as JSON
+
+def _coerce_date(field_name: str, value: Any) -> Any:
+    if isinstance(value, date):
+        return value
+    if not isinstance(value, str):
+        return None
+
+    match = _ISO_DATE_PATTERN.fullmatch(value)
+    if match:
+        try:
+            return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        except ValueError:
+            pass  # e.g. 2024-02-30; let the lenient path decide
+
+    try:
+        # Handle various date formats
+        for fmt in _DATE_FORMATS:
             try:
-                parsed = json.loads(value)
-                if isinstance(parsed, list):
-                    return parsed if len(parsed) > 0 else None
-                # If parsed to something else, wrap it in a list
-                return [parsed]
-            except json.JSONDecodeError:
-                pass
-
-            # Try parsing as comma-separated values
-            if ',' in value:
-                items = [item.strip() for item in value.split(',') if item.strip()]
-                return items if items else None
-
-            # Single non-empty string becomes a single-item list
-            if value.strip():
-                return [value.strip()]
+                return datetime.strptime(value, fmt).date()
+            except ValueError:
+                continue
+        # Try ISO format
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+    except (ValueError, AttributeError):
+        logger.warning(f"Could not convert {field_name}={value} to date, skipping")
+        return None
+
 
+def _coerce_list(field_name: str, value: Any) -> Any:
+    # If it's already a list, return it
+    if isinstance(value, list):
+        return value if len(value) > 0 else None
+
+    # If it's a string, try to parse as JSON array
+    if isinstance(value, str):
+        # Skip placeholder strings
+        if value.lower() in _PLACEHOLDER_LISTS:
+            logger.warning(f"Skipping placeholder list for {field_name}: '{value}'")
             return None
 
-        # For other types, wrap in list if not empty
-        return [value] if value else None
+        # Try parsing as JSON
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, list):
+                return parsed if len(parsed) > 0 else None
+            # If parsed to something else, wrap it in a list
+            return [parsed]
+        except json.JSONDecodeError:
+            pass
+
+        # Try parsing as comma-separated values
+        if ',' in value:
+            items = [item.strip() for item in value.split(',') if item.strip()]
+            return items if items else None
+
+        # Single non-empty string becomes a single-item list
+        if value.strip():
+            return [value.strip()]
 
-    # Handle dict type
-    if expected_type == dict:
-        # If it's already a dict, return it
-        if isinstance(value, dict):
-            return value if len(value) > 0 else None
+        return None
 
-        # If it's a string, try to parse as JSON object
-        if isinstance(value, str):
-            # Skip placeholder strings
-            if value.lower() in ('no reason provided', 'n/a', 'none', 'null', '', '{}'):
-                logger.warning(f"Skipping placeholder dict for {field_name}: '{value}'")
-                return None
+    # For other types, wrap in list if not empty
+    return [value] if value else None
 
-            # Try parsing as JSON
-            try:
-                parsed = json.loads(value)
-                if isinstance(parsed, dict):
-                    return parsed if len(parsed) > 0 else None
-            except json.JSONDecodeError:
-                pass
-
-            # If not JSON and not a placeholder, skip rather than wrapping
-            logger.warning(f"Could not parse {field_name}='{value}' as dict, skipping")
+
+def _coerce_dict(field_name: str, value: Any) -> Any:
+    # If it's already a dict, return it
+    if isinstance(value, dict):
+        return value if len(value) > 0 else None
+
+    # If it's a string, try to parse as JSON object
+    if isinstance(value, str):
+        # Skip placeholder strings
+        if value.lower() in _PLACEHOLDER_DICTS:
+            logger.warning(f"Skipping placeholder dict for {field_name}: '{value}'")
             return None
 
-        # For other types, skip
+        # Try parsing as JSON
+        try:
+            parsed = json.loads(value)
+            if isinstance(parsed, dict):
+                return parsed if len(parsed) > 0 else None
+        except json.JSONDecodeError:
+            pass
+
+        # If not JSON and not a placeholder, skip rather than wrapping
+        logger.warning(f"Could not parse {field_name}='{value}' as dict, skipping")
         return None
 
-    # Default: return as-is if not None
-    return value if value is not None else None
+    # For other types, skip
+    return None
+
+
+def _coerce_any(field_name: str, value: Any) -> Any:
+    return value
+
+
+_COERCERS: Dict[type, Callable[[str, Any], Any]] = {
+    str: _coerce_str,
+    int: _coerce_int,
+    float: _coerce_float,
+    date: _coerce_date,
+    list: _coerce_list,
+    dict: _coerce_dict,
+}
+
+
+def _coerce_field_value(field_name: str, value: Any, expected_type: type) -> Any:
+    """
+    Coerce a field value to match the expected type.
+
+    Args:
+        field_name: Name of the field
+        value: The value to coerce
+        expected_type: The expected Python type
+
+    Returns:
+        Coerced value matching expected type, or None if coercion fails
+    """
+    if value is None:
+        return None
+    return _COERCERS.get(expected_type, _coerce_any)(field_name, value)
+
+
+def _enum_values_for(document_type: str) -> Dict[str, set]:
+    if document_type == 'business-case':
+        return {
+            'urgency': VALID_URGENCY_VALUES,
+            'status': VALID_BUSINESS_CASE_STATUS_VALUES,
+            'approval_level': VALID_BUSINESS_CASE_APPROVAL_LEVEL_VALUES,
+        }
+    return {
+        'status': VALID_PROJECT_CHARTER_STATUS_VALUES,
+        'approval_level': VALID_PROJECT_CHARTER_APPROVAL_LEVEL_VALUES,
+        'risk_tolerance': VALID_RISK_TOLERANCE_VALUES,
+    }
+
+
+def _compile_validator(document_type: str) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Build the validate-and-coerce closure for one document type."""
+    field_types = _field_types_for(document_type)
+    required_fields = BUSINESS_CASE_REQUIRED_FIELDS if document_type == 'business-case' else PROJECT_CHARTER_REQUIRED_FIELDS
+    enum_values = _enum_values_for(document_type)
+
+    # field -> (coercer, required, allowed values, "Must be one of" text)
+    rules = {
+        field_name: (
+            _COERCERS.get(expected_type, _coerce_any),
+            field_name in required_fields,
+            frozenset(enum_values[field_name]) if field_name in enum_values else None,
+            ', '.join(sorted(enum_values[field_name])) if field_name in enum_values else '',
+        )
+        for field_name, expected_type in field_types.items()
+        if field_name not in SYSTEM_FIELDS
+    }
+
+    def validate(changes: Dict[str, Any]) -> Dict[str, Any]:
+        validated_changes = {}
+        validation_errors = []
+
+        for field_name, value in changes.items():
+            rule = rules.get(field_name)
+            if rule is None:
+                if field_name in SYSTEM_FIELDS:
+                    logger.warning(f"Skipping system field: {field_name}")
+                else:
+                    # Unknown field, include as-is with warning
+                    logger.warning(f"Unknown field {field_name}, including as-is")
+                    validated_changes[field_name] = value
+                continue
+
+            coerce, required, allowed, allowed_text = rule
+            try:
+                coerced_value = None if value is None else coerce(field_name, value)
+            except Exception as e:
+                logger.error(f"Error coercing field {field_name}: {e}")
+                validation_errors.append(f"Field '{field_name}': {str(e)}")
+                continue
+
+            if coerced_value is None:
+                if required:
+                    validation_errors.append(
+                        f"Field '{field_name}' is required and cannot be null or empty"
+                    )
+                else:
+                    logger.warning(f"Skipping field {field_name} due to coercion failure")
+                continue
+
+            # Validate enum constraints for specific fields
+            if allowed is not None and isinstance(coerced_value, str) and coerced_value not in allowed:
+                validation_errors.append(
+                    f"Field '{field_name}' has invalid value '{coerced_value}'. "
+                    f"Must be one of: {allowed_text}"
+                )
+                continue
+
+            validated_changes[field_name] = coerced_value
+
+        # If there are validation errors, raise them all at once
+        if validation_errors:
+            error_message = "Database constraint validation failed:\n- " + "\n- ".join(validation_errors)
+            raise ValueError(error_message)
+
+        return validated_changes
+
+    return validate
+
+
+_VALIDATORS = {
+    document_type: _compile_validator(document_type)
+    for document_type in ('business-case', 'project-charter')
+}
 
 
 def validate_and_coerce_changes(
@@ -323,125 +519,45 @@ def validate_and_coerce_changes(
     Raises:
         ValueError: If validation fails (constraint violation, required field is null, etc.)
     """
-    if document_type == 'business-case':
-        field_types = BUSINESS_CASE_FIELD_TYPES
-        required_fields = BUSINESS_CASE_REQUIRED_FIELDS
-        valid_status_values = VALID_BUSINESS_CASE_STATUS_VALUES
-        valid_approval_level_values = VALID_BUSINESS_CASE_APPROVAL_LEVEL_VALUES
-    elif document_type == 'project-charter':
-        field_types = PROJECT_CHARTER_FIELD_TYPES
-        required_fields = PROJECT_CHARTER_REQUIRED_FIELDS
-        valid_status_values = VALID_PROJECT_CHARTER_STATUS_VALUES
-        valid_approval_level_values = VALID_PROJECT_CHARTER_APPROVAL_LEVEL_VALUES
-    else:
+    validator = _VALIDATORS.get(document_type)
+    if validator is None:
         raise ValueError(f"Unknown document type: {document_type}")
+    return validator(changes)
 
-    validated_changes = {}
-    validation_errors = []
-
-    for field_name, value in changes.items():
-        # Skip system fields
-        if field_name in ('id', 'created_at', 'updated_at', 'created_by', 'version', 'project_id'):
-            logger.warning(f"Skipping system field: {field_name}")
-            continue
 
-        # Get expected type
-        expected_type = field_types.get(field_name)
-
-        if expected_type is None:
-            # Unknown field, include as-is with warning
-            logger.warning(f"Unknown field {field_name}, including as-is")
-            validated_changes[field_name] = value
-            continue
+def _load_project_sop(db: Session, document_type: str):
+    project_sop = project_sop_cache.get(db, document_type.replace('-', '_'))
 
-        # Coerce value to expected type
-        try:
-            coerced_value = _coerce_field_value(field_name, value, expected_type)
-
-            # Check if required field is being set to None
-            if field_name in required_fields and coerced_value is None:
-                validation_errors.append(
-                    f"Field '{field_name}' is required and cannot be null or empty"
-                )
-                continue
+    if not project_sop:
+        raise ValueError(f"No ProjectSOP found for document type: {document_type}")
 
-            if coerced_value is not None:
-                # Validate enum constraints for specific fields
-                if field_name == 'urgency' and isinstance(coerced_value, str):
-                    if coerced_value not in VALID_URGENCY_VALUES:
-                        validation_errors.append(
-                            f"Field 'urgency' has invalid value '{coerced_value}'. "
-                            f"Must be one of: {', '.join(sorted(VALID_URGENCY_VALUES))}"
-                        )
-                        continue
-
-                elif field_name == 'status' and isinstance(coerced_value, str):
-                    if coerced_value not in valid_status_values:
-                        validation_errors.append(
-                            f"Field 'status' has invalid value '{coerced_value}'. "
-                            f"Must be one of: {', '.join(sorted(valid_status_values))}"
-                        )
-                        continue
-
-                elif field_name == 'approval_level' and isinstance(coerced_value, str):
-                    if coerced_value not in valid_approval_level_values:
-                        validation_errors.append(
-                            f"Field 'approval_level' has invalid value '{coerced_value}'. "
-                            f"Must be one of: {', '.join(sorted(valid_approval_level_values))}"
-                        )
-                        continue
-
-                elif field_name == 'risk_tolerance' and isinstance(coerced_value, str):
-                    if coerced_value not in VALID_RISK_TOLERANCE_VALUES:
-                        validation_errors.append(
-                            f"Field 'risk_tolerance' has invalid value '{coerced_value}'. "
-                            f"Must be one of: {', '.join(sorted(VALID_RISK_TOLERANCE_VALUES))}"
-                        )
-                        continue
-
-                validated_changes[field_name] = coerced_value
-            else:
-                logger.warning(f"Skipping field {field_name} due to coercion failure")
-        except Exception as e:
-            logger.error(f"Error coercing field {field_name}: {e}")
-            validation_errors.append(f"Field '{field_name}': {str(e)}")
-            continue
+    return project_sop
 
-    # If there are validation errors, raise them all at once
-    if validation_errors:
-        error_message = "Database constraint validation failed:\n- " + "\n- ".join(validation_errors)
-        raise ValueError(error_message)
 
-    return validated_changes
+# Prompt tokens outside the system prompt parts: message framing and the user turn's fixed text
+_PROMPT_OVERHEAD_TOKENS = 64
 
 
-def generate_ai_suggestions(
-    db: Session,
+def _build_system_prompt(
     document_type: str,
+    project_sop: Any,
     current_document: Dict[str, Any],
     user_instructions: str,
-    project_id: str | None = None
-) -> Dict[str, Any]:
+    fields: Optional[List[str]] = None
+) -> List[Tuple[str, bool]]:
     """
-    Generate AI suggestions for document edits based on ProjectSOP context and user instructions.
+    Build the AI edit system prompt.
 
     Args:
-        db: Database session
         document_type: Type of document ('business-case' or 'project-charter')
+        project_sop: ProjectSOP providing the guidelines
         current_document: Current document data
         user_instructions: User's instructions for what changes to make
-        project_id: Optional project ID for additional context
+        fields: Optional subset of fields the response should cover
 
     Returns:
-        Dictionary containing suggested changes for each field
+        System prompt as ``(text, stable)`` parts, for ``stable_message``
     """
-
-    # Get the relevant ProjectSOP for this document type
-    project_sop = get_project_sop_by_document_type(db, document_type.replace('-', '_'))
-
-    if not project_sop:
-        raise ValueError(f"No ProjectSOP found for document type: {document_type}")
-
     # Extract SOP content
     sop_content = ""
     if isinstance(project_sop.content, dict) and "markdown" in project_sop.content:
@@ -449,6 +565,12 @@ def generate_ai_suggestions(
     elif isinstance(project_sop.content, str):
         sop_content = project_sop.content
 
+    # SOP trimmed to the sections relevant to the fields being edited
+    field_names = list(_value_schemas(document_type))
+    sop_content = select_sop_sections(
+        sop_content, fields if fields is not None else field_names, settings.ai_edit_sop_token_budget
+    )
+
     # Build constraint information for the prompt
     if document_type == 'business-case':
         required_fields_str = "None (all fields are optional)"
@@ -462,8 +584,20 @@ def generate_ai_suggestions(
     urgency_values = ', '.join(sorted(VALID_URGENCY_VALUES))
     risk_tolerance_values = ', '.join(sorted(VALID_RISK_TOLERANCE_VALUES))
 
+    # Restrict a pipeline group to its own fields; the rest of the document is context only
+    scope_section = ""
+    if fields is not None:
+        scope_section = f"""
+FIELDS IN SCOPE:
+Only suggest changes for these fields: {', '.join(fields)}
+Other fields are handled separately; use them as context only.
+"""
+
     # Build the system prompt with explicit type requirements and constraints
-    system_prompt = f"""You are an AI assistant helping to update project documents based on Standard Operating Procedures and user instructions.
+    # Split into the parts that repeat across calls (instructions + SOP, and the fixed
+    # type/constraint rules for this document type) and the per-call middle, so token
+    # counting only memoizes the former
+    sop_part = f"""You are an AI assistant helping to update project documents based on Standard Operating Procedures and user instructions.
 
 DOCUMENT TYPE: {document_type}
 PROJECT SOP TITLE: {project_sop.title}
@@ -471,13 +605,8 @@ PROJECT SOP TITLE: {project_sop.title}
 STANDARD OPERATING PROCEDURE:
 {sop_content}
 
-CURRENT DOCUMENT DATA:
-{json.dumps(current_document, indent=2, default=str)}
-
-USER INSTRUCTIONS:
-{user_instructions}
-
-TASK:
+"""
+    rules_part = f"""TASK:
 Analyze the current document and user instructions against the SOP requirements. Generate suggested updates for relevant fields based on:
 1. The SOP guidelines and requirements
 2. The user's specific instructions
@@ -558,68 +687,436 @@ IMPORTANT GUIDELINES:
 - If a field should remain unchanged, do not include it in suggestions
 """
 
-    # Generate AI response
-    messages = [
-        {"role": "system", "content": system_prompt},
+    # Compact context, minified: a pipeline group's own fields whole, everything else
+    # pruned and truncated, and shrunk further to what the task's prompt budget leaves
+    document_budget = None
+    max_prompt_tokens = llm_client.task_profile("ai_edit").max_prompt_tokens
+    if max_prompt_tokens is not None:
+        fixed_tokens = sum(count_tokens(part) for part in (sop_part, rules_part, scope_section))
+        document_budget = max(0, max_prompt_tokens - fixed_tokens - 2 * count_tokens(user_instructions) - _PROMPT_OVERHEAD_TOKENS)
+    document_context = compact_document(
+        current_document,
+        field_names,
+        fields,
+        array_limit=settings.ai_edit_context_array_limit,
+        string_limit=settings.ai_edit_context_string_limit,
+        token_budget=document_budget,
+    )
+    document_part = f"""CURRENT DOCUMENT DATA (minified JSON; empty values omitted and "…N more at field[i:]" marking items left out, except in fields in scope):
+{document_context}
+
+USER INSTRUCTIONS:
+{user_instructions}
+{scope_section}
+"""
+    return [(sop_part, True), (document_part, False), (rules_part, True)]
+
+
+def _build_messages(system_parts: List[Tuple[str, bool]], user_instructions: str) -> List[Dict[str, Any]]:
+    return [
+        stable_message("system", system_parts),
         {"role": "user", "content": f"Please analyze the document and provide suggestions based on my instructions: {user_instructions}"}
     ]
 
-    try:
-        ai_response = llm_client.generate_reply(messages)
-        logger.info(f"Raw AI response (first 500 chars): {ai_response[:500]}")
 
-        # Parse the JSON response
-        try:
-            suggestions_data = json.loads(ai_response)
-            logger.info(f"Parsed suggestions structure - keys: {list(suggestions_data.keys()) if isinstance(suggestions_data, dict) else 'NOT A DICT'}")
-
-            # Validate structure
-            if not isinstance(suggestions_data, dict):
-                logger.error(f"AI response is not a dict: {type(suggestions_data)}")
-                raise ValueError(f"AI returned invalid structure: expected dict, got {type(suggestions_data).__name__}")
-
-            if "suggestions" not in suggestions_data:
-                logger.error(f"AI response missing 'suggestions' key. Keys present: {list(suggestions_data.keys())}")
-                raise ValueError("AI response missing 'suggestions' field")
-
-            if not isinstance(suggestions_data["suggestions"], dict):
-                logger.error(f"AI 'suggestions' field is not a dict: {type(suggestions_data['suggestions'])}")
-                raise ValueError(f"AI 'suggestions' field has wrong type: {type(suggestions_data['suggestions']).__name__}")
-
-            # Validate and clean each suggestion
-            cleaned_suggestions = {}
-            for field_name, suggestion in suggestions_data["suggestions"].items():
-                if not isinstance(suggestion, dict):
-                    logger.warning(f"Skipping malformed suggestion for {field_name}: not a dict")
-                    continue
-
-                # Ensure required keys exist
-                if "suggested_value" not in suggestion:
-                    logger.warning(f"Skipping suggestion for {field_name}: missing 'suggested_value'")
-                    continue
-
-                # Include the suggestion (with current_value and reason defaults)
-                cleaned_suggestions[field_name] = {
-                    "current_value": suggestion.get("current_value"),
-                    "suggested_value": suggestion["suggested_value"],
-                    "reason": suggestion.get("reason", "No reason provided")
-                }
+def _parse_suggestions(ai_response: str, document_type: str) -> Dict[str, Any]:
+    """
+    Parse and clean a raw AI suggestions response.
 
-            # Replace with cleaned suggestions
-            suggestions_data["suggestions"] = cleaned_suggestions
-            logger.info(f"Cleaned suggestions: {len(cleaned_suggestions)} fields")
+    Raises:
+        ValueError: If the response is not valid JSON or has the wrong structure
+    """
+    logger.info(f"Raw AI response (first 500 chars): {ai_response[:500]}")
 
-            return suggestions_data
-        except json.JSONDecodeError as e:
+    try:
+        suggestions_data = json.loads(ai_response)
+        logger.info(f"Parsed suggestions structure - keys: {list(suggestions_data.keys()) if isinstance(suggestions_data, dict) else 'NOT A DICT'}")
+
+        # Validate structure
+        if not isinstance(suggestions_data, dict):
+            logger.error(f"AI response is not a dict: {type(suggestions_data)}")
+            raise ValueError(f"AI returned invalid structure: expected dict, got {type(suggestions_data).__name__}")
+
+        if "suggestions" not in suggestions_data:
+            logger.error(f"AI response missing 'suggestions' key. Keys present: {list(suggestions_data.keys())}")
+            raise ValueError("AI response missing 'suggestions' field")
+
+        if not isinstance(suggestions_data["suggestions"], dict):
+            logger.error(f"AI 'suggestions' field is not a dict: {type(suggestions_data['suggestions'])}")
+            raise ValueError(f"AI 'suggestions' field has wrong type: {type(suggestions_data['suggestions']).__name__}")
+    except json.JSONDecodeError as e:
+        # Keep whatever complete suggestions precede a truncation or syntax error
+        recovered = recover_suggestions(ai_response)
+        if not recovered.suggestions:
             logger.error(f"Failed to parse AI response as JSON: {ai_response[:1000]}")
             logger.error(f"JSON decode error: {e}")
             raise ValueError("AI service returned invalid JSON response")
 
+        logger.warning(f"AI response was not valid JSON ({e}); recovered {len(recovered.suggestions)} complete suggestions")
+        suggestions_data = recovered.result()
+
+    # Validate and clean each suggestion
+    cleaned_suggestions = {}
+    for field_name, suggestion in suggestions_data["suggestions"].items():
+        cleaned = _clean_suggestion(field_name, suggestion, document_type)
+        if cleaned is not None:
+            cleaned_suggestions[field_name] = cleaned
+
+    # Replace with cleaned suggestions
+    suggestions_data["suggestions"] = cleaned_suggestions
+    logger.info(f"Cleaned suggestions: {len(cleaned_suggestions)} fields")
+
+    return suggestions_data
+
+
+def _clean_suggestion(field_name: str, suggestion: Any, document_type: str) -> Optional[Dict[str, Any]]:
+    if not isinstance(suggestion, dict):
+        logger.warning(f"Skipping malformed suggestion for {field_name}: not a dict")
+        return None
+
+    # Ensure required keys exist
+    if "suggested_value" not in suggestion:
+        logger.warning(f"Skipping suggestion for {field_name}: missing 'suggested_value'")
+        return None
+
+    suggested_value = _conform_suggested_value(field_name, suggestion["suggested_value"], document_type)
+    if suggested_value is _INVALID:
+        return None
+
+    # Include the suggestion (with current_value and reason defaults)
+    return {
+        "current_value": suggestion.get("current_value"),
+        "suggested_value": suggested_value,
+        "reason": suggestion.get("reason", "No reason provided")
+    }
+
+
+_INVALID = object()
+
+
+def _conform_suggested_value(field_name: str, value: Any, document_type: str) -> Any:
+    """
+    Check a suggested value against the response schema, coercing it when possible.
+
+    This is the local fallback for endpoints that cannot enforce the schema
+    (JSON mode only, or no response_format support): values the provider
+    already constrained pass straight through, near-misses such as "6" for an
+    integer field are coerced, and anything else is dropped.
+
+    Returns:
+        The (possibly coerced) value, or ``_INVALID`` if it should be skipped
+    """
+    value_schema = _value_schemas(document_type).get(field_name)
+    if value_schema is None:
+        logger.warning(f"Skipping suggestion for unknown or system field {field_name}")
+        return _INVALID
+
+    errors = schema_errors(value, value_schema, field_name)
+    if not errors:
+        return value
+
+    try:
+        coerced = validate_and_coerce_changes({field_name: value}, document_type).get(field_name)
+    except ValueError as e:
+        logger.warning(f"Skipping suggestion for {field_name}: {e}")
+        return _INVALID
+
+    if coerced is None:
+        logger.warning(f"Skipping suggestion for {field_name}: {'; '.join(errors)}")
+        return _INVALID
+    return coerced.isoformat() if isinstance(coerced, date) else coerced
+
+
+@lru_cache(maxsize=None)
+def _value_schemas(document_type: str) -> Dict[str, Dict[str, Any]]:
+    """JSON schema for each suggestible field's value, derived from the field type tables."""
+    field_types = _field_types_for(document_type)
+    required_fields = BUSINESS_CASE_REQUIRED_FIELDS if document_type == 'business-case' else PROJECT_CHARTER_REQUIRED_FIELDS
+    enum_values = _enum_values_for(document_type)
+
+    schemas = {}
+    for field_name, expected_type in field_types.items():
+        if field_name in SYSTEM_FIELDS:
+            continue
+
+        if field_name in enum_values:
+            value_schema = {"type": "string", "enum": sorted(enum_values[field_name])}
+        elif expected_type == str:
+            value_schema = {"type": "string"}
+        elif expected_type == date:
+            value_schema = {"type": "string", "format": "date"}
+        elif expected_type == int:
+            value_schema = {"type": "integer"}
+        elif expected_type == float:
+            value_schema = {"type": "number"}
+        elif expected_type == list and field_name in LIST_OF_STRING_FIELDS:
+            value_schema = {"type": "array", "items": {"type": "string"}}
+        elif expected_type == list:
+            value_schema = {"type": "array", "items": {"type": "object"}}
+        else:
+            value_schema = {"type": "object"}
+
+        # Optional fields may be cleared; required ones may not
+        if field_name not in required_fields:
+            value_schema["type"] = [value_schema["type"], "null"]
+            if "enum" in value_schema:
+                value_schema["enum"] = value_schema["enum"] + [None]
+
+        schemas[field_name] = value_schema
+
+    return schemas
+
+
+@lru_cache(maxsize=256)
+def suggestion_response_format(document_type: str, fields: Optional[tuple[str, ...]] = None) -> Dict[str, Any]:
+    """
+    Build the structured-output ``response_format`` for an AI edit call.
+
+    The schema is generated from the document's field type table and enum
+    sets, so it cannot drift from what ``validate_and_coerce_changes``
+    accepts. It is sent non-strict: strict mode would force every field to be
+    present, while suggestions should only cover fields that change.
+
+    Args:
+        document_type: Type of document ('business-case' or 'project-charter')
+        fields: Optional subset of fields (one pipeline group)
+
+    Returns:
+        ``response_format`` payload for the chat completions API
+    """
+    value_schemas = _value_schemas(document_type)
+    names = fields if fields is not None else tuple(value_schemas)
+
+    suggestion_properties = {
+        name: {
+            "type": "object",
+            "properties": {
+                "current_value": {},
+                "suggested_value": value_schemas[name],
+                "reason": {"type": "string"},
+            },
+            "required": ["suggested_value", "reason"],
+            "additionalProperties": False,
+        }
+        for name in names
+        if name in value_schemas
+    }
+
+    schema = {
+        "type": "object",
+        "properties": {
+            "suggestions": {
+                "type": "object",
+                "properties": suggestion_properties,
+                "additionalProperties": False,
+            },
+            "overall_reasoning": {"type": "string"},
+        },
+        "required": ["suggestions", "overall_reasoning"],
+        "additionalProperties": False,
+    }
+
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": f"{document_type.replace('-', '_')}_suggestions",
+            "schema": schema,
+            "strict": False,
+        },
+    }
+
+
+def generate_ai_suggestions(
+    db: Session,
+    document_type: str,
+    current_document: Dict[str, Any],
+    user_instructions: str,
+    project_id: str | None = None
+) -> Dict[str, Any]:
+    """
+    Generate AI suggestions for document edits based on ProjectSOP context and user instructions.
+
+    Args:
+        db: Database session
+        document_type: Type of document ('business-case' or 'project-charter')
+        current_document: Current document data
+        user_instructions: User's instructions for what changes to make
+        project_id: Optional project ID for additional context
+
+    Returns:
+        Dictionary containing suggested changes for each field
+    """
+
+    project_sop = _load_project_sop(db, document_type)
+    system_parts = _build_system_prompt(document_type, project_sop, current_document, user_instructions)
+    messages = _build_messages(system_parts, user_instructions)
+
+    try:
+        ai_response = llm_client.generate_reply(
+            messages,
+            task="ai_edit",
+            response_format=suggestion_response_format(document_type)
+        )
+        return _parse_suggestions(ai_response, document_type)
     except Exception as e:
         logger.error(f"Error generating AI suggestions: {e}", exc_info=True)
         raise ValueError(f"Failed to generate AI suggestions: {str(e)}")
 
 
+@dataclass
+class SuggestionEvent:
+    """One event of the streamed AI edit pipeline.
+
+    ``kind`` is ``"suggestion"`` for a single field suggestion, ``"group"``
+    when a field group finished, or ``"error"`` when a group failed (any
+    suggestions it produced before failing have already been emitted).
+    """
+
+    kind: str
+    group: int
+    fields: List[str]
+    field: Optional[str] = None
+    suggestion: Optional[Dict[str, Any]] = None
+    overall_reasoning: str = ""
+    error: Optional[str] = None
+
+
+def stream_ai_suggestions(
+    db: Session,
+    document_type: str,
+    current_document: Dict[str, Any],
+    user_instructions: str,
+    project_id: str | None = None
+) -> Iterator[SuggestionEvent]:
+    """
+    Generate AI suggestions as concurrent, streamed per-field-group calls.
+
+    The field schema is partitioned with ``partition_fields`` and each group
+    is sent as its own streamed LLM call, at most
+    ``ai_edit_max_parallel_groups`` at a time. Each group's output is parsed
+    incrementally, so a field's suggestion is emitted as soon as its JSON
+    object closes. If a group's output is cut off or turns malformed, the
+    suggestions already parsed are kept and the group is retried once for the
+    fields not yet covered.
+
+    All database access happens before this function returns; the returned
+    iterator only talks to the LLM and can outlive the request session.
+
+    Args:
+        db: Database session
+        document_type: Type of document ('business-case' or 'project-charter')
+        current_document: Current document data
+        user_instructions: User's instructions for what changes to make
+        project_id: Optional project ID for additional context
+
+    Returns:
+        Iterator of suggestion events in arrival order
+    """
+
+    field_types = _field_types_for(document_type)
+    project_sop = _load_project_sop(db, document_type)
+    groups = partition_fields(field_types, settings.ai_edit_field_group_size)
+
+    def build_messages(fields: List[str]) -> List[Dict[str, str]]:
+        system_parts = _build_system_prompt(document_type, project_sop, current_document, user_instructions, fields)
+        return _build_messages(system_parts, user_instructions)
+
+    # Build the first round of prompts now, while the session is still open
+    requests = [(index, fields, build_messages(fields)) for index, fields in enumerate(groups)]
+    logger.info(f"AI edit pipeline for {document_type}: {len(requests)} field groups")
+
+    return _run_suggestion_groups(document_type, requests, build_messages)
+
+
+def _run_suggestion_groups(
+    document_type: str,
+    requests: List[tuple[int, List[str], List[Dict[str, str]]]],
+    build_messages: Callable[[List[str]], List[Dict[str, str]]]
+) -> Iterator[SuggestionEvent]:
+    events: queue.Queue[SuggestionEvent] = queue.Queue()
+    cancelled = threading.Event()
+    workers = max(1, min(len(requests), settings.ai_edit_max_parallel_groups))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ai-edit")
+    try:
+        for index, fields, messages in requests:
+            executor.submit(_stream_group, document_type, index, fields, messages, build_messages, events, cancelled)
+
+        pending = len(requests)
+        while pending:
+            event = events.get()
+            if event.kind != "suggestion":
+                pending -= 1
+            yield event
+    finally:
+        # Stop in-flight and queued groups if the consumer goes away (e.g. client disconnect)
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _stream_group(
+    document_type: str,
+    index: int,
+    fields: List[str],
+    messages: List[Dict[str, str]],
+    build_messages: Callable[[List[str]], List[Dict[str, str]]],
+    events: queue.Queue[SuggestionEvent],
+    cancelled: threading.Event
+) -> None:
+    received: set[str] = set()
+    error: Optional[str] = None
+
+    try:
+        for attempt in range(2):
+            if attempt:
+                # Only ask again for what the interrupted response did not cover
+                remaining = [name for name in fields if name not in received]
+                if not remaining:
+                    # Every field arrived before the response broke off; the group is done
+                    logger.warning(f"AI edit group {index} ended early after covering every field: {error}")
+                    events.put(SuggestionEvent(
+                        kind="group", group=index, fields=fields, overall_reasoning=parser.overall_reasoning or ""
+                    ))
+                    return
+                logger.warning(f"Retrying AI edit group {index} for {len(remaining)} uncovered fields: {error}")
+                messages = build_messages(remaining)
+                response_format = suggestion_response_format(document_type, tuple(remaining))
+            else:
+                response_format = suggestion_response_format(document_type, tuple(fields))
+
+            parser = SuggestionStreamParser()
+            error = None
+            try:
+                for delta in llm_client.stream_reply(messages, task="ai_edit", response_format=response_format):
+                    if cancelled.is_set():
+                        return
+                    for field_name, suggestion in parser.feed(delta):
+                        if field_name not in fields or field_name in received:
+                            continue
+                        cleaned = _clean_suggestion(field_name, suggestion, document_type)
+                        if cleaned is None:
+                            continue
+                        received.add(field_name)
+                        events.put(SuggestionEvent(
+                            kind="suggestion", group=index, fields=fields, field=field_name, suggestion=cleaned
+                        ))
+            except Exception as e:
+                error = str(e)
+            else:
+                if parser.complete:
+                    events.put(SuggestionEvent(
+                        kind="group", group=index, fields=fields, overall_reasoning=parser.overall_reasoning or ""
+                    ))
+                    return
+                error = "AI response was truncated or malformed"
+
+        logger.error(f"AI edit group {index} ({', '.join(fields)}) failed: {error}")
+        events.put(SuggestionEvent(kind="error", group=index, fields=fields, error=error))
+    except BaseException as e:
+        # The consumer counts terminal events; never leave it waiting
+        events.put(SuggestionEvent(kind="error", group=index, fields=fields, error=str(e)))
+        raise
+
+
 def apply_ai_suggestions(
     db: Session,
     document_type: str,
@@ -700,4 +1197,220 @@ def apply_ai_suggestions(
         raise
     except Exception as e:
         logger.error(f"Error applying AI suggestions: {e}", exc_info=True)
-        raise ValueError(f"Failed to apply suggestions: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Failed to apply suggestions: {str(e)}")
+
+@dataclass
+class BatchApplyResult:
+    """Outcome of one document in a batch apply."""
+
+    project_id: str
+    document_id: Optional[str] = None
+    applied_fields: Optional[List[str]] = None
+    error: Optional[str] = None
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+def _batch_document_model(document_type: str) -> tuple[Any, Any]:
+    from app.db.models.project import BusinessCase, ProjectCharter
+    from app.schemas.project import BusinessCaseUpdate, ProjectCharterUpdate
+
+    if document_type == 'business-case':
+        return BusinessCase, BusinessCaseUpdate
+    if document_type == 'project-charter':
+        return ProjectCharter, ProjectCharterUpdate
+    raise ValueError(f"Unsupported document type: {document_type}")
+
+
+def _revision_matches(expected: Optional[datetime], updated_at: datetime) -> bool:
+    if expected is None:
+        return True
+    if expected.tzinfo is None:
+        # Naive timestamps are taken as UTC, which is how updated_at is stored
+        expected = expected.replace(tzinfo=timezone.utc)
+    return expected == updated_at
+
+
+def _stale_error(label: str, document_id: Any) -> str:
+    return f"{label} {document_id} was modified after the changes were reviewed (stale); reload it and reapply"
+
+
+def apply_ai_suggestions_batch(
+    db: Session,
+    document_type: str,
+    items: List[Dict[str, Any]],
+    user_id: str = "ai_user",
+    all_or_nothing: bool = False
+) -> List[BatchApplyResult]:
+    """
+    Apply accepted AI suggestions to the current document of many projects at once.
+
+    Every item is validated before anything is written: field coercion,
+    the pydantic update model and the lookup of the current document (one
+    query for the whole batch). The valid items are then written in one
+    transaction with an executemany UPDATE per set of changed columns, each
+    row guarded by the document's revision (``updated_at``) and
+    current-version flag, so a document edited since the changes were
+    reviewed is reported as stale instead of overwritten.
+
+    Args:
+        db: Database session
+        document_type: Type of document ('business-case' or 'project-charter')
+        items: Dicts with 'project_id', 'accepted_changes' and optionally
+            'document_id' (the current document id the changes were reviewed against),
+            'expected_updated_at' and/or 'if_match' (its updated_at or ETag at review time)
+        user_id: ID of user applying changes
+        all_or_nothing: Write nothing if any item fails validation or is stale
+
+    Returns:
+        One result per item, in request order
+
+    Raises:
+        ValueError: If the document type is not supported
+    """
+
+    from uuid import UUID
+    from sqlalchemy import bindparam, select, update
+    from app.api.etags import entity_tag, if_match_satisfied
+    from app.db.types import utcnow
+
+    model, update_schema = _batch_document_model(document_type)
+    results = [BatchApplyResult(project_id=str(item.get('project_id'))) for item in items]
+
+    # 1. Validate every item's changes without touching the database
+    changes_by_index: Dict[int, Dict[str, Any]] = {}
+    project_ids: Dict[int, UUID] = {}
+    seen_projects: set[UUID] = set()
+    for index, item in enumerate(items):
+        result = results[index]
+        try:
+            project_id = UUID(str(item.get('project_id')))
+        except ValueError:
+            result.error = f"Invalid project ID: {item.get('project_id')}"
+            continue
+        if project_id in seen_projects:
+            result.error = "Duplicate project in batch"
+            continue
+        seen_projects.add(project_id)
+
+        try:
+            validated_changes = validate_and_coerce_changes(item.get('accepted_changes') or {}, document_type)
+            update_data = update_schema(**{**validated_changes, "updated_by": user_id})
+        except Exception as validation_error:
+            result.error = f"Field validation failed: {str(validation_error)}"
+            continue
+
+        changes = update_data.model_dump(exclude_unset=True)
+        if set(changes) == {"updated_by"}:
+            result.error = "No valid changes to apply"
+            continue
+        changes_by_index[index] = changes
+        project_ids[index] = project_id
+
+    # 2. Resolve every current document and its revision in one query
+    current: Dict[UUID, Tuple[UUID, datetime]] = {}
+    if project_ids:
+        rows = db.execute(
+            select(model.project_id, model.id, model.updated_at).where(
+                model.project_id.in_(list(project_ids.values())),
+                model.is_current_version == True
+            )
+        )
+        current = {project_id: (document_id, updated_at) for project_id, document_id, updated_at in rows}
+
+    label = document_type.replace('-', ' ').capitalize()
+    revisions: Dict[int, datetime] = {}
+    for index in list(changes_by_index):
+        result = results[index]
+        item = items[index]
+        document_id, updated_at = current.get(project_ids[index], (None, None))
+        expected_id = item.get('document_id')
+        if document_id is None:
+            result.error = f"{label} not found"
+        elif expected_id and str(expected_id) != str(document_id):
+            result.error = f"{label} {expected_id} is no longer the current version"
+        elif not _revision_matches(item.get('expected_updated_at'), updated_at) or not if_match_satisfied(
+            item.get('if_match'), entity_tag(model.__tablename__, document_id, updated_at)
+        ):
+            result.document_id = str(document_id)
+            result.error = _stale_error(label, document_id)
+        else:
+            result.document_id = str(document_id)
+            revisions[index] = updated_at
+            continue
+        del changes_by_index[index]
+
+    if all_or_nothing and any(not result.success for result in results):
+        for index in changes_by_index:
+            results[index].error = "Not applied: other documents in the batch failed validation"
+        return results
+
+    # 3. Write all valid changes in one transaction: one executemany UPDATE per set of
+    # changed columns, each row guarded by its revision. If fewer rows matched than were
+    # sent, roll back, find the stale rows with one SELECT and write the rest again.
+    if changes_by_index:
+        table = model.__table__
+        updated_at = utcnow()
+        stale: List[int] = []
+        try:
+            while changes_by_index:
+                groups: Dict[frozenset[str], List[Dict[str, Any]]] = {}
+                for index, changes in changes_by_index.items():
+                    groups.setdefault(frozenset(changes), []).append({
+                        "b_id": UUID(results[index].document_id),
+                        "b_rev": revisions[index],
+                        **changes,
+                        "updated_at": updated_at,
+                    })
+                matched = 0
+                for params in groups.values():
+                    matched += db.execute(
+                        update(table).where(
+                            table.c.id == bindparam("b_id"),
+                            table.c.updated_at == bindparam("b_rev"),
+                            table.c.is_current_version == True
+                        ),
+                        params
+                    ).rowcount
+                if matched == len(changes_by_index):
+                    db.commit()
+                    break
+
+                db.rollback()
+                ids = {UUID(results[index].document_id): index for index in changes_by_index}
+                current_rows = db.execute(
+                    select(table.c.id, table.c.updated_at, table.c.is_current_version).where(table.c.id.in_(list(ids)))
+                )
+                unchanged = {
+                    document_id for document_id, revision, is_current in current_rows
+                    if is_current and revision == revisions[ids[document_id]]
+                }
+                newly_stale = [index for document_id, index in ids.items() if document_id not in unchanged]
+                if not newly_stale:
+                    raise RuntimeError(f"{len(changes_by_index) - matched} guarded updates matched no row")
+                stale.extend(newly_stale)
+                for index in newly_stale:
+                    del changes_by_index[index]
+                if all_or_nothing:
+                    break
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Batch apply of {len(changes_by_index)} {document_type} updates failed: {e}", exc_info=True)
+            raise ValueError(f"Failed to apply suggestions: {str(e)}")
+
+        for index in stale:
+            results[index].error = _stale_error(label, results[index].document_id)
+        if stale and all_or_nothing:
+            for index in changes_by_index:
+                results[index].error = "Not applied: other documents in the batch were modified concurrently"
+            changes_by_index.clear()
+
+        for index, changes in changes_by_index.items():
+            results[index].applied_fields = sorted(field for field in changes if field != "updated_by")
+
+    logger.info(
+        f"Batch applied AI suggestions to {len(changes_by_index)} of {len(items)} {document_type} documents"
+    )
+    return results
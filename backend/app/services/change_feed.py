@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel the notify_change() triggers publish to (db/add_change_feed_migration.sql)
+CHANNEL = "playbook_changes"
+
+TOPICS = ("sops", "project_sops", "projects", "business_cases", "project_charters", "chat_messages")
+
+# Parent key carried by each topic's events; subscribing to "<topic>:<parent id>"
+# (e.g. "chat_messages:<thread id>") narrows a topic to one project or thread
+SCOPE_KEYS = {
+    "business_cases": "project_id",
+    "project_charters": "project_id",
+    "chat_messages": "thread_id",
+}
+
+# Sent to every subscriber when events may have been missed; clients refetch
+RESYNC_EVENT: dict[str, Any] = {"topic": "resync"}
+
+
+def valid_topic(topic: str) -> bool:
+    name, _, scope = topic.partition(":")
+    return name in TOPICS and (not scope or name in SCOPE_KEYS)
+
+
+@dataclass(eq=False)
+class Subscription:
+    topics: frozenset[str]
+    queue: asyncio.Queue[dict[str, Any] | None]
+    # Set when the client fell too far behind; it gets a resync and is disconnected
+    overflowed: bool = False
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        topic = event.get("topic")
+        if topic in self.topics or topic == RESYNC_EVENT["topic"]:
+            return True
+        scope_key = SCOPE_KEYS.get(topic)
+        return scope_key is not None and f"{topic}:{event.get(scope_key)}" in self.topics
+
+
+@dataclass
+class ChangeFeed:
+    """Fan Postgres change notifications out to in-process subscribers.
+
+    One task per worker holds a single LISTEN connection (psycopg async)
+    and copies each event into the bounded queue of every subscription
+    whose topics match, so thousands of SSE clients cost one database
+    connection. A subscriber that stops reading is flagged as overflowed
+    rather than slowing everyone down. After a reconnect every subscriber
+    gets a ``resync`` event, since notifications sent while disconnected
+    are lost.
+
+    Listeners (``add_listener``) are in-process callbacks that get every
+    event, plus a ``resync`` on each (re)connect; the response cache uses
+    one to drop entries when any worker writes.
+    """
+
+    queue_size: int = 256
+    _subscriptions: set[Subscription] = field(default_factory=set)
+    _listeners: list[Callable[[dict[str, Any]], None]] = field(default_factory=list)
+    _task: asyncio.Task | None = None
+    connected: bool = False
+    # Whether the notify_change() triggers exist; without them nothing is ever published
+    triggers_installed: bool = False
+
+    @property
+    def live(self) -> bool:
+        """Connected to a database that publishes changes, so no committed write goes unseen."""
+
+        return self.connected and self.triggers_installed
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, conninfo: str) -> None:
+        """Start listening; must be called from the running event loop (app lifespan)."""
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen(conninfo), name="change-feed-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in list(self._subscriptions):
+            self._offer(subscription, None)
+        self._subscriptions.clear()
+
+    def subscribe(self, topics: list[str]) -> Subscription:
+        subscription = Subscription(frozenset(topics), asyncio.Queue(maxsize=self.queue_size))
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        self._listeners.append(listener)
+
+    def publish(self, event: dict[str, Any]) -> None:
+        self._dispatch(event)
+        for subscription in list(self._subscriptions):
+            if subscription.matches(event):
+                self._offer(subscription, event)
+
+    def _dispatch(self, event: dict[str, Any]) -> None:
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as exc:
+                logger.warning(f"Change feed listener {listener!r} failed: {exc}")
+
+    @staticmethod
+    def _offer(subscription: Subscription, event: dict[str, Any] | None) -> None:
+        try:
+            subscription.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            subscription.overflowed = True
+
+    async def _listen(self, conninfo: str) -> None:
+        # The Postgres driver is only needed when the feed actually runs
+        import psycopg
+
+        backoff_s = 1.0
+        reconnecting = False
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as connection:
+                    await connection.execute(f"LISTEN {CHANNEL}")
+                    cursor = await connection.execute("SELECT to_regproc('notify_change') IS NOT NULL")
+                    self.triggers_installed = bool((await cursor.fetchone())[0])
+                    if not self.triggers_installed:
+                        logger.warning("Change feed: notify_change() is missing, apply db/add_change_feed_migration.sql")
+                    self.connected = True
+                    backoff_s = 1.0
+                    if reconnecting:
+                        self.publish(RESYNC_EVENT)
+                    else:
+                        # Listeners may hold state from before the first connection
+                        self._dispatch(RESYNC_EVENT)
+                    async for notify in connection.notifies():
+                        try:
+                            event = json.loads(notify.payload)
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed change notification: {notify.payload!r}")
+                            continue
+                        self.publish(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(f"Change feed listener lost its connection: {exc}")
+            finally:
+                self.connected = False
+            reconnecting = True
+            await asyncio.sleep(backoff_s)
+            backoff_s = min(backoff_s * 2, 30.0)
+
+
+change_feed = ChangeFeed(queue_size=settings.change_feed_queue_size)
@@ -11,6 +11,7 @@ from app.schemas.chat import ChatMessageCreate, ChatThreadCreate
 from app.services import sop_service
 from app.services.project_service import BusinessCaseService, ProjectCharterService
 from app.services.llm_provider import llm_client
+from app.services.token_accounting import stable_message
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,116 @@ def create_thread(db: Session, data: ChatThreadCreate) -> ChatThread:
     return thread
 
 
+SOP_CHAT_INSTRUCTIONS = (
+    "You are an AI assistant helping with questions about Standard Operating Procedures (SOPs). "
+    "You have access to all SOPs in the system. Please use the SOPs below to inform your responses "
+    "and help users understand the procedures and information contained within them.\n\n"
+    "When responding, please format your answers using proper markdown for better readability "
+    "(use headers, lists, code blocks, bold/italic text, etc. as appropriate).\n\n"
+    "IMPORTANT: When you reference information from a specific SOP, include an inline citation in the "
+    "format [SOP: Title] immediately after the relevant information. This helps users know where the "
+    "information came from. For example: \"Teams should create a project charter [SOP: Project Charter] "
+    "before beginning work.\"\n\n"
+    "Use the information from these SOPs to provide comprehensive and well-formatted answers to user "
+    "questions, including inline citations when referencing specific SOPs."
+)
+
+PROJECT_CHAT_INSTRUCTIONS = (
+    "You are an AI assistant helping with questions about project documents including business cases "
+    "and project charters. You have access to all project documents in the system. Please use the "
+    "project documents below to inform your responses and help users understand project information, "
+    "status, objectives, and requirements.\n\n"
+    "When responding, please format your answers using proper markdown for better readability "
+    "(use headers, lists, code blocks, bold/italic text, etc. as appropriate).\n\n"
+    "IMPORTANT: When you reference information from a specific document, include an inline citation in "
+    "the format [Document: Title] immediately after the relevant information. This helps users know where "
+    "the information came from. For example: \"The project aims to improve efficiency "
+    "[Document: Digital Transformation Charter].\"\n\n"
+    "Use the information from these project documents to provide comprehensive and well-formatted answers "
+    "to user questions, including inline citations when referencing specific documents."
+)
+
+NO_PROJECT_DOCUMENTS_PROMPT = (
+    "You are an AI assistant helping with questions about project documents. Currently, no project "
+    "documents are available in the system. Please let the user know that no project documents are "
+    "currently loaded and suggest they check with their administrator or create some project documents first."
+)
+
+
+def _sop_markdown(content: object) -> str:
+    if isinstance(content, dict) and "markdown" in content:
+        return content["markdown"] or ""
+    if isinstance(content, str):
+        return content
+    return ""
+
+
+def _sop_system_prompt(sops: list) -> str | None:
+    """Instructions followed by every SOP, ordered by title then id.
+
+    The order must not depend on ``display_order`` or ``updated_at``:
+    editing one SOP should only invalidate the cached prompt prefix from
+    that SOP onwards, not reshuffle the whole corpus.
+    """
+
+    sections = []
+    for sop in sorted(sops, key=lambda item: (item.title or "", str(item.id))):
+        markdown = _sop_markdown(sop.content)
+        if markdown:
+            sections.append(f"## {sop.title}\n\n{markdown}")
+    if not sections:
+        return None
+    corpus = "\n\n---\n\n".join(sections)
+    return f"{SOP_CHAT_INSTRUCTIONS}\n\n# Available SOPs\n\n{corpus}"
+
+
+def _document_section(kind: str, title: str, fields: list[tuple[str, object]]) -> str:
+    content_parts = [f"Project: {title}"]
+    content_parts.extend(f"{label}: {value}" for label, value in fields if value)
+    content = "\n".join(content_parts)
+    return f"## {kind}: {title}\n\n{content}"
+
+
+def _project_documents_system_prompt(db: Session) -> str:
+    """Instructions followed by all business cases, then all charters, each ordered by title then id."""
+
+    document_sections = []
+    try:
+        business_cases = BusinessCaseService.list_business_cases(db, project_id=None)
+        for bc in sorted(business_cases, key=lambda item: (item.title or "", str(item.id))):
+            if bc.title:
+                document_sections.append(
+                    _document_section(
+                        "Business Case",
+                        bc.title,
+                        [
+                            ("Business Area", bc.business_area),
+                            ("Sponsor", bc.sponsor),
+                            ("Description", bc.project_description),
+                        ],
+                    )
+                )
+
+        project_charters = ProjectCharterService.list_project_charters(db, project_id=None)
+        for pc in sorted(project_charters, key=lambda item: (item.title or "", str(item.id))):
+            if pc.title:
+                document_sections.append(
+                    _document_section(
+                        "Project Charter",
+                        pc.title,
+                        [("Sponsor", pc.sponsor), ("Project Manager", pc.project_manager)],
+                    )
+                )
+    except Exception as e:
+        logger.error(f"Error loading project documents: {e}")
+        # Continue without project context if there's an error
+
+    if not document_sections:
+        return NO_PROJECT_DOCUMENTS_PROMPT
+    corpus = "\n\n---\n\n".join(document_sections)
+    return f"{PROJECT_CHAT_INSTRUCTIONS}\n\n# Available Project Documents\n\n{corpus}"
+
+
 def append_message(db: Session, thread_id: str, data: ChatMessageCreate, auto_reply: bool = True) -> list[ChatMessage]:
     thread = db.get(ChatThread, thread_id)
     if thread is None:
@@ -58,37 +169,17 @@ def append_message(db: Session, thread_id: str, data: ChatMessageCreate, auto_re
     messages_to_return = [message]
 
     if auto_reply and data.role == "user":
-        # Build conversation with ALL SOPs as context
+        # Static prefix first (instructions + stably ordered SOP corpus) so the
+        # provider's prompt cache can reuse it across turns; history comes after
         conversation = []
-
-        # Add ALL SOPs content as system context
-        all_sops = sop_service.list_sops(db)
-        if all_sops:
-            sop_sections = []
-            for sop in all_sops:
-                if sop.content:
-                    # Extract markdown content from SOP
-                    sop_content = ""
-                    if isinstance(sop.content, dict) and "markdown" in sop.content:
-                        sop_content = sop.content["markdown"]
-                    elif isinstance(sop.content, str):
-                        sop_content = sop.content
-
-                    if sop_content:
-                        sop_sections.append(f"## {sop.title}\n\n{sop_content}")
-
-            if sop_sections:
-                all_sops_content = "\n\n---\n\n".join(sop_sections)
-                system_message = {
-                    "role": "system",
-                    "content": f"You are an AI assistant helping with questions about Standard Operating Procedures (SOPs). You have access to all SOPs in the system. Please use the following SOPs to inform your responses and help users understand the procedures and information contained within them.\n\nWhen responding, please format your answers using proper markdown for better readability (use headers, lists, code blocks, bold/italic text, etc. as appropriate).\n\nIMPORTANT: When you reference information from a specific SOP, include an inline citation in the format [SOP: Title] immediately after the relevant information. This helps users know where the information came from. For example: \"Teams should create a project charter [SOP: Project Charter] before beginning work.\"\n\n# Available SOPs\n\n{all_sops_content}\n\nUse the information from these SOPs to provide comprehensive and well-formatted answers to user questions, including inline citations when referencing specific SOPs."
-                }
-                conversation.append(system_message)
+        system_prompt = _sop_system_prompt(sop_service.list_sops(db))
+        if system_prompt:
+            conversation.append(stable_message("system", [(system_prompt, True)]))
 
         # Add conversation history and current message
         conversation.extend([*conversation_context, {"role": data.role, "content": data.content}])
 
-        assistant_content = llm_client.generate_reply(conversation)
+        assistant_content = llm_client.generate_reply(conversation, task="chat", interactive=True)
         assistant_message = ChatMessage(thread_id=thread_id, role="assistant", content=assistant_content)
         db.add(assistant_message)
         messages_to_return.append(assistant_message)
@@ -121,66 +212,14 @@ def append_project_message(db: Session, thread_id: str, data: ChatMessageCreate,
     messages_to_return = [message]
 
     if auto_reply and data.role == "user":
-        # Build conversation with ALL project documents as context
-        conversation = []
-
-        # Add ALL project documents content as system context
-        document_sections = []
-
-        try:
-            # Get all business cases
-            business_cases = BusinessCaseService.list_business_cases(db, project_id=None)
-            for bc in business_cases:
-                if hasattr(bc, 'title') and bc.title:
-                    # Build a comprehensive business case summary
-                    content_parts = [f"Project: {bc.title}"]
-                    if hasattr(bc, 'business_area') and bc.business_area:
-                        content_parts.append(f"Business Area: {bc.business_area}")
-                    if hasattr(bc, 'sponsor') and bc.sponsor:
-                        content_parts.append(f"Sponsor: {bc.sponsor}")
-                    if hasattr(bc, 'project_description') and bc.project_description:
-                        content_parts.append(f"Description: {bc.project_description}")
-
-                    content = "\n".join(content_parts)
-                    document_sections.append(f"## Business Case: {bc.title}\n\n{content}")
-
-            # Get all project charters
-            project_charters = ProjectCharterService.list_project_charters(db, project_id=None)
-            for pc in project_charters:
-                if hasattr(pc, 'title') and pc.title:
-                    # Build a comprehensive project charter summary
-                    content_parts = [f"Project: {pc.title}"]
-                    if hasattr(pc, 'sponsor') and pc.sponsor:
-                        content_parts.append(f"Sponsor: {pc.sponsor}")
-                    if hasattr(pc, 'project_manager') and pc.project_manager:
-                        content_parts.append(f"Project Manager: {pc.project_manager}")
-
-                    content = "\n".join(content_parts)
-                    document_sections.append(f"## Project Charter: {pc.title}\n\n{content}")
-
-        except Exception as e:
-            logger.error(f"Error loading project documents: {e}")
-            # Continue without project context if there's an error
-
-        if document_sections:
-            all_documents_content = "\n\n---\n\n".join(document_sections)
-            system_message = {
-                "role": "system",
-                "content": f"You are an AI assistant helping with questions about project documents including business cases and project charters. You have access to all project documents in the system. Please use the following project documents to inform your responses and help users understand project information, status, objectives, and requirements.\n\nWhen responding, please format your answers using proper markdown for better readability (use headers, lists, code blocks, bold/italic text, etc. as appropriate).\n\nIMPORTANT: When you reference information from a specific document, include an inline citation in the format [Document: Title] immediately after the relevant information. This helps users know where the information came from. For example: \"The project aims to improve efficiency [Document: Digital Transformation Charter].\"\n\n# Available Project Documents\n\n{all_documents_content}\n\nUse the information from these project documents to provide comprehensive and well-formatted answers to user questions, including inline citations when referencing specific documents."
-            }
-            conversation.append(system_message)
-        else:
-            # Fallback if no documents found
-            system_message = {
-                "role": "system",
-                "content": "You are an AI assistant helping with questions about project documents. Currently, no project documents are available in the system. Please let the user know that no project documents are currently loaded and suggest they check with their administrator or create some project documents first."
-            }
-            conversation.append(system_message)
+        # Static prefix first (instructions + stably ordered document corpus) so
+        # the provider's prompt cache can reuse it across turns; history comes after
+        conversation = [stable_message("system", [(_project_documents_system_prompt(db), True)])]
 
         # Add conversation history and current message
         conversation.extend([*conversation_context, {"role": data.role, "content": data.content}])
 
-        assistant_content = llm_client.generate_reply(conversation)
+        assistant_content = llm_client.generate_reply(conversation, task="project_chat", interactive=True)
         assistant_message = ChatMessage(thread_id=thread_id, role="assistant", content=assistant_content)
         db.add(assistant_message)
         messages_to_return.append(assistant_message)
@@ -246,7 +285,7 @@ def generate_thread_title(db: Session, thread_id: str) -> None:
         ]
 
         # Generate title using LLM
-        title = llm_client.generate_reply(title_prompt)
+        title = llm_client.generate_reply(title_prompt, task="title")
 
         # Clean up title (remove quotes, limit length)
         title = title.strip().strip('"\'').strip()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+
+class ConcurrentUpdateError(ValueError):
+    """Raised when a row changed between being read and being written."""
+
+
+def guarded_update(db: Session, model: Any, row_id: Any, guard: Any, values: dict[str, Any]) -> None:
+    """``UPDATE model SET values WHERE id = row_id AND guard`` in the current transaction.
+
+    ``guard`` compares the revision column (``version`` / ``updated_at``) to
+    the value the caller read, so a concurrent write in between makes the
+    statement match no row. The transaction is then rolled back and
+    ``ConcurrentUpdateError`` raised instead of silently overwriting.
+    """
+
+    if not values:
+        return
+    result = db.execute(
+        update(model)
+        .where(model.id == row_id, guard)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise ConcurrentUpdateError(f"{model.__name__} {row_id} was modified concurrently")
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.db.models.project import BusinessCase, ProjectCharter
+from app.schemas.project import ProjectCreate
+from app.services.project_sop_cache import project_sop_cache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DocumentType:
+    """How a project document type is stored and what a new project starts with.
+
+    ``document_type`` is the ``ProjectSOP.document_type`` it belongs to;
+    ``defaults`` builds the column values of the initial document from the
+    project being created (``project_id`` is added by the registry).
+    """
+
+    document_type: str
+    model: Any
+    defaults: Callable[[ProjectCreate], dict[str, Any]]
+
+
+def _business_case_defaults(project_data: ProjectCreate) -> dict[str, Any]:
+    return {
+        "title": f"{project_data.project_name} Business Case",
+        "business_area": project_data.business_area,
+        "sponsor": project_data.sponsor,
+        "status": "draft",
+        "is_current_version": True,
+        "created_by": project_data.created_by,
+    }
+
+
+def _project_charter_defaults(project_data: ProjectCreate) -> dict[str, Any]:
+    return {
+        "title": f"{project_data.project_name} Project Charter",
+        # sponsor is NOT NULL on charters
+        "sponsor": project_data.sponsor or "TBD",
+        "status": "draft",
+        "is_current_version": True,
+        "created_by": project_data.created_by,
+    }
+
+
+DOCUMENT_TYPES: dict[str, DocumentType] = {}
+
+
+def register_document_type(document_type: str, model: Any, defaults: Callable[[ProjectCreate], dict[str, Any]]) -> None:
+    """Register (or replace) the storage model and initial-document factory for a document type."""
+
+    DOCUMENT_TYPES[document_type] = DocumentType(document_type, model, defaults)
+
+
+def active_document_types(db: Session) -> tuple[DocumentType, ...]:
+    """Registered document types whose ProjectSOP is active, in display order."""
+
+    types = []
+    for project_sop in project_sop_cache.active(db):
+        registered = DOCUMENT_TYPES.get(project_sop.document_type)
+        if registered is None:
+            logger.debug(f"No document model registered for active document type '{project_sop.document_type}'")
+            continue
+        types.append(registered)
+    return tuple(types)
+
+
+register_document_type("business_case", BusinessCase, _business_case_defaults)
+register_document_type("project_charter", ProjectCharter, _project_charter_defaults)
+
+
+def initial_document_rows(
+    db: Session, projects: Iterable[tuple[UUID, ProjectCreate]]
+) -> dict[Any, list[dict[str, Any]]]:
+    """Column values of every initial document for ``projects``, grouped by model.
+
+    Each group is ready for a single multi-row ``insert(model)``.
+    """
+
+    types = active_document_types(db)
+    rows: dict[Any, list[dict[str, Any]]] = defaultdict(list)
+    for project_id, project_data in projects:
+        for document in types:
+            rows[document.model].append({"project_id": project_id, **document.defaults(project_data)})
+    return rows
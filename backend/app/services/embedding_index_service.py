@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import SOP, BusinessCase, ProjectCharter
+from app.db.session import SessionLocal, engine, shares_connection
+from app.services.embeddings import Embedder, get_embedder
+from app.services.vector_store import SearchHit, VectorEntry, VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Roughly 300-400 tokens; keeps a chunk focused enough to be a useful citation.
+MAX_CHUNK_CHARS = 1500
+SNIPPET_CHARS = 300
+
+_HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.*)$")
+
+# Columns that carry no retrievable content
+_DOCUMENT_SKIP_COLUMNS = {
+    'id', 'project_id', 'business_case_id', 'project_sop_id', 'supersedes_version',
+    'is_current_version', 'created_at', 'updated_at', 'created_by', 'updated_by', 'version',
+}
+
+_DOCUMENT_MODELS: dict[str, type[BusinessCase] | type[ProjectCharter]] = {
+    "business_case": BusinessCase,
+    "project_charter": ProjectCharter,
+}
+
+
+@dataclass
+class IndexSyncStats:
+    embedded_sources: int = 0
+    embedded_chunks: int = 0
+    removed_sources: int = 0
+    unchanged_sources: int = 0
+
+
+def _sop_markdown(content: Any) -> str:
+    if isinstance(content, dict) and "markdown" in content:
+        return content["markdown"] or ""
+    if isinstance(content, str):
+        return content
+    return ""
+
+
+def chunk_markdown(title: str, markdown: str, max_chars: int = MAX_CHUNK_CHARS) -> list[tuple[str, str]]:
+    """Split SOP markdown into (section heading, text) chunks along headings.
+
+    Sections longer than ``max_chars`` are split on paragraph boundaries. Every
+    chunk is prefixed with the SOP title so it embeds with its context.
+    """
+
+    sections: list[tuple[str, list[str]]] = [(title, [])]
+    for line in markdown.splitlines():
+        match = _HEADING_PATTERN.match(line)
+        if match:
+            sections.append((match.group(1).strip() or title, []))
+        sections[-1][1].append(line)
+
+    chunks: list[tuple[str, str]] = []
+    for heading, lines in sections:
+        body = "\n".join(lines).strip()
+        if not body:
+            continue
+
+        current = ""
+        for paragraph in body.split("\n\n"):
+            if current and len(current) + len(paragraph) + 2 > max_chars:
+                chunks.append((heading, current))
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+            while len(current) > max_chars:
+                chunks.append((heading, current[:max_chars]))
+                current = current[max_chars:]
+        if current:
+            chunks.append((heading, current))
+
+    return [(heading, f"{title} / {heading}\n\n{text}") for heading, text in chunks]
+
+
+def _field_text(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, separators=(",", ":"))
+
+
+class EmbeddingIndex:
+    """Incrementally maintained semantic index over SOPs and current project documents.
+
+    Each source (an SOP or a document) is fingerprinted by ``SOP.version`` or
+    the document's ``updated_at``. ``sync`` compares fingerprints against the
+    database and only re-embeds sources whose fingerprint changed. Syncs
+    run one at a time (normally on ``index_syncer``'s thread) and embed
+    without holding the store lock, so searches are never blocked behind
+    the embedding provider.
+    """
+
+    def __init__(self, embedder: Embedder, store: VectorStore) -> None:
+        self.embedder = embedder
+        self.store = store
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+        if store.load() and store.embedder_name != embedder.name:
+            logger.info(f"Embedder changed from {store.embedder_name} to {embedder.name}; rebuilding index")
+            store.clear()
+        store.embedder_name = embedder.name
+
+    def _current_sources(self, db: Session) -> dict[str, tuple[str, Any, str]]:
+        """Map source key to (kind, primary key, fingerprint) using only cheap columns."""
+
+        sources = {
+            f"sop:{sop_id}": ("sop", sop_id, str(version))
+            for sop_id, version in db.execute(select(SOP.id, SOP.version))
+        }
+        for kind, model in _DOCUMENT_MODELS.items():
+            stmt = select(model.id, model.updated_at).where(model.is_current_version == True)
+            for document_id, updated_at in db.execute(stmt):
+                sources[f"{kind}:{document_id}"] = (kind, document_id, updated_at.isoformat())
+        return sources
+
+    def _sop_chunks(self, sop: SOP) -> list[tuple[VectorEntry, str]]:
+        source_key = f"sop:{sop.id}"
+        return [
+            (
+                VectorEntry(
+                    source_key=source_key,
+                    kind="sop",
+                    source_id=str(sop.id),
+                    chunk=heading,
+                    text=text[:SNIPPET_CHARS],
+                    metadata={"title": sop.title, "version": sop.version},
+                ),
+                text,
+            )
+            for heading, text in chunk_markdown(sop.title, _sop_markdown(sop.content))
+        ]
+
+    def _document_chunks(self, kind: str, document: BusinessCase | ProjectCharter) -> list[tuple[VectorEntry, str]]:
+        source_key = f"{kind}:{document.id}"
+        label = document.title or kind.replace("_", " ").title()
+        chunks = []
+        for column in document.__table__.columns:
+            if column.name in _DOCUMENT_SKIP_COLUMNS:
+                continue
+            value = getattr(document, column.name)
+            if value is None or value == "" or value == [] or value == {}:
+                continue
+            text = f"{label} / {column.name}: {_field_text(value)}"[:MAX_CHUNK_CHARS]
+            entry = VectorEntry(
+                source_key=source_key,
+                kind=kind,
+                source_id=str(document.id),
+                chunk=column.name,
+                text=text[:SNIPPET_CHARS],
+                metadata={"title": label, "project_id": str(document.project_id)},
+            )
+            chunks.append((entry, text))
+        return chunks
+
+    def sync(self, db: Session) -> IndexSyncStats:
+        """Bring the index up to date with the database, embedding only changed sources."""
+
+        with self._sync_lock:
+            stats = IndexSyncStats()
+            current = self._current_sources(db)
+            with self._lock:
+                fingerprints = dict(self.store.fingerprints)
+
+            stale = set(fingerprints) - set(current)
+            changed = {key: source for key, source in current.items() if fingerprints.get(key) != source[2]}
+            stats.removed_sources = len(stale)
+            stats.unchanged_sources = len(current) - len(changed)
+
+            if not stale and not changed:
+                return stats
+
+            chunks: list[tuple[VectorEntry, str]] = []
+            sop_ids = [source_id for kind, source_id, _ in changed.values() if kind == "sop"]
+            if sop_ids:
+                for sop in db.execute(select(SOP).where(SOP.id.in_(sop_ids))).scalars():
+                    chunks.extend(self._sop_chunks(sop))
+
+            for kind, model in _DOCUMENT_MODELS.items():
+                ids = [source_id for source_kind, source_id, _ in changed.values() if source_kind == kind]
+                if ids:
+                    for document in db.execute(select(model).where(model.id.in_(ids))).scalars():
+                        chunks.extend(self._document_chunks(kind, document))
+
+            entries = [entry for entry, _ in chunks]
+            vectors = self.embedder.embed([text for _, text in chunks]) if chunks else []
+            with self._lock:
+                self.store.remove_sources(stale)
+                self.store.upsert_sources(entries, vectors, {key: source[2] for key, source in changed.items()})
+                self.store.save()
+
+            stats.embedded_sources = len(changed)
+            stats.embedded_chunks = len(entries)
+            logger.info(
+                f"Embedding index synced: {stats.embedded_sources} sources re-embedded "
+                f"({stats.embedded_chunks} chunks), {stats.removed_sources} removed, "
+                f"{stats.unchanged_sources} unchanged"
+            )
+            return stats
+
+    def search_many(
+        self,
+        queries: list[str],
+        k: int = 5,
+        kinds: set[str] | None = None,
+        exclude_sources: set[str] | None = None,
+    ) -> list[list[SearchHit]]:
+        if not queries:
+            return []
+        vectors = self.embedder.embed(queries)
+        with self._lock:
+            return self.store.search(vectors, k=k, kinds=kinds, exclude_sources=exclude_sources)
+
+    def search(self, query: str, k: int = 5, kinds: set[str] | None = None) -> list[SearchHit]:
+        return self.search_many([query], k=k, kinds=kinds)[0]
+
+    def related_sops(self, db: Session, sop_id: str, limit: int = 5) -> list[tuple[str, float]]:
+        """Rank other SOPs by their best chunk similarity to any chunk of ``sop_id``.
+
+        Reads the index as it stands; an SOP that is not indexed yet has no
+        related SOPs until ``index_syncer`` catches up.
+        """
+
+        source_key = f"sop:{sop_id}"
+        with self._lock:
+            own_vectors = self.store.vectors_for(source_key)
+            if own_vectors is None:
+                index_syncer.request()
+                return []
+            results = self.store.search(own_vectors, k=limit * 4, kinds={"sop"}, exclude_sources={source_key})
+
+        best: dict[str, float] = {}
+        for hits in results:
+            for hit in hits:
+                best[hit.entry.source_id] = max(best.get(hit.entry.source_id, float("-inf")), hit.score)
+
+        return sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+@lru_cache
+def get_embedding_index() -> EmbeddingIndex:
+    """Return the process-wide embedding index, loading any persisted copy."""
+
+    store = VectorStore(path=settings.embedding_index_path or None, mmap=settings.embedding_index_mmap)
+    return EmbeddingIndex(get_embedder(), store)
+
+
+class IndexSyncer:
+    """Keeps the process-wide embedding index in sync from a background thread.
+
+    Syncs run every ``interval_s`` and as soon as ``request`` is called
+    (SOP writes, lookups of unindexed SOPs), so request handlers only ever
+    read the index.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session], interval_s: float, background: bool = True) -> None:
+        self._session_factory = session_factory
+        self.interval_s = interval_s
+        # Off when sessions share one connection: the index then stays as loaded
+        self.background = background
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def request(self) -> None:
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if not self.background:
+            logger.warning("Embedding index will not sync: the database engine shares one connection (in-memory SQLite)")
+            return
+        self._stop.clear()
+        self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="embedding-index-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                with self._session_factory() as db:
+                    get_embedding_index().sync(db)
+            except Exception as exc:
+                logger.warning(f"Embedding index sync failed: {exc}")
+
+
+index_syncer = IndexSyncer(
+    SessionLocal, settings.embedding_index_sync_interval_s, background=not shares_connection(engine)
+)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from typing import Protocol
+
+import numpy as np
+
+from app.core.config import Settings, settings
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class Embedder(Protocol):
+    """Anything that turns a batch of texts into an (n, dimensions) float32 matrix."""
+
+    name: str
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        ...
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise each row so a dot product equals cosine similarity."""
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class HashingEmbedder:
+    """Deterministic, dependency-free embedder based on the hashing trick.
+
+    Words and word bigrams are hashed into a fixed number of signed buckets.
+    It has no semantic knowledge beyond lexical overlap, but it is stable
+    across processes and needs no network, which makes it suitable for
+    offline development and tests.
+    """
+
+    def __init__(self, dimensions: int = 384) -> None:
+        if dimensions <= 0:
+            raise ValueError("Embedding dimensions must be positive.")
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> list[str]:
+        tokens = _TOKEN_PATTERN.findall(text.lower())
+        bigrams = [f"{left}_{right}" for left, right in zip(tokens, tokens[1:])]
+        return tokens + bigrams
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                bucket = value % self.dimensions
+                sign = 1.0 if (value >> 63) & 1 else -1.0
+                matrix[row, bucket] += sign
+        return normalize_rows(matrix)
+
+
+class ProviderEmbedder:
+    """Embedder backed by the configured LLM provider's embedding endpoint."""
+
+    def __init__(self) -> None:
+        # Imported lazily so the hashing backend works without provider credentials.
+        from app.services.llm_provider import llm_client
+
+        self.client = llm_client
+        self.name = f"{llm_client.provider}:{llm_client.embedding_model}"
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        # The client splits large inputs into EMBEDDING_BATCH_SIZE upstream calls.
+        vectors = self.client.embed(texts)
+        if not vectors:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize_rows(np.array(vectors, dtype=np.float32))
+
+
+def get_embedder(app_settings: Settings | None = None) -> Embedder:
+    """Build the embedder selected by ``EMBEDDING_BACKEND``."""
+
+    app_settings = app_settings or settings
+    if app_settings.embedding_backend == "hashing":
+        return HashingEmbedder(app_settings.embedding_dimensions)
+    return ProviderEmbedder()
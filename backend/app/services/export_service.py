@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db.models.project import BusinessCase, Project, ProjectCharter
+
+# Exportable entity -> model; exports stream them in this order
+EXPORT_ENTITIES: dict[str, Any] = {
+    "projects": Project,
+    "business_cases": BusinessCase,
+    "project_charters": ProjectCharter,
+}
+
+# Value of the "record_type" key on each NDJSON line
+RECORD_TYPES = {
+    "projects": "project",
+    "business_cases": "business_case",
+    "project_charters": "project_charter",
+}
+
+
+def export_columns(entity: str) -> list[str]:
+    """Column names of ``entity``'s table, in table order (the CSV header)."""
+
+    return [column.name for column in EXPORT_ENTITIES[entity].__table__.columns]
+
+
+def begin_snapshot(db: Session) -> None:
+    """Run the rest of ``db``'s transaction against one snapshot on Postgres.
+
+    An export reads several tables one after another; REPEATABLE READ keeps
+    a project created mid-export from showing up without its documents.
+    """
+
+    if db.get_bind().dialect.name == "postgresql":
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+
+def iter_records(
+    db: Session,
+    entity: str,
+    include_versions: bool = False,
+    batch_size: int = 1000,
+) -> Iterator[dict[str, Any]]:
+    """Yield every row of ``entity`` as a column -> value dict.
+
+    Rows come from a server-side cursor (``yield_per``) as plain table rows
+    rather than ORM objects, so memory stays flat however many rows there
+    are: nothing is kept in the session's identity map. Documents are
+    limited to current versions unless ``include_versions`` is set.
+    """
+
+    model = EXPORT_ENTITIES.get(entity)
+    if model is None:
+        raise ValueError(f"Unsupported export entity: {entity}")
+
+    table = model.__table__
+    stmt = select(table)
+    if model is not Project:
+        if not include_versions:
+            stmt = stmt.where(table.c.is_current_version == True)
+        stmt = stmt.order_by(table.c.project_id, table.c.created_at, table.c.id)
+    else:
+        stmt = stmt.order_by(table.c.created_at, table.c.id)
+
+    result = db.execute(stmt, execution_options={"yield_per": batch_size})
+    try:
+        for row in result.mappings():
+            yield dict(row)
+    finally:
+        result.close()
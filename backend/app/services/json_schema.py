@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+# JSON Schema "type" keyword -> accepted Python types (bool is not a number here)
+_JSON_TYPES: dict[str, tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+
+def _matches_type(value: Any, type_name: str) -> bool:
+    if isinstance(value, bool) and type_name in ("integer", "number"):
+        return False
+    return isinstance(value, _JSON_TYPES[type_name])
+
+
+def schema_errors(value: Any, schema: dict[str, Any], path: str = "$") -> list[str]:
+    """Validate ``value`` against the JSON Schema subset used for LLM response formats.
+
+    Supports ``type`` (string or list), ``enum``, ``format: date``,
+    ``properties``, ``required``, ``additionalProperties: false`` and
+    ``items``. This is the local fallback for providers that cannot enforce
+    a response schema themselves; it is not a general JSON Schema validator.
+    """
+
+    errors: list[str] = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        type_names = expected if isinstance(expected, list) else [expected]
+        if not any(_matches_type(value, type_name) for type_name in type_names):
+            return [f"{path}: expected {' or '.join(type_names)}, got {type(value).__name__}"]
+
+    if "enum" in schema and value not in schema["enum"]:
+        allowed = ", ".join(str(option) for option in schema["enum"] if option is not None)
+        errors.append(f"{path}: '{value}' is not one of: {allowed}")
+
+    if schema.get("format") == "date" and isinstance(value, str):
+        try:
+            date.fromisoformat(value)
+        except ValueError:
+            errors.append(f"{path}: '{value}' is not an ISO date (YYYY-MM-DD)")
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                errors.append(f"{path}.{name}: required property is missing")
+        for name, item in value.items():
+            if name in properties:
+                errors.extend(schema_errors(item, properties[name], f"{path}.{name}"))
+            elif schema.get("additionalProperties") is False:
+                errors.append(f"{path}.{name}: unexpected property")
+
+    if isinstance(value, list) and "items" in schema:
+        for index, item in enumerate(value):
+            errors.extend(schema_errors(item, schema["items"], f"{path}[{index}]"))
+
+    return errors
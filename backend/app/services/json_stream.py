@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class _Frame:
+    kind: str  # "object" or "array"
+    role: str | None = None  # "root", "suggestions" or "suggestion"
+    key: str | None = None  # most recent key read in this object
+    name: str | None = None  # field name, for suggestion frames
+    expect_key: bool = True
+    start: int = 0
+
+
+class SuggestionStreamParser:
+    """Incremental parser for ``{"suggestions": {...}, "overall_reasoning": "..."}`` output.
+
+    Feed completion text as it streams in; ``feed`` returns each
+    ``suggestions.<field>`` entry as soon as its closing brace arrives. Only
+    bracket depth and string state are tracked, so the cost is linear in the
+    output and finished entries are decoded exactly once.
+
+    Anything before the first ``{`` (e.g. a Markdown code fence) is ignored.
+    If the output is truncated or goes malformed part-way, ``suggestions``
+    still holds every entry that completed before the damage.
+    """
+
+    def __init__(self) -> None:
+        self.suggestions: dict[str, Any] = {}
+        self.overall_reasoning: str | None = None
+        self.complete = False
+
+        self._text = ""
+        self._offset = 0  # absolute position of _text[0]
+        self._pos = 0  # absolute position of the next unread character
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._failed = False
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consume ``chunk`` and return the ``(field, suggestion)`` pairs it completed."""
+
+        if self.complete or self._failed or not chunk:
+            return []
+
+        self._text += chunk
+        completed: list[tuple[str, Any]] = []
+        end = self._offset + len(self._text)
+
+        while self._pos < end:
+            position = self._pos
+            char = self._text[position - self._offset]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string(position)
+                continue
+
+            if not self._stack:
+                if char == "{":
+                    self._stack.append(_Frame(kind="object", role="root", start=position))
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in "{[":
+                self._open(char, position)
+            elif char in "}]":
+                entry = self._close(char, position)
+                if entry is not None:
+                    completed.append(entry)
+                if self.complete or self._failed:
+                    break
+            elif char == ":":
+                self._stack[-1].expect_key = False
+            elif char == ",":
+                top = self._stack[-1]
+                if top.kind == "object":
+                    top.expect_key = True
+                    top.key = None
+
+        self._trim()
+        return completed
+
+    def result(self) -> dict[str, Any]:
+        """Everything recovered so far, in the shape of a parsed response."""
+
+        return {"suggestions": dict(self.suggestions), "overall_reasoning": self.overall_reasoning or ""}
+
+    def _slice(self, start: int, stop: int) -> str:
+        return self._text[start - self._offset:stop - self._offset]
+
+    def _on_string(self, position: int) -> None:
+        top = self._stack[-1] if self._stack else None
+        if top is None or top.kind != "object":
+            return
+
+        literal = self._slice(self._string_start, position + 1)
+        if top.expect_key:
+            try:
+                top.key = json.loads(literal)
+            except json.JSONDecodeError:
+                self._failed = True
+        elif top.role == "root" and top.key == "overall_reasoning":
+            try:
+                self.overall_reasoning = json.loads(literal)
+            except json.JSONDecodeError:
+                pass
+
+    def _open(self, char: str, position: int) -> None:
+        parent = self._stack[-1]
+        role = None
+        if char == "{" and parent.kind == "object" and not parent.expect_key:
+            if parent.role == "root" and parent.key == "suggestions":
+                role = "suggestions"
+            elif parent.role == "suggestions":
+                role = "suggestion"
+        self._stack.append(
+            _Frame(
+                kind="object" if char == "{" else "array",
+                role=role,
+                name=parent.key if role == "suggestion" else None,
+                start=position,
+            )
+        )
+
+    def _close(self, char: str, position: int) -> tuple[str, Any] | None:
+        frame = self._stack.pop()
+        if (char == "}") != (frame.kind == "object"):
+            # Mismatched bracket: keep what completed before it
+            self._failed = True
+            return None
+
+        if not self._stack:
+            self.complete = True
+            return None
+
+        if frame.role != "suggestion" or frame.name is None:
+            return None
+
+        try:
+            value = json.loads(self._slice(frame.start, position + 1))
+        except json.JSONDecodeError:
+            return None
+        self.suggestions[frame.name] = value
+        return frame.name, value
+
+    def _trim(self) -> None:
+        """Drop consumed text that no open suggestion or string can still need."""
+
+        keep = self._pos
+        if self._in_string:
+            keep = min(keep, self._string_start)
+        for frame in self._stack:
+            if frame.role == "suggestion":
+                keep = min(keep, frame.start)
+                break
+        if keep > self._offset:
+            self._text = self._text[keep - self._offset:]
+            self._offset = keep
+
+
+def recover_suggestions(text: str) -> SuggestionStreamParser:
+    """Parse a complete (possibly truncated or malformed) response in one go."""
+
+    parser = SuggestionStreamParser()
+    parser.feed(text)
+    return parser
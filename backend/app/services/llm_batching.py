@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+
+def request_key(*parts: Any) -> str:
+    """Stable digest of a request payload, used to detect identical in-flight calls."""
+
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RequestCoalescer:
+    """Share one upstream call between concurrent identical requests.
+
+    The first caller for a key runs the call; callers arriving with the same
+    key while it is in flight wait for and receive the same result (or
+    exception). Nothing is cached once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future] = {}
+
+    def run(self, key: str, call: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = call()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+
+@dataclass
+class _PendingEmbedding:
+    texts: list[str]
+    future: Future = field(default_factory=Future)
+
+
+class EmbeddingBatcher:
+    """Merge small concurrent embedding requests into batched upstream calls.
+
+    A caller that finds no active flusher becomes the flusher: it waits up to
+    ``max_wait`` seconds (or until ``max_batch_size`` texts are queued), then
+    drains the queue in batches of at most ``max_batch_size`` texts, sending
+    each distinct text upstream once. Requests at least ``max_batch_size``
+    long bypass the queue and are split into full batches directly.
+    """
+
+    def __init__(
+        self,
+        embed_batch: Callable[[list[str]], list[list[float]]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.01,
+    ) -> None:
+        self._embed_batch = embed_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self._cond = threading.Condition()
+        self._queue: deque[_PendingEmbedding] = deque()
+        self._queued = 0
+        self._flushing = False
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+
+        if len(texts) >= self.max_batch_size or self.max_wait == 0:
+            vectors: list[list[float]] = []
+            for start in range(0, len(texts), self.max_batch_size):
+                vectors.extend(self._embed_unique(texts[start:start + self.max_batch_size]))
+            return vectors
+
+        pending = _PendingEmbedding(texts=list(texts))
+        with self._cond:
+            self._queue.append(pending)
+            self._queued += len(texts)
+            if self._queued >= self.max_batch_size:
+                self._cond.notify_all()
+            flusher = not self._flushing
+            if flusher:
+                self._flushing = True
+
+        if flusher:
+            self._flush()
+        return pending.future.result()
+
+    def _embed_unique(self, texts: list[str]) -> list[list[float]]:
+        unique = list(dict.fromkeys(texts))
+        vectors = self._embed_batch(unique)
+        by_text = dict(zip(unique, vectors))
+        return [by_text[text] for text in texts]
+
+    def _flush(self) -> None:
+        with self._cond:
+            self._cond.wait_for(lambda: self._queued >= self.max_batch_size, timeout=self.max_wait)
+
+        while True:
+            with self._cond:
+                batch: list[_PendingEmbedding] = []
+                size = 0
+                while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch_size):
+                    item = self._queue.popleft()
+                    batch.append(item)
+                    size += len(item.texts)
+                self._queued -= size
+                if not batch:
+                    self._flushing = False
+                    return
+
+            try:
+                vectors = self._embed_unique([text for item in batch for text in item.texts])
+            except BaseException as exc:
+                for item in batch:
+                    item.future.set_exception(exc)
+                continue
+
+            offset = 0
+            for item in batch:
+                item.future.set_result(vectors[offset:offset + len(item.texts)])
+                offset += len(item.texts)
@@ -1,66 +1,392 @@
 from __future__ import annotations
 
-from typing import Any
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, TypeVar
 
-from openai import APIError, AzureOpenAI, OpenAI, OpenAIError
+from openai import APIConnectionError, APIError, OpenAIError
 
-from app.core.config import Settings, settings
+from app.core.config import LLMTask, LLMTaskProfile, Settings, settings
+from app.services.llm_batching import EmbeddingBatcher, RequestCoalescer, request_key
+from app.services.llm_rate_limit import (
+    OVERLOAD_STATUS_CODES,
+    RETRYABLE_STATUS_CODES,
+    AdaptiveConcurrencyLimiter,
+    LLMCapacityError,
+    ProviderRateLimiter,
+    RetryPolicy,
+    estimate_tokens,
+    retry_after_seconds,
+    status_code_of,
+)
+from app.services.llm_routing import (
+    NON_FAILOVER_STATUS_CODES,
+    CircuitBreaker,
+    Endpoint,
+    EndpointRouter,
+    EndpointUnavailableError,
+    build_provider_client,
+    endpoints_from_settings,
+)
+from app.services.token_accounting import STABLE_SPANS, PromptTooLargeError, fit_messages, token_metrics
+
+logger = logging.getLogger(__name__)
 
 Message = dict[str, Any]
+T = TypeVar("T")
+
+
+@dataclass
+class _ModelLimits:
+    rate: ProviderRateLimiter
+    concurrency: AdaptiveConcurrencyLimiter
 
 
 class LLMProviderClient:
-    """Facade for calling the configured LLM provider."""
+    """Facade for calling the configured LLM provider pool.
+
+    Requests are routed over a prioritised pool of endpoints (see
+    ``EndpointRouter``): the healthiest endpoint is tried first and failures
+    fail over to the next, with per-endpoint circuit breakers. Interactive
+    calls may be hedged to a second endpoint when the first is slow.
+    Each call names a task (``chat``, ``title``, ``ai_edit``, ...) whose
+    profile in ``llm_task_profiles`` selects the model, ``max_tokens`` and
+    temperature.
+
+    Each endpoint + model pair gets a requests/min and tokens/min token
+    bucket and an adaptive concurrency limit (at most ``llm_max_concurrency``)
+    that halves on 429/503 and creeps back up on success. Retryable failures
+    are retried with jittered exponential backoff that honours
+    ``Retry-After``. Concurrent identical completion requests share one
+    upstream call, and small embedding requests are merged into batched calls.
+    """
 
     def __init__(self, app_settings: Settings | None = None) -> None:
         self.settings = app_settings or settings
-        self.provider = self.settings.llm_provider
-        self.client, self.model = self._build_client()
-
-    def _build_client(self) -> tuple[OpenAI | AzureOpenAI, str]:
-        if self.provider == "azure":
-            if not self.settings.azure_openai_api_key:
-                raise RuntimeError("Azure OpenAI API key is not configured.")
-            if not self.settings.azure_openai_endpoint:
-                raise RuntimeError("Azure OpenAI endpoint is not configured.")
-
-            client = AzureOpenAI(
-                api_key=self.settings.azure_openai_api_key,
-                api_version=self.settings.azure_openai_api_version,
-                azure_endpoint=self.settings.azure_openai_endpoint,
+        self.router = EndpointRouter(
+            [
+                Endpoint(
+                    config=config,
+                    client=build_provider_client(config, self.settings),
+                    breaker=CircuitBreaker(
+                        self.settings.llm_circuit_failure_threshold,
+                        self.settings.llm_circuit_reset_s,
+                    ),
+                )
+                for config in endpoints_from_settings(self.settings)
+            ],
+            default_hedge_delay=self.settings.llm_hedge_delay_ms / 1000,
+        )
+
+        primary = self.router.primary
+        self.provider = primary.config.provider
+        self.client = primary.client
+        self.model = primary.config.model
+        self.embedding_model = primary.embedding_model
+
+        self._limits: dict[str, _ModelLimits] = {}
+        self._limits_lock = threading.Lock()
+        self._retry = RetryPolicy(
+            max_retries=self.settings.llm_max_retries,
+            base_delay=self.settings.llm_retry_base_delay_ms / 1000,
+            max_delay=self.settings.llm_retry_max_delay_ms / 1000,
+        )
+        self._hedge_executor = ThreadPoolExecutor(
+            max_workers=max(2, self.settings.llm_max_concurrency), thread_name_prefix="llm-hedge"
+        )
+        self._coalescer = RequestCoalescer()
+        self._embedding_batcher = EmbeddingBatcher(
+            self._embed_upstream,
+            max_batch_size=self.settings.embedding_batch_size,
+            max_wait=self.settings.embedding_batch_window_ms / 1000,
+        )
+
+    def _limits_for(self, endpoint: Endpoint, model: str) -> _ModelLimits:
+        key = f"{endpoint.name}:{model}"
+        with self._limits_lock:
+            limits = self._limits.get(key)
+            if limits is None:
+                limits = _ModelLimits(
+                    rate=ProviderRateLimiter(
+                        self.settings.llm_requests_per_minute,
+                        self.settings.llm_tokens_per_minute,
+                    ),
+                    concurrency=AdaptiveConcurrencyLimiter(maximum=self.settings.llm_max_concurrency),
+                )
+                self._limits[key] = limits
+            return limits
+
+    def _call_upstream(
+        self,
+        endpoint: Endpoint,
+        model: str,
+        estimated_tokens: int,
+        call: Callable[[], T],
+        used_tokens: Callable[[T], int | None],
+        max_retries: int,
+    ) -> T:
+        """Run ``call`` under the endpoint's rate and concurrency limits, retrying transient failures."""
+
+        limits = self._limits_for(endpoint, model)
+        wait_timeout = self.settings.llm_rate_limit_max_wait_s
+        attempt = 0
+        while True:
+            limits.rate.acquire(estimated_tokens, timeout=wait_timeout)
+            try:
+                limits.concurrency.acquire(timeout=wait_timeout)
+            except LLMCapacityError:
+                # Nothing was sent, so the rate reservation must not count against the budget
+                limits.rate.refund(estimated_tokens)
+                raise
+            retry_after = None
+            try:
+                result = call()
+            except (APIError, OpenAIError) as exc:
+                status = status_code_of(exc)
+                if status in OVERLOAD_STATUS_CODES:
+                    limits.concurrency.on_overload()
+                    retry_after = retry_after_seconds(exc)
+                    if retry_after:
+                        limits.rate.defer(retry_after)
+
+                retryable = isinstance(exc, APIConnectionError) or status in RETRYABLE_STATUS_CODES
+                if not retryable or attempt >= max_retries:
+                    raise
+                logger.warning(
+                    f"LLM call to {endpoint.name}/{model} failed (status={status}), retry {attempt + 1}: {exc}"
+                )
+            else:
+                limits.concurrency.on_success()
+                limits.rate.reconcile(estimated_tokens, used_tokens(result))
+                return result
+            finally:
+                limits.concurrency.release()
+
+            time.sleep(self._retry.delay(attempt, retry_after))
+            attempt += 1
+
+    def _attempt(
+        self,
+        endpoint: Endpoint,
+        model_of: Callable[[Endpoint], str],
+        estimated_tokens: int,
+        request: Callable[[Endpoint, str], T],
+        used_tokens: Callable[[T], int | None],
+        max_retries: int,
+    ) -> T:
+        """One endpoint's share of a routed call, feeding latency and outcome back to the router."""
+
+        if not endpoint.breaker.allow():
+            raise EndpointUnavailableError(f"LLM endpoint {endpoint.name} is not accepting requests (circuit open).")
+        model = model_of(endpoint)
+        started = time.monotonic()
+        try:
+            result = self._call_upstream(
+                endpoint,
+                model,
+                estimated_tokens,
+                lambda: request(endpoint, model),
+                used_tokens,
+                max_retries,
+            )
+        except LLMCapacityError:
+            # Our own limiter timed out; the endpoint itself did nothing wrong
+            self.router.release(endpoint)
+            raise
+        except (APIError, OpenAIError) as exc:
+            if status_code_of(exc) in NON_FAILOVER_STATUS_CODES:
+                # The endpoint answered; the request itself was bad, so its health is unchanged
+                self.router.release(endpoint)
+            else:
+                self.router.record_failure(endpoint)
+            raise
+        except BaseException:
+            self.router.release(endpoint)
+            raise
+        self.router.record_success(endpoint, time.monotonic() - started)
+        return result
+
+    def _route(
+        self,
+        estimated_tokens: int,
+        request: Callable[[Endpoint, str], T],
+        used_tokens: Callable[[T], int | None],
+        model_of: Callable[[Endpoint], str] = lambda endpoint: endpoint.config.model,
+        embedding_model: str | None = None,
+        hedge: bool = False,
+    ) -> T:
+        """Send ``request`` to the best available endpoint, failing over (or hedging) as needed."""
+
+        candidates = self.router.ranked(embedding_model=embedding_model)
+
+        def attempt(endpoint: Endpoint) -> T:
+            # Spend the full retry budget only on the last endpoint in the pool.
+            is_last = endpoint is candidates[-1]
+            max_retries = self._retry.max_retries if is_last else min(
+                self._retry.max_retries, self.settings.llm_failover_after_retries
             )
-            return client, self.settings.azure_openai_deployment_name
+            return self._attempt(endpoint, model_of, estimated_tokens, request, used_tokens, max_retries)
+
+        remaining = list(candidates)
+        last_error: Exception | None = None
+
+        if hedge and len(remaining) > 1:
+            primary, secondary = remaining[0], remaining[1]
+            remaining = remaining[2:]
+            futures: list[Future] = [self._hedge_executor.submit(attempt, primary)]
+            done, _ = wait(futures, timeout=self.router.hedge_delay(primary))
+            first_error = futures[0].exception() if done else None
+            if first_error is not None and not _should_fail_over(first_error):
+                # A bad request fails the same way everywhere; don't duplicate it
+                raise first_error
+            if not done or first_error is not None:
+                logger.info(f"Hedging LLM request from {primary.name} to {secondary.name}")
+                futures.append(self._hedge_executor.submit(attempt, secondary))
+
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        # A losing hedge keeps running and still feeds the router's stats.
+                        return future.result()
+                    last_error = future.exception()
+
+            if last_error is not None and not _should_fail_over(last_error):
+                raise last_error
+
+        for endpoint in remaining:
+            try:
+                return attempt(endpoint)
+            except (APIError, OpenAIError, LLMCapacityError, EndpointUnavailableError) as exc:
+                last_error = exc
+                if not _should_fail_over(exc):
+                    raise
+                logger.warning(f"LLM endpoint {endpoint.name} failed, failing over: {exc}")
+
+        assert last_error is not None
+        raise last_error
+
+    def task_profile(self, task: LLMTask) -> LLMTaskProfile:
+        profile = self.settings.llm_task_profiles.get(task)
+        if profile is None:
+            raise ValueError(f"Unknown LLM task: {task}")
+        return profile
+
+    @staticmethod
+    def _model_for(endpoint: Endpoint, profile: LLMTaskProfile) -> str:
+        """Resolve a task profile's model to the name/deployment this endpoint serves."""
+
+        if profile.model is None:
+            return endpoint.config.model
+        if profile.model in endpoint.config.deployments:
+            return endpoint.config.deployments[profile.model]
+        if endpoint.config.provider == "azure":
+            # Azure needs a deployment name; without a mapping use the default deployment.
+            return endpoint.config.model
+        return profile.model
 
-        if not self.settings.openai_api_key:
-            raise RuntimeError("OpenAI API key is not configured.")
+    @staticmethod
+    def _response_format_for(endpoint: Endpoint, response_format: dict[str, Any] | None) -> dict[str, Any] | None:
+        """Downgrade ``response_format`` to what ``endpoint`` supports.
 
-        client = OpenAI(api_key=self.settings.openai_api_key)
-        return client, self.settings.openai_model
+        A ``json_schema`` request becomes plain JSON mode on endpoints without
+        structured outputs, and is dropped entirely where neither is
+        available; callers validate the reply locally in those cases.
+        """
 
-    def generate_reply(self, messages: list[Message]) -> str:
-        """Generate a reply from the configured LLM provider."""
+        if response_format is None:
+            return None
 
-        if not messages:
-            raise ValueError("At least one message is required to generate a reply.")
+        supported = endpoint.config.structured_output
+        if supported is None:
+            supported = "json_object" if endpoint.config.provider == "azure" else "json_schema"
 
-        chat_messages = [
-            {"role": entry.get("role"), "content": entry.get("content", "")}
-            for entry in messages
-            if entry.get("role") in {"system", "user", "assistant"}
-        ]
+        if supported == "none":
+            return None
+        if response_format.get("type") == "json_schema" and supported == "json_object":
+            return {"type": "json_object"}
+        return response_format
 
-        if not chat_messages:
-            raise ValueError("No valid chat messages provided for the LLM call.")
+    def generate_reply(
+        self,
+        messages: list[Message],
+        task: LLMTask = "chat",
+        interactive: bool = False,
+        response_format: dict[str, Any] | None = None,
+    ) -> str:
+        """Generate a reply from the configured LLM provider.
 
+        ``task`` selects the model profile. ``interactive`` marks user-facing
+        calls that may be hedged across endpoints when
+        ``llm_hedge_interactive`` is enabled. ``response_format`` requests
+        JSON mode (``{"type": "json_object"}``) or a JSON-schema structured
+        output, downgraded per endpoint to what it supports.
+        """
+
+        chat_messages, profile, prompt_tokens = self._prepare(messages, task)
+        hedge = interactive and self.settings.llm_hedge_interactive
+        key = request_key("chat", task, chat_messages, response_format)
+        return self._coalescer.run(
+            key, lambda: self._complete(chat_messages, task, profile, prompt_tokens, hedge, response_format)
+        )
+
+    def _prepare(self, messages: list[Message], task: LLMTask) -> tuple[list[Message], LLMTaskProfile, int]:
+        """Validate messages and fit them to the task's prompt budget before anything is sent."""
+
+        chat_messages = _chat_messages(messages)
+        profile = self.task_profile(task)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=chat_messages,
-                temperature=0.2,
+            chat_messages, prompt_tokens, dropped = fit_messages(
+                chat_messages, profile.max_prompt_tokens, self.settings.llm_tokenizer_encoding
+            )
+        except PromptTooLargeError:
+            token_metrics.record_rejected(task)
+            raise
+        token_metrics.record(task, prompt_tokens, dropped)
+        # Token-accounting hints are not part of the provider's message format
+        chat_messages = [{"role": message["role"], "content": message["content"]} for message in chat_messages]
+        return chat_messages, profile, prompt_tokens
+
+    def _completion_options(self, prompt_tokens: int, profile: LLMTaskProfile) -> tuple[int, dict[str, Any]]:
+        estimated_tokens = prompt_tokens + (profile.max_tokens or self.settings.llm_completion_token_estimate)
+        options: dict[str, Any] = {"temperature": profile.temperature}
+        if profile.max_tokens is not None:
+            options["max_tokens"] = profile.max_tokens
+        return estimated_tokens, options
+
+    def _complete(
+        self,
+        chat_messages: list[Message],
+        task: LLMTask,
+        profile: LLMTaskProfile,
+        prompt_tokens: int,
+        hedge: bool,
+        response_format: dict[str, Any] | None = None,
+    ) -> str:
+        estimated_tokens, options = self._completion_options(prompt_tokens, profile)
+
+        try:
+            response = self._route(
+                estimated_tokens,
+                lambda endpoint, model: endpoint.client.chat.completions.create(
+                    model=model,
+                    messages=chat_messages,
+                    **self._with_response_format(endpoint, options, response_format),
+                ),
+                _total_tokens,
+                model_of=lambda endpoint: self._model_for(endpoint, profile),
+                hedge=hedge,
             )
         except (APIError, OpenAIError) as exc:
             raise RuntimeError(f"Failed to generate LLM reply: {exc}") from exc
 
+        token_metrics.record_cached(task, *_prompt_usage(response))
+
         if not response.choices:
             raise RuntimeError("LLM response did not contain any choices.")
 
@@ -71,5 +397,151 @@ class LLMProviderClient:
 
         return content.strip()
 
+    def _with_response_format(
+        self, endpoint: Endpoint, options: dict[str, Any], response_format: dict[str, Any] | None
+    ) -> dict[str, Any]:
+        endpoint_format = self._response_format_for(endpoint, response_format)
+        if endpoint_format is None:
+            return options
+        return {**options, "response_format": endpoint_format}
+
+    def stream_reply(
+        self,
+        messages: list[Message],
+        task: LLMTask = "chat",
+        response_format: dict[str, Any] | None = None,
+    ) -> Iterator[str]:
+        """Stream a reply as text deltas.
+
+        Routing, rate limiting and failover apply to opening the stream; once
+        the first byte arrives the call is committed to that endpoint, and an
+        interrupted stream raises ``RuntimeError`` after the text already
+        yielded. Streams are never coalesced or hedged.
+        """
+
+        chat_messages, profile, prompt_tokens = self._prepare(messages, task)
+        estimated_tokens, options = self._completion_options(prompt_tokens, profile)
+
+        try:
+            stream = self._route(
+                estimated_tokens,
+                lambda endpoint, model: endpoint.client.chat.completions.create(
+                    model=model,
+                    messages=chat_messages,
+                    stream=True,
+                    **self._with_response_format(endpoint, options, response_format),
+                ),
+                lambda _stream: None,
+                model_of=lambda endpoint: self._model_for(endpoint, profile),
+            )
+        except (APIError, OpenAIError) as exc:
+            raise RuntimeError(f"Failed to generate LLM reply: {exc}") from exc
+
+        return _iter_deltas(stream)
+
+    def generate_replies(
+        self,
+        conversations: list[list[Message]],
+        task: LLMTask = "chat",
+        max_concurrency: int | None = None,
+    ) -> list[str | Exception]:
+        """Generate replies for many conversations concurrently, preserving input order.
+
+        A failed conversation yields its exception in place of a reply so one
+        bad item does not abort a bulk job. Upstream concurrency is still
+        bounded by the per-endpoint adaptive limiters.
+        """
+
+        if not conversations:
+            return []
+
+        def run(conversation: list[Message]) -> str | Exception:
+            try:
+                return self.generate_reply(conversation, task=task)
+            except Exception as exc:
+                return exc
+
+        workers = min(len(conversations), max_concurrency or self.settings.llm_max_concurrency)
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="llm-batch") as executor:
+            return list(executor.map(run, conversations))
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Return one embedding vector per input text, in input order."""
+
+        return self._embedding_batcher.embed(texts)
+
+    def _embed_upstream(self, texts: list[str]) -> list[list[float]]:
+        if not self.embedding_model:
+            raise RuntimeError("No embedding model is configured for the primary LLM endpoint.")
+
+        # Only endpoints serving the same embedding model are interchangeable;
+        # mixing models would corrupt a vector index.
+        try:
+            response = self._route(
+                sum(estimate_tokens(text) for text in texts),
+                lambda endpoint, model: endpoint.client.embeddings.create(model=model, input=texts),
+                _total_tokens,
+                model_of=lambda endpoint: endpoint.embedding_model,
+                embedding_model=self.embedding_model,
+            )
+        except (APIError, OpenAIError) as exc:
+            raise RuntimeError(f"Failed to generate embeddings: {exc}") from exc
+
+        if len(response.data) != len(texts):
+            raise RuntimeError("Embedding response did not contain one vector per input.")
+
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def _chat_messages(messages: list[Message]) -> list[Message]:
+    if not messages:
+        raise ValueError("At least one message is required to generate a reply.")
+
+    chat_messages = [
+        {
+            "role": entry.get("role"),
+            "content": entry.get("content", ""),
+            **({STABLE_SPANS: entry[STABLE_SPANS]} if entry.get(STABLE_SPANS) else {}),
+        }
+        for entry in messages
+        if entry.get("role") in {"system", "user", "assistant"}
+    ]
+
+    if not chat_messages:
+        raise ValueError("No valid chat messages provided for the LLM call.")
+
+    return chat_messages
+
+
+def _iter_deltas(stream: Any) -> Iterator[str]:
+    try:
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = getattr(chunk.choices[0].delta, "content", None)
+            if delta:
+                yield delta
+    except (APIError, OpenAIError) as exc:
+        raise RuntimeError(f"LLM reply stream interrupted: {exc}") from exc
+    finally:
+        stream.close()
+
+
+def _should_fail_over(exc: BaseException) -> bool:
+    return status_code_of(exc) not in NON_FAILOVER_STATUS_CODES
+
+
+def _prompt_usage(response: Any) -> tuple[int | None, int | None]:
+    """Billed prompt tokens and how many of them the provider served from its prompt cache."""
+
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    return getattr(usage, "prompt_tokens", None), getattr(details, "cached_tokens", None)
+
+
+def _total_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
 
 llm_client = LLMProviderClient()
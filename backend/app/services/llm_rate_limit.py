@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+# Status codes that mean "slow down" rather than "this request is broken"
+OVERLOAD_STATUS_CODES = {429, 503}
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMCapacityError(RuntimeError):
+    """Raised when a local rate or concurrency budget cannot be acquired in time."""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``capacity`` per ``period`` seconds.
+
+    ``reserve`` deducts immediately and may drive the balance negative; the
+    returned wait is how long the caller must sleep for the reservation to be
+    covered. This keeps the bucket lock-free for the duration of the wait.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0) -> None:
+        self.capacity = max(1.0, float(capacity))
+        self.rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def adjust(self, delta: float) -> None:
+        """Return (positive) or charge (negative) tokens after the fact."""
+
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class ProviderRateLimiter:
+    """Requests/min and tokens/min budget for one provider + model pair."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: int, timeout: float) -> None:
+        now = time.monotonic()
+        wait = max(
+            self.requests.reserve(1),
+            self.tokens.reserve(estimated_tokens),
+            self._blocked_until - now,
+        )
+        if wait > timeout:
+            self.refund(estimated_tokens)
+            raise LLMCapacityError(f"LLM rate limit budget exhausted; next slot in {wait:.1f}s")
+        if wait > 0:
+            time.sleep(wait)
+
+    def refund(self, estimated_tokens: int) -> None:
+        """Give back a reservation from ``acquire`` for a request that was never sent."""
+
+        self.requests.adjust(1)
+        self.tokens.adjust(estimated_tokens)
+
+    def defer(self, seconds: float) -> None:
+        """Block new requests for ``seconds``, e.g. from a provider ``Retry-After`` header."""
+
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int | None) -> None:
+        if actual_tokens is not None:
+            self.tokens.adjust(estimated_tokens - actual_tokens)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limit: +1/limit per success, halved on overload."""
+
+    def __init__(self, maximum: int, minimum: int = 1, initial: int | None = None) -> None:
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = float(initial or self.maximum)
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout: float) -> None:
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < int(self.limit), timeout=timeout):
+                raise LLMCapacityError("Timed out waiting for an LLM concurrency slot")
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self) -> None:
+        with self._cond:
+            previous = int(self.limit)
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            if int(self.limit) > previous:
+                self._cond.notify()
+
+    def on_overload(self) -> None:
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+@dataclass
+class RetryPolicy:
+    max_retries: int = 4
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """Full-jitter exponential backoff, never shorter than the provider's ``Retry-After``."""
+
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(backoff, retry_after or 0.0)
+
+
+def status_code_of(exc: BaseException) -> int | None:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Read ``retry-after-ms`` / ``retry-after`` from an OpenAI SDK error response, if any."""
+
+    response: Any = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for rate budgeting."""
+
+    return max(1, len(text) // 4)
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+from openai import AzureOpenAI, OpenAI
+
+from app.core.config import LLMEndpointConfig, Settings
+
+# Client errors that would fail identically on every endpoint; failing over
+# would only multiply the cost of a bad request.
+NON_FAILOVER_STATUS_CODES = {400, 404, 413, 422}
+
+_LATENCY_WINDOW = 100
+_OUTCOME_WINDOW = 50
+_MIN_SAMPLES_FOR_HEDGE_DELAY = 10
+
+
+class EndpointUnavailableError(RuntimeError):
+    """The endpoint's circuit breaker refused the call (open, or its half-open probe is taken)."""
+
+
+def endpoints_from_settings(app_settings: Settings) -> list[LLMEndpointConfig]:
+    """Return the configured endpoint pool, or a single endpoint built from the legacy settings."""
+
+    if app_settings.llm_endpoints:
+        return list(app_settings.llm_endpoints)
+
+    if app_settings.llm_provider == "azure":
+        return [
+            LLMEndpointConfig(
+                name="azure",
+                provider="azure",
+                api_key=app_settings.azure_openai_api_key,
+                azure_endpoint=app_settings.azure_openai_endpoint,
+                api_version=app_settings.azure_openai_api_version,
+                model=app_settings.azure_openai_deployment_name,
+                embedding_model=app_settings.azure_openai_embedding_deployment_name,
+            )
+        ]
+
+    return [
+        LLMEndpointConfig(
+            name="openai",
+            provider="openai",
+            api_key=app_settings.openai_api_key,
+            model=app_settings.openai_model,
+            embedding_model=app_settings.openai_embedding_model,
+        )
+    ]
+
+
+def build_provider_client(config: LLMEndpointConfig, app_settings: Settings) -> OpenAI | AzureOpenAI:
+    # SDK retries are disabled; LLMProviderClient retries through its rate limiter.
+    timeout = config.timeout_s or app_settings.llm_request_timeout_s
+
+    if config.provider == "azure":
+        if not config.api_key:
+            raise RuntimeError(f"Azure OpenAI API key is not configured for endpoint '{config.name}'.")
+        if not config.azure_endpoint:
+            raise RuntimeError(f"Azure OpenAI endpoint is not configured for endpoint '{config.name}'.")
+
+        return AzureOpenAI(
+            api_key=config.api_key,
+            api_version=config.api_version or app_settings.azure_openai_api_version,
+            azure_endpoint=config.azure_endpoint,
+            max_retries=0,
+            timeout=timeout,
+        )
+
+    if not config.api_key:
+        raise RuntimeError(f"OpenAI API key is not configured for endpoint '{config.name}'.")
+
+    return OpenAI(api_key=config.api_key, base_url=config.base_url, max_retries=0, timeout=timeout)
+
+
+class EndpointStats:
+    """Rolling latency and outcome window for one endpoint."""
+
+    def __init__(self) -> None:
+        self._latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+        self._outcomes: deque[bool] = deque(maxlen=_OUTCOME_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float | None, ok: bool) -> None:
+        with self._lock:
+            if ok and latency is not None:
+                self._latencies.append(latency)
+            self._outcomes.append(ok)
+
+    @property
+    def samples(self) -> int:
+        return len(self._latencies)
+
+    def quantile(self, q: float) -> float | None:
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        if len(latencies) == 1:
+            return latencies[0]
+        return statistics.quantiles(latencies, n=100, method="inclusive")[min(98, max(0, int(q * 100) - 1))]
+
+    @property
+    def p50(self) -> float | None:
+        with self._lock:
+            latencies = list(self._latencies)
+        return statistics.median(latencies) if latencies else None
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            outcomes = list(self._outcomes)
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+
+class CircuitBreaker:
+    """Classic closed / open / half-open breaker driven by consecutive failures."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        """Whether ``allow`` would currently admit a request, without taking the probe slot."""
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at >= self.reset_timeout
+            return not self._probe_in_flight
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; in half-open state only one probe at a time.
+
+        A ``True`` in half-open state holds the probe slot until
+        ``record_success``, ``record_failure`` or ``release`` is called.
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def release(self) -> None:
+        """Give back a probe slot taken by ``allow`` without reporting an outcome."""
+
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+@dataclass
+class Endpoint:
+    config: LLMEndpointConfig
+    client: Any
+    breaker: CircuitBreaker
+    stats: EndpointStats = field(default_factory=EndpointStats)
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def embedding_model(self) -> str | None:
+        return self.config.embedding_model
+
+
+class EndpointRouter:
+    """Orders a prioritised endpoint pool by health for each request.
+
+    Endpoints are ranked by ``priority`` (lower first) and, within a
+    priority, by observed p50 latency inflated by recent error rate.
+    Endpoints without samples sort first so new or recovered endpoints get
+    measured. Endpoints whose circuit breaker is open are skipped; ranking
+    has no side effects, the breaker is only consulted for real
+    (``CircuitBreaker.allow``) by the attempt that calls an endpoint.
+    """
+
+    def __init__(self, endpoints: list[Endpoint], default_hedge_delay: float) -> None:
+        if not endpoints:
+            raise RuntimeError("At least one LLM endpoint must be configured.")
+        self.endpoints = endpoints
+        self.default_hedge_delay = default_hedge_delay
+
+    @property
+    def primary(self) -> Endpoint:
+        return min(self.endpoints, key=lambda endpoint: endpoint.config.priority)
+
+    @staticmethod
+    def _score(endpoint: Endpoint) -> float:
+        p50 = endpoint.stats.p50
+        if p50 is None:
+            return 0.0
+        return p50 * (1 + 4 * endpoint.stats.error_rate)
+
+    def ranked(self, embedding_model: str | None = None) -> list[Endpoint]:
+        candidates = [
+            endpoint
+            for endpoint in self.endpoints
+            if embedding_model is None or endpoint.embedding_model == embedding_model
+        ]
+        ordered = sorted(candidates, key=lambda endpoint: (endpoint.config.priority, self._score(endpoint)))
+        available = [endpoint for endpoint in ordered if endpoint.breaker.available()]
+        if not available:
+            raise RuntimeError("No healthy LLM endpoints available; all circuit breakers are open.")
+        return available
+
+    def record_success(self, endpoint: Endpoint, latency: float) -> None:
+        endpoint.stats.record(latency, ok=True)
+        endpoint.breaker.record_success()
+
+    def record_failure(self, endpoint: Endpoint) -> None:
+        endpoint.stats.record(None, ok=False)
+        endpoint.breaker.record_failure()
+
+    def release(self, endpoint: Endpoint) -> None:
+        """The call never reached ``endpoint`` (e.g. our own limiter gave up); record nothing."""
+
+        endpoint.breaker.release()
+
+    def hedge_delay(self, endpoint: Endpoint) -> float:
+        """Wait this long for ``endpoint`` before sending a hedged duplicate elsewhere."""
+
+        if endpoint.stats.samples < _MIN_SAMPLES_FOR_HEDGE_DELAY:
+            return self.default_hedge_delay
+        return endpoint.stats.quantile(0.95) or self.default_hedge_delay
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "name": endpoint.name,
+                "provider": endpoint.config.provider,
+                "model": endpoint.config.model,
+                "priority": endpoint.config.priority,
+                "circuit": endpoint.breaker.state,
+                "p50_ms": None if endpoint.stats.p50 is None else round(endpoint.stats.p50 * 1000, 1),
+                "error_rate": round(endpoint.stats.error_rate, 3),
+                "samples": endpoint.stats.samples,
+            }
+            for endpoint in self.endpoints
+        ]
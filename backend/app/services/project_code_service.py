@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+from collections import deque
+from collections.abc import Iterable, Mapping
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.db.models.project_code_counter import ProjectCodeCounter
+from app.db.types import utcnow
+
+# Dialects with INSERT .. ON CONFLICT DO UPDATE .. RETURNING
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# <initials>-<year>-<number>, the shape generated codes take
+_CODE_PATTERN = re.compile(r"^(?P<prefix>[^-]+-[^-]+)-(?P<number>[0-9]+)$")
+
+
+def project_code_prefix(project_name: str) -> str:
+    """Code prefix for a project name: up to 3 initials plus the current year."""
+
+    words = project_name.upper().split()
+    if len(words) >= 2:
+        initials = "".join(word[0] for word in words[:3])  # Max 3 initials
+    else:
+        initials = words[0][:3] if words else "PRJ"
+    return f"{initials}-{datetime.now().year}"
+
+
+def format_project_code(prefix: str, number: int) -> str:
+    return f"{prefix}-{number:03d}"
+
+
+def _upsert(db: Session, prefix: str, value: Any, on_conflict: Any) -> int:
+    dialect = db.get_bind().dialect.name
+    insert = _UPSERT_INSERTS.get(dialect)
+    if insert is None:
+        raise ValueError(f"Project code counters are not supported on {dialect}")
+    stmt = (
+        insert(ProjectCodeCounter)
+        .values(prefix=prefix, last_value=value)
+        .on_conflict_do_update(
+            index_elements=[ProjectCodeCounter.prefix],
+            set_={"last_value": on_conflict, "updated_at": utcnow()},
+        )
+        .returning(ProjectCodeCounter.last_value)
+    )
+    return db.execute(stmt).scalar_one()
+
+
+def reserve_code_numbers(db: Session, prefix: str, count: int = 1) -> range:
+    """Atomically take the next ``count`` numbers for ``prefix``, in ``db``'s transaction.
+
+    One upsert-and-increment statement: the counter row is created on first
+    use and otherwise locked and bumped, so concurrent callers always get
+    disjoint ranges. The numbers are released again if the transaction
+    rolls back.
+    """
+
+    if count < 1:
+        return range(0)
+    last = _upsert(db, prefix, count, ProjectCodeCounter.last_value + count)
+    return range(last - count + 1, last + 1)
+
+
+def observe_project_codes(db: Session, codes: Iterable[str]) -> None:
+    """Advance counters past explicitly chosen codes so they are never generated later."""
+
+    highest: dict[str, int] = {}
+    for code in codes:
+        match = _CODE_PATTERN.match(code or "")
+        if match:
+            prefix, number = match["prefix"], int(match["number"])
+            highest[prefix] = max(number, highest.get(prefix, 0))
+    for prefix, number in sorted(highest.items()):
+        _upsert(
+            db,
+            prefix,
+            number,
+            case((ProjectCodeCounter.last_value < number, number), else_=ProjectCodeCounter.last_value),
+        )
+
+
+class ProjectCodeAllocator:
+    """Hands out project codes from blocks reserved ahead of time, for bulk imports.
+
+    ``reserve`` takes a whole block of numbers per prefix with one statement
+    each and commits it straight away on its own session, so codes stay
+    unique even if the import's own transaction is rolled back and retried.
+    The price is a gap in the numbering for rows that end up rejected.
+    """
+
+    def __init__(self, bind: Engine | Connection) -> None:
+        self.bind = bind
+        self._free: dict[str, deque[int]] = {}
+
+    def reserve(self, counts: Mapping[str, int], explicit_codes: Iterable[str] = ()) -> None:
+        """Make sure ``counts[prefix]`` numbers are on hand per prefix, and record explicit codes."""
+
+        missing = {
+            prefix: count - len(self._free.get(prefix, ()))
+            for prefix, count in counts.items()
+            if count > len(self._free.get(prefix, ()))
+        }
+        explicit_codes = list(explicit_codes)
+        if not missing and not explicit_codes:
+            return
+
+        with Session(bind=self.bind) as session:
+            observe_project_codes(session, explicit_codes)
+            # Sorted, so concurrent imports lock counter rows in the same order
+            for prefix, count in sorted(missing.items()):
+                self._free.setdefault(prefix, deque()).extend(reserve_code_numbers(session, prefix, count))
+            session.commit()
+
+    def next_code(self, prefix: str) -> str:
+        if not self._free.get(prefix):
+            self.reserve({prefix: 1})
+        return format_project_code(prefix, self._free[prefix].popleft())
@@ -0,0 +1,302 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.models.project import Project
+from app.schemas.project import ProjectCreate
+from app.services import document_registry
+from app.services.project_code_service import ProjectCodeAllocator, project_code_prefix
+from app.services.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# CSV cells holding JSON objects rather than plain text
+_CSV_JSON_FIELDS = {"tags", "custom_fields"}
+
+
+@dataclass
+class ImportRowError:
+    row: int
+    error: str
+    project_name: str | None = None
+
+
+@dataclass
+class ImportedProject:
+    row: int
+    id: UUID
+    project_name: str
+    project_code: str | None
+
+
+@dataclass
+class ImportResult:
+    total_rows: int = 0
+    created: list[ImportedProject] = field(default_factory=list)
+    errors: list[ImportRowError] = field(default_factory=list)
+
+
+@dataclass
+class ParsedRow:
+    row: int
+    data: dict[str, Any] | None = None
+    error: str | None = None
+
+
+class RowParser:
+    """Incremental NDJSON / CSV row parser fed one text line at a time.
+
+    Rows are numbered from 1 in input order (the CSV header is not a row).
+    A line that does not parse becomes a ``ParsedRow`` carrying an error, so
+    one bad line never aborts the rest of the import. CSV fields may contain
+    quoted newlines; empty cells are treated as absent.
+    """
+
+    def __init__(self, import_format: str) -> None:
+        if import_format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported import format: {import_format}")
+        self.import_format = import_format
+        self._row = 0
+        self._header: list[str] | None = None
+        self._pending = ""
+
+    def feed(self, line: str) -> list[ParsedRow]:
+        if self.import_format == "ndjson":
+            return self._feed_ndjson(line)
+        return self._feed_csv(line)
+
+    def close(self) -> list[ParsedRow]:
+        if not self._pending:
+            return []
+        # An unterminated quoted field at end of input
+        self._row += 1
+        self._pending = ""
+        return [ParsedRow(self._row, error="Unterminated quoted field")]
+
+    def _feed_ndjson(self, line: str) -> list[ParsedRow]:
+        if not line.strip():
+            return []
+        self._row += 1
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError as exc:
+            return [ParsedRow(self._row, error=f"Invalid JSON: {exc.msg}")]
+        if not isinstance(data, dict):
+            return [ParsedRow(self._row, error="Row must be a JSON object")]
+        return [ParsedRow(self._row, data=data)]
+
+    def _feed_csv(self, line: str) -> list[ParsedRow]:
+        text = f"{self._pending}\n{line}" if self._pending else line
+        if text.count('"') % 2:
+            # Inside a quoted field that continues on the next line
+            self._pending = text
+            return []
+        self._pending = ""
+        if not text.strip():
+            return []
+
+        cells = next(csv.reader([text]))
+        if self._header is None:
+            self._header = [cell.strip() for cell in cells]
+            return []
+
+        self._row += 1
+        if len(cells) > len(self._header):
+            return [ParsedRow(self._row, error=f"Expected {len(self._header)} columns, got {len(cells)}")]
+        data: dict[str, Any] = {}
+        for name, value in zip(self._header, cells):
+            if value == "":
+                continue
+            if name in _CSV_JSON_FIELDS:
+                try:
+                    value = json.loads(value)
+                except json.JSONDecodeError:
+                    return [ParsedRow(self._row, error=f"{name}: invalid JSON")]
+            data[name] = value
+        return [ParsedRow(self._row, data=data)]
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()
+    )
+
+
+class ProjectImporter:
+    """Create projects and their initial documents in bulk, one batch at a time.
+
+    Each batch is validated as a whole: rows go through ``ProjectCreate``,
+    names and codes are checked against earlier rows of the import and
+    against the database with one query each, and missing project codes
+    are taken from per-prefix blocks reserved with one counter upsert per
+    prefix (``ProjectCodeAllocator``). Valid rows are then written with
+    multi-row INSERTs (projects, then every initial document) and committed
+    together.
+
+    If the batch still hits a constraint (e.g. a project created
+    concurrently under the same name), it is retried row by row so only the
+    offending rows fail. Every rejected row is reported in ``result.errors``
+    with its row number.
+    """
+
+    def __init__(self, db: Session, created_by: str | None = None) -> None:
+        self.db = db
+        self.created_by = created_by
+        self.result = ImportResult()
+        # Names and codes claimed by earlier rows of this import
+        self._names: set[str] = set()
+        self._codes: set[str] = set()
+        self._allocator = ProjectCodeAllocator(db.get_bind())
+
+    def record_error(self, row: int, error: str, project_name: str | None = None) -> None:
+        self.result.total_rows += 1
+        self.result.errors.append(ImportRowError(row=row, error=error, project_name=project_name))
+
+    def import_batch(self, rows: list[ParsedRow]) -> None:
+        """Validate and insert one batch of parsed rows in a single transaction."""
+
+        valid: list[tuple[int, ProjectCreate]] = []
+        for parsed in rows:
+            if parsed.error is not None:
+                self.record_error(parsed.row, parsed.error)
+                continue
+            self.result.total_rows += 1
+            project_data = self._validate(parsed)
+            if project_data is not None:
+                valid.append((parsed.row, project_data))
+
+        valid = self._reject_existing(valid)
+        if not valid:
+            return
+        self._allocate_codes(valid)
+
+        items = [(row, project_data, uuid.uuid4()) for row, project_data in valid]
+        try:
+            self._insert(items)
+            self.db.commit()
+        except IntegrityError as exc:
+            self.db.rollback()
+            logger.warning(f"Project import batch hit a constraint, retrying row by row: {exc.orig}")
+            items = self._insert_each(items)
+        response_cache.invalidate("projects")
+
+        for row, project_data, project_id in items:
+            self.result.created.append(
+                ImportedProject(
+                    row=row,
+                    id=project_id,
+                    project_name=project_data.project_name,
+                    project_code=project_data.project_code,
+                )
+            )
+
+    def _validate(self, parsed: ParsedRow) -> ProjectCreate | None:
+        name = parsed.data.get("project_name")
+        name = name if isinstance(name, str) else None
+        try:
+            project_data = ProjectCreate.model_validate(parsed.data)
+        except ValidationError as exc:
+            self.result.errors.append(ImportRowError(parsed.row, _validation_message(exc), name))
+            return None
+
+        if project_data.project_name in self._names:
+            self.result.errors.append(
+                ImportRowError(parsed.row, "Duplicate project name within the import", project_data.project_name)
+            )
+            return None
+        if project_data.project_code and project_data.project_code in self._codes:
+            self.result.errors.append(
+                ImportRowError(parsed.row, "Duplicate project code within the import", project_data.project_name)
+            )
+            return None
+
+        self._names.add(project_data.project_name)
+        if project_data.project_code:
+            self._codes.add(project_data.project_code)
+        if project_data.created_by is None:
+            project_data.created_by = self.created_by
+        return project_data
+
+    def _reject_existing(self, valid: list[tuple[int, ProjectCreate]]) -> list[tuple[int, ProjectCreate]]:
+        if not valid:
+            return valid
+        names = [project_data.project_name for _, project_data in valid]
+        codes = [project_data.project_code for _, project_data in valid if project_data.project_code]
+        existing_names = set(self.db.scalars(select(Project.project_name).where(Project.project_name.in_(names))))
+        existing_codes = (
+            set(self.db.scalars(select(Project.project_code).where(Project.project_code.in_(codes))))
+            if codes
+            else set()
+        )
+
+        remaining = []
+        for row, project_data in valid:
+            if project_data.project_name in existing_names:
+                error = f"Project with name '{project_data.project_name}' already exists"
+            elif project_data.project_code in existing_codes:
+                error = f"Project with code '{project_data.project_code}' already exists"
+            else:
+                remaining.append((row, project_data))
+                continue
+            self.result.errors.append(ImportRowError(row, error, project_data.project_name))
+        return remaining
+
+    def _allocate_codes(self, valid: list[tuple[int, ProjectCreate]]) -> None:
+        pending = [
+            (project_data, project_code_prefix(project_data.project_name))
+            for _, project_data in valid
+            if not project_data.project_code
+        ]
+        self._allocator.reserve(
+            Counter(prefix for _, prefix in pending),
+            explicit_codes=[project_data.project_code for _, project_data in valid if project_data.project_code],
+        )
+        for project_data, prefix in pending:
+            code = self._allocator.next_code(prefix)
+            # Explicit codes in this import may already use a number from an earlier block
+            while code in self._codes:
+                code = self._allocator.next_code(prefix)
+            self._codes.add(code)
+            project_data.project_code = code
+
+    def _insert(self, items: list[tuple[int, ProjectCreate, UUID]]) -> None:
+        self.db.execute(
+            insert(Project),
+            [{"id": project_id, **project_data.model_dump()} for _, project_data, project_id in items],
+        )
+
+        documents = document_registry.initial_document_rows(
+            self.db, [(project_id, project_data) for _, project_data, project_id in items]
+        )
+        for model, values in documents.items():
+            self.db.execute(insert(model), values)
+
+    def _insert_each(self, items: list[tuple[int, ProjectCreate, UUID]]) -> list[tuple[int, ProjectCreate, UUID]]:
+        inserted = []
+        for item in items:
+            row, project_data, _ = item
+            try:
+                self._insert([item])
+                self.db.commit()
+            except IntegrityError as exc:
+                self.db.rollback()
+                self.result.errors.append(
+                    ImportRowError(row, f"Rejected by the database: {exc.orig}", project_data.project_name)
+                )
+                continue
+            inserted.append(item)
+        return inserted
@@ -1,13 +1,15 @@
 from __future__ import annotations
 
+import uuid
+from datetime import datetime
 from typing import List, Optional
 from uuid import UUID
 
-from sqlalchemy import and_, desc
+from sqlalchemy import and_, desc, insert
 from sqlalchemy.orm import Session
 
 from app.db.models.project import Project, BusinessCase, ProjectCharter
-from app.db.models.project_sop import ProjectSOP
+from app.db.types import utcnow
 from app.schemas.project import (
     ProjectCreate,
     ProjectUpdate,
@@ -16,6 +18,9 @@ from app.schemas.project import (
     ProjectCharterCreate,
     ProjectCharterUpdate,
 )
+from app.services import document_registry, project_code_service
+from app.services.concurrency import ConcurrentUpdateError, guarded_update
+from app.services.response_cache import response_cache
 
 
 class ProjectService:
@@ -50,15 +55,22 @@ class ProjectService:
         # Generate project code if not provided
         if not project_data.project_code:
             project_data.project_code = ProjectService._generate_project_code(db, project_data.project_name)
+        else:
+            project_code_service.observe_project_codes(db, [project_data.project_code])
 
-        project = Project(**project_data.model_dump())
+        project = Project(id=uuid.uuid4(), **project_data.model_dump())
         db.add(project)
-        db.commit()
+        try:
+            db.flush()
+            # Auto-create documents for all active document types, in the same transaction
+            ProjectService._create_initial_documents(db, project.id, project_data)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        response_cache.invalidate("projects")
         db.refresh(project)
 
-        # Auto-create documents for all active document types
-        ProjectService._create_initial_documents(db, project, project_data)
-
         return project
 
     @staticmethod
@@ -80,6 +92,7 @@ class ProjectService:
             setattr(project, field, value)
 
         db.commit()
+        response_cache.invalidate("projects")
         db.refresh(project)
         return project
 
@@ -92,87 +105,26 @@ class ProjectService:
 
         project.is_active = False
         db.commit()
+        response_cache.invalidate("projects")
         return True
 
     @staticmethod
     def _generate_project_code(db: Session, project_name: str) -> str:
-        """Generate a unique project code based on project name."""
-        # Extract initials from project name
-        words = project_name.upper().split()
-        if len(words) >= 2:
-            initials = "".join(word[0] for word in words[:3])  # Max 3 initials
-        else:
-            initials = words[0][:3] if words else "PRJ"
-
-        # Get current year
-        from datetime import datetime
-        year = datetime.now().year
-
-        # Find the next available number
-        base_code = f"{initials}-{year}"
-        existing_codes = db.query(Project.project_code).filter(
-            Project.project_code.like(f"{base_code}-%")
-        ).all()
+        """Generate a unique project code based on project name.
 
-        if not existing_codes:
-            return f"{base_code}-001"
-
-        # Extract numbers and find the next one
-        numbers = []
-        for (code,) in existing_codes:
-            if code:
-                parts = code.split("-")
-                if len(parts) == 3 and parts[2].isdigit():
-                    numbers.append(int(parts[2]))
-
-        next_number = max(numbers, default=0) + 1
-        return f"{base_code}-{next_number:03d}"
+        The number comes from the prefix's counter row in the caller's
+        transaction, so it is released again if the create rolls back.
+        """
+        prefix = project_code_service.project_code_prefix(project_name)
+        number = project_code_service.reserve_code_numbers(db, prefix)[0]
+        return project_code_service.format_project_code(prefix, number)
 
     @staticmethod
-    def _create_initial_documents(db: Session, project: Project, project_data: ProjectCreate) -> None:
-        """Create initial documents for all active document types."""
-        # Get all active document types from ProjectSOPs
-        active_sops = db.query(ProjectSOP).filter(ProjectSOP.is_active == True).all()
-
-        for sop in active_sops:
-            try:
-                if sop.document_type == 'business_case':
-                    # Create business case
-                    business_case = BusinessCase(
-                        project_id=project.id,
-                        title=f"{project.project_name} Business Case",
-                        business_area=project_data.business_area,
-                        sponsor=project_data.sponsor,
-                        status='draft',
-                        is_current_version=True,
-                        created_by=getattr(project_data, 'created_by', None)
-                    )
-                    db.add(business_case)
-
-                elif sop.document_type == 'project_charter':
-                    # Create project charter
-                    charter = ProjectCharter(
-                        project_id=project.id,
-                        title=f"{project.project_name} Project Charter",
-                        sponsor=project_data.sponsor or 'TBD',
-                        status='draft',
-                        is_current_version=True,
-                        created_by=getattr(project_data, 'created_by', None)
-                    )
-                    db.add(charter)
-
-                # For future document types, add more elif conditions here
-
-            except Exception as e:
-                # Log the error but don't fail the project creation
-                print(f"Warning: Failed to create {sop.document_type} for project {project.project_name}: {e}")
-
-        try:
-            db.commit()
-        except Exception as e:
-            # If document creation fails, rollback document changes but keep the project
-            db.rollback()
-            print(f"Warning: Failed to create some documents for project {project.project_name}: {e}")
+    def _create_initial_documents(db: Session, project_id: UUID, project_data: ProjectCreate) -> None:
+        """Insert the initial document of every active document type, one multi-row INSERT per model."""
+        rows = document_registry.initial_document_rows(db, [(project_id, project_data)])
+        for model, values in rows.items():
+            db.execute(insert(model), values)
 
 
 class BusinessCaseService:
@@ -216,15 +168,23 @@ class BusinessCaseService:
         return business_case
 
     @staticmethod
-    def update_business_case(db: Session, business_case_id: UUID, business_case_data: BusinessCaseUpdate) -> BusinessCase:
-        """Update an existing business case."""
+    def update_business_case(
+        db: Session, business_case_id: UUID, business_case_data: BusinessCaseUpdate, expected_updated_at: Optional[datetime] = None
+    ) -> BusinessCase:
+        """Update an existing business case.
+
+        The UPDATE is conditional on the ``updated_at`` read here (or
+        ``expected_updated_at`` from the client's If-Match); a concurrent
+        write in between raises ``ConcurrentUpdateError``.
+        """
         business_case = BusinessCaseService.get_business_case(db, business_case_id)
         if not business_case:
             raise ValueError(f"Business case with ID {business_case_id} not found")
+        if expected_updated_at is not None and business_case.updated_at != expected_updated_at:
+            raise ConcurrentUpdateError("Business case was modified by someone else")
 
         update_data = business_case_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(business_case, field, value)
+        guarded_update(db, BusinessCase, business_case.id, BusinessCase.updated_at == business_case.updated_at, update_data)
 
         db.commit()
         db.refresh(business_case)
@@ -317,15 +277,23 @@ class ProjectCharterService:
         return charter
 
     @staticmethod
-    def update_project_charter(db: Session, charter_id: UUID, charter_data: ProjectCharterUpdate) -> ProjectCharter:
-        """Update an existing project charter."""
+    def update_project_charter(
+        db: Session, charter_id: UUID, charter_data: ProjectCharterUpdate, expected_updated_at: Optional[datetime] = None
+    ) -> ProjectCharter:
+        """Update an existing project charter.
+
+        The UPDATE is conditional on the ``updated_at`` read here (or
+        ``expected_updated_at`` from the client's If-Match); a concurrent
+        write in between raises ``ConcurrentUpdateError``.
+        """
         charter = ProjectCharterService.get_project_charter(db, charter_id)
         if not charter:
             raise ValueError(f"Project charter with ID {charter_id} not found")
+        if expected_updated_at is not None and charter.updated_at != expected_updated_at:
+            raise ConcurrentUpdateError("Project charter was modified by someone else")
 
         update_data = charter_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(charter, field, value)
+        guarded_update(db, ProjectCharter, charter.id, ProjectCharter.updated_at == charter.updated_at, update_data)
 
         db.commit()
         db.refresh(charter)
@@ -357,10 +325,10 @@ class ProjectCharterService:
         new_version_data['is_current_version'] = True
 
         # Update change log
-        change_log = new_version_data.get('change_log', [])
+        change_log = list(new_version_data.get('change_log') or [])
         change_entry = {
             'version': new_version_data.get('version', '2.0'),
-            'date': str(db.execute('SELECT NOW()').scalar()),
+            'date': utcnow().isoformat(),
             'changes': 'Updated project charter',
             'reason': 'Version update'
         }
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+from uuid import UUID
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models.project_sop import ProjectSOP
+
+if TYPE_CHECKING:
+    from app.services.change_feed import ChangeFeed
+
+
+@dataclass(frozen=True)
+class ProjectSOPSnapshot:
+    """Detached, read-only copy of a ProjectSOP row; safe to share across requests and threads.
+
+    ``content`` is the stored JSON as loaded and must not be mutated.
+    """
+
+    id: UUID
+    document_type: str
+    title: str
+    version: int
+    content: Any
+    display_order: int
+    is_active: bool
+    updated_at: datetime | None
+
+    @classmethod
+    def from_model(cls, project_sop: ProjectSOP) -> "ProjectSOPSnapshot":
+        return cls(
+            id=project_sop.id,
+            document_type=project_sop.document_type,
+            title=project_sop.title,
+            version=project_sop.version,
+            content=project_sop.content,
+            display_order=project_sop.display_order,
+            is_active=bool(project_sop.is_active),
+            updated_at=project_sop.updated_at,
+        )
+
+
+class ProjectSOPCache:
+    """Read-through cache of ProjectSOP templates, keyed by ``(document_type, version)``.
+
+    The whole table (a handful of rows) is loaded on first use and served
+    from memory until something changes:
+
+    - ``project_sop_service`` calls ``invalidate`` after each commit;
+    - once ``follow`` is called, the change feed's ``project_sops`` events
+      (from any worker) invalidate it too, and every (re)connect starts clean;
+    - while the feed is not live (SQLite, triggers missing, reconnecting)
+      a cheap fingerprint query runs at most every ``poll_interval_s`` and
+      reloads when the table changed.
+    """
+
+    def __init__(self, poll_interval_s: float = 5.0) -> None:
+        self.poll_interval_s = poll_interval_s
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, int], ProjectSOPSnapshot] = {}
+        self._current: dict[str, int] | None = None
+        self._fingerprint: tuple[Any, ...] | None = None
+        self._checked_at = 0.0
+        self._generation = 0
+        self._feed: ChangeFeed | None = None
+
+    def get(self, db: Session, document_type: str, version: int | None = None) -> ProjectSOPSnapshot | None:
+        """The template for ``document_type`` (current version unless ``version`` is given)."""
+
+        entries, current = self._state(db)
+        if version is None:
+            version = current.get(document_type)
+        return entries.get((document_type, version)) if version is not None else None
+
+    def active(self, db: Session) -> tuple[ProjectSOPSnapshot, ...]:
+        """Current versions of the active templates, in display order."""
+
+        entries, current = self._state(db)
+        snapshots = (entries[(document_type, version)] for document_type, version in current.items())
+        return tuple(
+            sorted(
+                (snapshot for snapshot in snapshots if snapshot.is_active),
+                key=lambda snapshot: (snapshot.display_order, snapshot.document_type),
+            )
+        )
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries = {}
+            self._current = None
+
+    def follow(self, feed: ChangeFeed) -> None:
+        """Invalidate on every worker's ProjectSOP writes as reported by ``feed``."""
+
+        self._feed = feed
+        feed.add_listener(self.apply_change)
+
+    def apply_change(self, event: dict[str, Any]) -> None:
+        if event.get("topic") in ("project_sops", "resync"):
+            self.invalidate()
+
+    def _state(self, db: Session) -> tuple[dict[tuple[str, int], ProjectSOPSnapshot], dict[str, int]]:
+        live = self._feed is not None and self._feed.live
+        with self._lock:
+            entries, current = self._entries, self._current
+            poll_due = not live and time.monotonic() - self._checked_at >= self.poll_interval_s
+            generation = self._generation
+        if current is not None and not poll_due:
+            return entries, current
+
+        fingerprint = self._read_fingerprint(db)
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if current is not None and fingerprint == self._fingerprint:
+                return entries, current
+
+        rows = db.scalars(select(ProjectSOP)).all()
+        entries = {(row.document_type, row.version): ProjectSOPSnapshot.from_model(row) for row in rows}
+        current = {row.document_type: row.version for row in rows}
+        with self._lock:
+            # If a write invalidated the cache meanwhile, serve this read but don't keep it
+            if generation == self._generation:
+                self._entries = entries
+                self._current = current
+                self._fingerprint = fingerprint
+        return entries, current
+
+    @staticmethod
+    def _read_fingerprint(db: Session) -> tuple[Any, ...]:
+        # Changes on any create (count), update (version bump) or delete (count)
+        row = db.execute(
+            select(
+                func.count(ProjectSOP.id),
+                func.coalesce(func.sum(ProjectSOP.version), 0),
+                func.max(ProjectSOP.updated_at),
+            )
+        ).one()
+        return tuple(row)
+
+
+project_sop_cache = ProjectSOPCache(poll_interval_s=settings.project_sop_cache_poll_interval_s)
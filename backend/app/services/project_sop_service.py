@@ -5,6 +5,9 @@ from sqlalchemy.orm import Session
 
 from app.db.models import ProjectSOP, ProjectSOPHistory
 from app.schemas.project_sop import ProjectSOPCreate, ProjectSOPUpdate
+from app.services.concurrency import ConcurrentUpdateError, guarded_update
+from app.services.project_sop_cache import project_sop_cache
+from app.services.response_cache import response_cache
 
 
 def list_project_sops(db: Session) -> list[ProjectSOP]:
@@ -49,14 +52,21 @@ def create_project_sop(db: Session, data: ProjectSOPCreate) -> ProjectSOP:
     )
     db.add(project_sop)
     db.commit()
+    response_cache.invalidate("project-sops")
+    project_sop_cache.invalidate()
     db.refresh(project_sop)
     return project_sop
 
 
-def update_project_sop(db: Session, project_sop_id: str, data: ProjectSOPUpdate) -> ProjectSOP:
+def update_project_sop(
+    db: Session, project_sop_id: str, data: ProjectSOPUpdate, expected_version: int | None = None
+) -> ProjectSOP:
+    """Update a document type template; conditional on its version like ``sop_service.update_sop``."""
     project_sop = db.get(ProjectSOP, project_sop_id)
     if project_sop is None:
         raise ValueError("Project SOP not found")
+    if expected_version is not None and project_sop.version != expected_version:
+        raise ConcurrentUpdateError("Project SOP was modified by someone else")
 
     updated = False
 
@@ -103,16 +113,27 @@ def update_project_sop(db: Session, project_sop_id: str, data: ProjectSOPUpdate)
         edited_by=data.edited_by,
     )
     db.add(history_entry)
-
-    # Update the project SOP
-    project_sop.document_type = new_document_type
-    project_sop.title = new_title
-    project_sop.content = new_content
-    project_sop.display_order = new_display_order
-    project_sop.is_active = new_is_active
-    project_sop.version += 1
+    db.flush()
+
+    # Update the project SOP only if nobody else has since the read above
+    guarded_update(
+        db,
+        ProjectSOP,
+        project_sop.id,
+        ProjectSOP.version == project_sop.version,
+        {
+            "document_type": new_document_type,
+            "title": new_title,
+            "content": new_content,
+            "display_order": new_display_order,
+            "is_active": new_is_active,
+            "version": project_sop.version + 1,
+        },
+    )
 
     db.commit()
+    response_cache.invalidate("project-sops")
+    project_sop_cache.invalidate()
     db.refresh(project_sop)
     return project_sop
 
@@ -134,4 +155,6 @@ def delete_project_sop(db: Session, project_sop_id: str) -> bool:
 
     db.delete(project_sop)
     db.commit()
+    response_cache.invalidate("project-sops")
+    project_sop_cache.invalidate()
     return True
\ No newline at end of file
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Iterable
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+from app.services.token_accounting import count_tokens
+
+_HEADING_PATTERN = re.compile(r"^#{1,6}\s+(.*)$")
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Top-level field of a ``field.key[0]`` path
+_ROOT_PATTERN = re.compile(r"[^.\[]*")
+# Shortest clip of a context-only string when shrinking a document to its budget
+_MIN_STRING_LIMIT = 40
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _compact(
+    value: Any,
+    path: str,
+    focus: frozenset[str],
+    array_limit: int | None,
+    string_limit: int | None,
+) -> Any:
+    # Focus fields are echoed back complete, so keep their empty values and
+    # original indexes: the model must see exactly the structure it returns
+    prune = _ROOT_PATTERN.match(path).group() not in focus
+
+    if isinstance(value, dict):
+        return {
+            key: _compact(item, f"{path}.{key}", focus, array_limit, string_limit)
+            for key, item in value.items()
+            if not (prune and _is_empty(item))
+        }
+
+    if isinstance(value, list):
+        kept = value if array_limit is None else value[:array_limit]
+        items = [
+            _compact(item, f"{path}[{index}]", focus, array_limit, string_limit)
+            for index, item in enumerate(kept)
+            if not (prune and _is_empty(item))
+        ]
+        if len(kept) < len(value):
+            # Stable reference to the omitted slice, so the model can point at it
+            items.append(f"…{len(value) - len(kept)} more at {path}[{len(kept)}:]")
+        return items
+
+    if isinstance(value, str) and string_limit is not None and len(value) > string_limit:
+        return value[:string_limit] + "…"
+
+    return value
+
+
+def compact_document(
+    document: dict[str, Any],
+    field_names: Iterable[str],
+    focus_fields: Iterable[str] | None = None,
+    array_limit: int = 5,
+    string_limit: int = 400,
+    token_budget: int | None = None,
+) -> str:
+    """Serialize a document for a prompt as minified JSON.
+
+    Only ``field_names`` are included (in that order), which keeps system
+    columns out. Fields in ``focus_fields`` (default: none) are kept whole,
+    empty values and list positions included, because the model must return
+    them complete. The remaining fields are context only: null/empty values
+    are dropped at every level, arrays are cut to ``array_limit`` items with
+    a ``field[n:]`` reference to the omitted slice, and long strings are
+    clipped to ``string_limit``. Over ``token_budget``, both limits are
+    halved until the document fits or they reach their floor.
+    """
+
+    field_names = list(field_names)
+    focus = frozenset(focus_fields or ())
+
+    while True:
+        compact: dict[str, Any] = {}
+        for name in field_names:
+            value = document.get(name)
+            if name in focus:
+                compact[name] = _compact(value, name, focus, None, None)
+            elif not _is_empty(value):
+                compact[name] = _compact(value, name, focus, array_limit, string_limit)
+
+        text = json.dumps(compact, default=_jsonable, ensure_ascii=False, separators=(",", ":"))
+        at_floor = array_limit <= 1 and string_limit <= _MIN_STRING_LIMIT
+        if token_budget is None or at_floor or count_tokens(text) <= token_budget:
+            return text
+        array_limit = max(1, array_limit // 2)
+        string_limit = max(_MIN_STRING_LIMIT, string_limit // 2)
+
+
+@lru_cache(maxsize=32)
+def split_sections(markdown: str) -> tuple[tuple[str, str, int], ...]:
+    """Split markdown into ``(heading, text, tokens)`` sections along headings.
+
+    The text before the first heading is returned with an empty heading.
+    Results are cached because SOP content only changes with its version.
+    """
+
+    sections: list[tuple[str, list[str]]] = [("", [])]
+    for line in markdown.splitlines():
+        match = _HEADING_PATTERN.match(line)
+        if match:
+            sections.append((match.group(1).strip(), []))
+        sections[-1][1].append(line)
+
+    result = []
+    for heading, lines in sections:
+        text = "\n".join(lines).strip()
+        if text:
+            result.append((heading, text, count_tokens(text)))
+    return tuple(result)
+
+
+def select_sop_sections(markdown: str, fields: Iterable[str], token_budget: int) -> str:
+    """Return the SOP sections most relevant to ``fields`` that fit in ``token_budget``.
+
+    The whole SOP is returned when it fits. Otherwise sections are ranked by
+    how many field-name words they mention (heading matches count triple,
+    the preamble always ranks first) and added best-first while they fit.
+    Chosen sections keep their original order, and a note records how many
+    were left out.
+    """
+
+    sections = split_sections(markdown)
+    if sum(tokens for _, _, tokens in sections) <= token_budget:
+        return markdown.strip()
+
+    terms = {word for name in fields for word in name.lower().split("_") if len(word) > 2}
+
+    def score(index: int) -> float:
+        heading, text, _ = sections[index]
+        if index == 0 and not heading:
+            return float("inf")
+        heading_words = set(_WORD_PATTERN.findall(heading.lower()))
+        body_words = set(_WORD_PATTERN.findall(text.lower()))
+        return 3 * len(terms & heading_words) + len(terms & body_words)
+
+    chosen: set[int] = set()
+    used = 0
+    for index in sorted(range(len(sections)), key=lambda i: (-score(i), i)):
+        tokens = sections[index][2]
+        if used + tokens <= token_budget:
+            chosen.add(index)
+            used += tokens
+
+    parts = [sections[index][1] for index in sorted(chosen)]
+    omitted = len(sections) - len(chosen)
+    if omitted:
+        parts.append(f"[{omitted} of {len(sections)} SOP sections omitted to fit the prompt budget]")
+    return "\n\n".join(parts)
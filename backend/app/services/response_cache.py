@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.services.change_feed import ChangeFeed
+
+
+def change_tags(event: dict[str, Any]) -> tuple[str, ...]:
+    """Cache tags made stale by one change feed event (``{topic, op, id}``)."""
+
+    topic = event.get("topic")
+    if topic == "sops":
+        return ("sops", f"sop:{str(event.get('id')).lower()}")
+    if topic == "project_sops":
+        return ("project-sops",)
+    if topic == "projects":
+        return ("projects",)
+    return ()
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A rendered 200 response: body bytes plus the headers needed to replay it.
+
+    ``variants`` holds the body precompressed per content-coding (``br``,
+    ``gzip``) so a hit never compresses again.
+    """
+
+    body: bytes
+    etag: str
+    media_type: str
+    tags: frozenset[str]
+    stored_at: float = field(default_factory=time.monotonic)
+    headers: tuple[tuple[bytes, bytes], ...] = ()
+    variants: tuple[tuple[str, bytes], ...] = ()
+
+    def variant(self, encoding: str) -> bytes | None:
+        for name, body in self.variants:
+            if name == encoding:
+                return body
+        return None
+
+
+class ResponseCache:
+    """In-process cache of rendered GET responses, invalidated by tag.
+
+    Entries are tagged with what they were rendered from (``sops``,
+    ``sop:<id>``, ``project-sops``, ``projects``). Services call
+    ``invalidate`` with the tags a write touches right after they commit.
+    Per-tag generations make a render that raced with a write skip the
+    store, so a stale body is never cached.
+
+    Writes made by other worker processes arrive through the change feed
+    once ``follow`` is called. ``ttl_s`` is only a fallback: it applies
+    while the feed is not live (SQLite, triggers missing, reconnecting),
+    and every (re)connect clears the cache.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_s: float | None = 60.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._entries: OrderedDict[Hashable, CachedResponse] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._feed: ChangeFeed | None = None
+        self.hits = 0
+        self.misses = 0
+
+    def follow(self, feed: ChangeFeed) -> None:
+        """Invalidate on every worker's writes as reported by ``feed``."""
+
+        self._feed = feed
+        feed.add_listener(self.apply_change)
+
+    def apply_change(self, event: dict[str, Any]) -> None:
+        if event.get("topic") == "resync":
+            self.clear()
+            return
+        tags = change_tags(event)
+        if tags:
+            self.invalidate(*tags)
+
+    def get(self, key: Hashable) -> CachedResponse | None:
+        expires = self.ttl_s is not None and not (self._feed is not None and self._feed.live)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and expires and time.monotonic() - entry.stored_at > self.ttl_s:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def begin(self, tags: Iterable[str]) -> tuple[tuple[str, int], ...]:
+        """Snapshot the tags' generations before rendering; pass the result to ``put``."""
+
+        with self._lock:
+            return tuple((tag, self._generations.get(tag, 0)) for tag in tags)
+
+    def put(self, key: Hashable, entry: CachedResponse, token: tuple[tuple[str, int], ...]) -> bool:
+        with self._lock:
+            if any(self._generations.get(tag, 0) != generation for tag, generation in token):
+                return False
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def invalidate(self, *tags: str) -> None:
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            stale = [key for key, entry in self._entries.items() if entry.tags.intersection(tags)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generations = {tag: generation + 1 for tag, generation in self._generations.items()}
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl_s=settings.response_cache_ttl_s,
+)
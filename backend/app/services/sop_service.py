@@ -5,6 +5,9 @@ from sqlalchemy.orm import Session
 
 from app.db.models import SOP, SOPHistory
 from app.schemas.sop import SOPCreate, SOPUpdate
+from app.services.concurrency import ConcurrentUpdateError, guarded_update
+from app.services.embedding_index_service import index_syncer
+from app.services.response_cache import response_cache
 
 
 def list_sops(db: Session) -> list[SOP]:
@@ -17,6 +20,14 @@ def get_sop(db: Session, sop_id: str) -> SOP | None:
     return db.get(SOP, sop_id)
 
 
+def get_sops_by_id(db: Session, sop_ids: list[str]) -> dict[str, SOP]:
+    """SOPs for ``sop_ids`` in one query, keyed by their string id; missing ids are absent."""
+
+    if not sop_ids:
+        return {}
+    return {str(sop.id): sop for sop in db.execute(select(SOP).where(SOP.id.in_(sop_ids))).scalars()}
+
+
 def create_sop(db: Session, data: SOPCreate) -> SOP:
     # Get the next display_order by finding the max and adding 1
     max_order_stmt = select(func.coalesce(func.max(SOP.display_order), 0))
@@ -26,14 +37,24 @@ def create_sop(db: Session, data: SOPCreate) -> SOP:
     sop = SOP(title=data.title, content=data.content, display_order=next_order)
     db.add(sop)
     db.commit()
+    response_cache.invalidate("sops")
+    index_syncer.request()
     db.refresh(sop)
     return sop
 
 
-def update_sop(db: Session, sop_id: str, data: SOPUpdate) -> SOP:
+def update_sop(db: Session, sop_id: str, data: SOPUpdate, expected_version: int | None = None) -> SOP:
+    """Update an SOP, recording the previous revision in history.
+
+    The write is conditional on the version read here (or ``expected_version``
+    from the client's If-Match), so concurrent editors cannot overwrite
+    each other; the loser gets ``ConcurrentUpdateError``.
+    """
     sop = db.get(SOP, sop_id)
     if sop is None:
         raise ValueError("SOP not found")
+    if expected_version is not None and sop.version != expected_version:
+        raise ConcurrentUpdateError("SOP was modified by someone else")
 
     updated = False
 
@@ -63,13 +84,19 @@ def update_sop(db: Session, sop_id: str, data: SOPUpdate) -> SOP:
         edited_by=data.edited_by,
     )
     db.add(history_entry)
-
-    sop.title = new_title
-    sop.content = new_content
-    sop.display_order = new_display_order
-    sop.version += 1
+    db.flush()
+
+    guarded_update(
+        db,
+        SOP,
+        sop.id,
+        SOP.version == sop.version,
+        {"title": new_title, "content": new_content, "display_order": new_display_order, "version": sop.version + 1},
+    )
 
     db.commit()
+    response_cache.invalidate("sops", f"sop:{sop.id}")
+    index_syncer.request()
     db.refresh(sop)
     return sop
 
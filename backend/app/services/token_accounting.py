@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+try:  # Optional: exact BPE counts when tiktoken is installed
+    import tiktoken
+except ImportError:  # pragma: no cover - depends on the environment
+    tiktoken = None
+
+# Roughly the GPT pre-tokenizer split: words, numbers, single punctuation, whitespace runs
+_PIECE_PATTERN = re.compile(r"\s?[A-Za-z]+|\s?[0-9]{1,3}|\s?[^\sA-Za-z0-9]|\s+")
+
+DEFAULT_ENCODING = "o200k_base"
+
+# Chat format overhead per message and for priming the reply (OpenAI cookbook figures)
+MESSAGE_OVERHEAD_TOKENS = 3
+REPLY_PRIMING_TOKENS = 3
+
+logger = logging.getLogger(__name__)
+
+
+class PromptTooLargeError(ValueError):
+    """Raised before an LLM call whose prompt cannot fit the task's token budget."""
+
+
+# Optional message key: ``(start, end)`` character spans of ``content`` that repeat
+# verbatim across calls (instructions, SOP corpus); only these are memoized
+STABLE_SPANS = "stable_spans"
+
+
+@lru_cache(maxsize=8)
+def _encoding(name: str) -> Any:
+    """The BPE encoding ``name`` (falling back to cl100k_base), or None to approximate.
+
+    tiktoken downloads encodings on first use; on an offline host that fails
+    and the None result is cached, so it is not retried on every call.
+    """
+
+    if tiktoken is None:
+        return None
+    for candidate in dict.fromkeys((name, "cl100k_base")):
+        try:
+            return tiktoken.get_encoding(candidate)
+        except Exception as exc:
+            logger.warning(f"Could not load tiktoken encoding '{candidate}': {exc}")
+    logger.warning("Falling back to approximate token counts")
+    return None
+
+
+def approximate_tokens(text: str) -> int:
+    """Offline token estimate: pre-tokenizer pieces, long words split every ~4 chars."""
+
+    return sum(math.ceil(len(piece.strip() or piece) / 4) for piece in _PIECE_PATTERN.findall(text))
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    """Count tokens with the BPE ``encoding`` if tiktoken is available, else approximate."""
+
+    if not text:
+        return 0
+    bpe = _encoding(encoding)
+    if bpe is None:
+        return approximate_tokens(text)
+    return len(bpe.encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=256)
+def count_chunk_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    """``count_tokens`` for chunks that repeat verbatim across calls, memoized by content.
+
+    Only pass stable text (SOP corpora, fixed instruction blocks): anything
+    embedding the current document or user input never hits the cache and
+    just pins the string in memory.
+    """
+
+    return count_tokens(text, encoding)
+
+
+def stable_message(role: str, parts: Iterable[tuple[str, bool]]) -> dict[str, Any]:
+    """A chat message built from ``(text, stable)`` parts, recording the stable spans.
+
+    ``count_message_tokens`` memoizes the stable parts and counts the rest
+    afresh. The extra key is stripped before the message is sent.
+    """
+
+    content: list[str] = []
+    spans: list[tuple[int, int]] = []
+    offset = 0
+    for text, stable in parts:
+        if stable and text:
+            spans.append((offset, offset + len(text)))
+        content.append(text)
+        offset += len(text)
+    return {"role": role, "content": "".join(content), STABLE_SPANS: tuple(spans)}
+
+
+def _content_tokens(content: str, spans: Iterable[tuple[int, int]], encoding: str) -> int:
+    total = 0
+    position = 0
+    for start, end in spans:
+        total += count_tokens(content[position:start], encoding) + count_chunk_tokens(content[start:end], encoding)
+        position = end
+    return total + count_tokens(content[position:], encoding)
+
+
+def count_message_tokens(messages: Iterable[dict[str, Any]], encoding: str = DEFAULT_ENCODING) -> int:
+    """Prompt tokens for a chat request, including per-message framing.
+
+    Spans listed under ``STABLE_SPANS`` (see ``stable_message``) come from
+    the chunk cache; everything else is counted on each call.
+    """
+
+    total = REPLY_PRIMING_TOKENS
+    for message in messages:
+        content = message.get("content") or ""
+        total += _content_tokens(content, message.get(STABLE_SPANS) or (), encoding)
+        total += MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def fit_messages(
+    messages: list[dict[str, Any]],
+    budget: int | None,
+    encoding: str = DEFAULT_ENCODING,
+) -> tuple[list[dict[str, Any]], int, int]:
+    """Trim a conversation to ``budget`` prompt tokens.
+
+    Leading system messages and the final message are always kept; the
+    oldest turns in between are dropped first. Returns the kept messages,
+    their token count and how many were dropped.
+
+    Raises:
+        PromptTooLargeError: If the messages that must be kept exceed the budget
+    """
+
+    tokens = count_message_tokens(messages, encoding)
+    if budget is None or tokens <= budget:
+        return messages, tokens, 0
+
+    pinned = 0
+    while pinned < len(messages) - 1 and messages[pinned].get("role") == "system":
+        pinned += 1
+
+    kept = list(messages)
+    dropped = 0
+    while tokens > budget and len(kept) - pinned > 1:
+        removed = kept.pop(pinned)
+        tokens -= count_tokens(removed.get("content") or "", encoding) + MESSAGE_OVERHEAD_TOKENS
+        dropped += 1
+
+    if tokens > budget:
+        raise PromptTooLargeError(f"Prompt needs {tokens} tokens, over the {budget}-token budget for this request.")
+    return kept, tokens, dropped
+
+
+@dataclass
+class _TaskTokenStats:
+    calls: int = 0
+    prompt_tokens: int = 0
+    max_prompt_tokens: int = 0
+    trimmed_calls: int = 0
+    rejected_calls: int = 0
+    billed_calls: int = 0
+    billed_prompt_tokens: int = 0
+    cached_prompt_tokens: int = 0
+
+
+class PromptTokenMetrics:
+    """Per-task prompt-token counters exposed on ``/health/llm``."""
+
+    def __init__(self) -> None:
+        self._stats: dict[str, _TaskTokenStats] = {}
+        self._lock = threading.Lock()
+
+    def _for(self, task: str) -> _TaskTokenStats:
+        stats = self._stats.get(task)
+        if stats is None:
+            stats = self._stats[task] = _TaskTokenStats()
+        return stats
+
+    def record(self, task: str, prompt_tokens: int, dropped_messages: int = 0) -> None:
+        with self._lock:
+            stats = self._for(task)
+            stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.max_prompt_tokens = max(stats.max_prompt_tokens, prompt_tokens)
+            if dropped_messages:
+                stats.trimmed_calls += 1
+        if dropped_messages:
+            logger.info(f"Trimmed {dropped_messages} oldest messages from {task} prompt to fit its token budget")
+
+    def record_rejected(self, task: str) -> None:
+        with self._lock:
+            self._for(task).rejected_calls += 1
+
+    def record_cached(self, task: str, prompt_tokens: int | None, cached_tokens: int | None) -> None:
+        """Record the provider-reported prompt usage, including tokens served from its prefix cache."""
+
+        if not prompt_tokens:
+            return
+        cached_tokens = cached_tokens or 0
+        with self._lock:
+            stats = self._for(task)
+            stats.billed_calls += 1
+            stats.billed_prompt_tokens += prompt_tokens
+            stats.cached_prompt_tokens += cached_tokens
+        logger.debug(f"{task} prompt: {cached_tokens}/{prompt_tokens} tokens served from the provider prefix cache")
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        with self._lock:
+            return {
+                task: {
+                    "calls": stats.calls,
+                    "avg_prompt_tokens": round(stats.prompt_tokens / stats.calls) if stats.calls else 0,
+                    "max_prompt_tokens": stats.max_prompt_tokens,
+                    "trimmed_calls": stats.trimmed_calls,
+                    "rejected_calls": stats.rejected_calls,
+                    "cached_prompt_tokens": stats.cached_prompt_tokens,
+                    "cached_prefix_ratio": (
+                        round(stats.cached_prompt_tokens / stats.billed_prompt_tokens, 3)
+                        if stats.billed_prompt_tokens
+                        else None
+                    ),
+                }
+                for task, stats in self._stats.items()
+            }
+
+
+token_metrics = PromptTokenMetrics()
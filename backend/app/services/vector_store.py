@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Iterable
+
+import numpy as np
+
+from app.services.embeddings import normalize_rows
+
+
+@dataclass
+class VectorEntry:
+    """Metadata for a single indexed chunk; row ``i`` of the matrix belongs to entry ``i``."""
+
+    source_key: str
+    kind: str
+    source_id: str
+    chunk: str
+    text: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SearchHit:
+    entry: VectorEntry
+    score: float
+
+
+class VectorStore:
+    """Compact in-memory vector store with optional on-disk persistence.
+
+    Vectors are kept L2-normalised in a single contiguous float32 matrix so a
+    batch of queries is scored with one matrix product. When a ``path`` is
+    given the matrix is persisted as ``<path>.npy`` next to a ``<path>.json``
+    metadata file, and ``mmap=True`` maps the matrix read-only instead of
+    loading it; any mutation materialises a private in-memory copy.
+    """
+
+    def __init__(self, path: str | None = None, mmap: bool = False) -> None:
+        self.path = path
+        self.mmap = mmap
+        self.embedder_name: str | None = None
+        self.fingerprints: dict[str, str] = {}
+        self._entries: list[VectorEntry] = []
+        self._vectors: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def dimensions(self) -> int | None:
+        return None if self._vectors is None else int(self._vectors.shape[1])
+
+    @property
+    def entries(self) -> list[VectorEntry]:
+        return list(self._entries)
+
+    def clear(self) -> None:
+        self.fingerprints = {}
+        self._entries = []
+        self._vectors = None
+
+    def vectors_for(self, source_key: str) -> np.ndarray | None:
+        """Return the stored vectors of one source, or None if it is not indexed."""
+
+        rows = [index for index, entry in enumerate(self._entries) if entry.source_key == source_key]
+        if not rows:
+            return None
+        return np.asarray(self._vectors[rows])
+
+    def remove_sources(self, source_keys: Iterable[str]) -> int:
+        """Drop every chunk belonging to ``source_keys``; returns the number of rows removed."""
+
+        keys = set(source_keys)
+        if not keys:
+            return 0
+
+        for key in keys:
+            self.fingerprints.pop(key, None)
+
+        keep = [index for index, entry in enumerate(self._entries) if entry.source_key not in keys]
+        removed = len(self._entries) - len(keep)
+        if removed:
+            self._entries = [self._entries[index] for index in keep]
+            self._vectors = self._vectors[keep] if keep else None
+        return removed
+
+    def upsert_sources(
+        self,
+        entries: list[VectorEntry],
+        vectors: np.ndarray,
+        fingerprints: dict[str, str],
+    ) -> None:
+        """Replace all chunks of the sources named in ``fingerprints`` with ``entries``."""
+
+        if len(entries) != len(vectors):
+            raise ValueError("Each vector entry needs exactly one vector.")
+
+        self.remove_sources(fingerprints.keys())
+        self.fingerprints.update(fingerprints)
+        if not entries:
+            return
+
+        vectors = normalize_rows(vectors)
+        if self._vectors is not None and vectors.shape[1] != self._vectors.shape[1]:
+            raise ValueError(
+                f"Vector dimension mismatch: store has {self._vectors.shape[1]}, got {vectors.shape[1]}"
+            )
+
+        self._vectors = vectors if self._vectors is None else np.concatenate([self._vectors, vectors])
+        self._entries.extend(entries)
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 5,
+        kinds: set[str] | None = None,
+        exclude_sources: set[str] | None = None,
+    ) -> list[list[SearchHit]]:
+        """Cosine top-k for a batch of query vectors, best match first."""
+
+        queries = normalize_rows(queries)
+        if self._vectors is None or k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = queries @ self._vectors.T
+
+        if kinds or exclude_sources:
+            mask = np.array(
+                [
+                    (not kinds or entry.kind in kinds)
+                    and (not exclude_sources or entry.source_key not in exclude_sources)
+                    for entry in self._entries
+                ],
+                dtype=bool,
+            )
+            scores[:, ~mask] = -np.inf
+            available = int(mask.sum())
+        else:
+            available = len(self._entries)
+
+        k = min(k, available)
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        if k < scores.shape[1]:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.tile(np.arange(scores.shape[1]), (len(queries), 1))
+
+        results: list[list[SearchHit]] = []
+        for row, candidates in enumerate(top):
+            ordered = candidates[np.argsort(-scores[row, candidates], kind="stable")]
+            results.append(
+                [SearchHit(entry=self._entries[index], score=float(scores[row, index])) for index in ordered]
+            )
+        return results
+
+    def save(self) -> None:
+        if not self.path:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        vectors = self._vectors if self._vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        vectors_tmp = f"{self.path}.npy.tmp"
+        with open(vectors_tmp, "wb") as handle:
+            np.save(handle, np.ascontiguousarray(vectors, dtype=np.float32))
+
+        meta_tmp = f"{self.path}.json.tmp"
+        with open(meta_tmp, "w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "embedder": self.embedder_name,
+                    "fingerprints": self.fingerprints,
+                    "entries": [asdict(entry) for entry in self._entries],
+                },
+                handle,
+            )
+
+        # Swap the matrix first: a reader that sees new metadata with an old
+        # matrix fails the length check in load() and rebuilds.
+        os.replace(vectors_tmp, f"{self.path}.npy")
+        os.replace(meta_tmp, f"{self.path}.json")
+
+    def load(self) -> bool:
+        """Load a persisted index; returns False (leaving the store empty) if none is usable."""
+
+        self.clear()
+        if not self.path:
+            return False
+
+        vectors_path, meta_path = f"{self.path}.npy", f"{self.path}.json"
+        if not (os.path.exists(vectors_path) and os.path.exists(meta_path)):
+            return False
+
+        with open(meta_path, encoding="utf-8") as handle:
+            meta = json.load(handle)
+
+        vectors = np.load(vectors_path, mmap_mode="r" if self.mmap else None)
+        entries = [VectorEntry(**item) for item in meta.get("entries", [])]
+        if len(entries) != (vectors.shape[0] if vectors.size else 0):
+            return False
+
+        self.embedder_name = meta.get("embedder")
+        self.fingerprints = dict(meta.get("fingerprints", {}))
+        self._entries = entries
+        self._vectors = vectors if entries else None
+        return True
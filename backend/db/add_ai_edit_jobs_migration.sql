@@ -0,0 +1,65 @@
+-- Migration: Add AI edit suggestion jobs
+-- Description: Portfolio-wide AI suggestion runs (/api/ai-edits/jobs). Each job has
+-- one item per project; items are checkpointed as they finish so a job can resume
+-- after a restart, and the stored suggestions are kept for later review.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS ai_edit_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    document_type VARCHAR(50) NOT NULL,
+    user_instructions TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued' CHECK (status IN (
+        'queued', 'running', 'completed', 'failed', 'cancelled'
+    )),
+    total_items INTEGER NOT NULL DEFAULT 0,
+    completed_items INTEGER NOT NULL DEFAULT 0,
+    failed_items INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+
+    -- Lease: the worker running the job refreshes heartbeat_at; a stale lease
+    -- lets another worker (or the restarted one) pick the job up again
+    worker_id VARCHAR(255),
+    heartbeat_at TIMESTAMPTZ,
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+
+    created_by VARCHAR(255),
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS ai_edit_job_items (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    job_id UUID NOT NULL REFERENCES ai_edit_jobs(id) ON DELETE CASCADE,
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (status IN ('pending', 'completed', 'failed')),
+    document_id UUID,                                -- current document the suggestions were generated for
+    document_updated_at TIMESTAMPTZ,                 -- its updated_at, checked again when the suggestions are applied
+    suggestions JSONB,
+    overall_reasoning TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    completed_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (job_id, project_id)
+);
+
+-- Databases that ran an earlier version of this migration
+ALTER TABLE ai_edit_job_items ADD COLUMN IF NOT EXISTS document_updated_at TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS idx_ai_edit_jobs_status ON ai_edit_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_ai_edit_job_items_job_status ON ai_edit_job_items(job_id, status);
+
+CREATE TRIGGER ai_edit_jobs_set_updated_at
+BEFORE UPDATE ON ai_edit_jobs
+FOR EACH ROW
+EXECUTE FUNCTION set_updated_at();
+
+CREATE TRIGGER ai_edit_job_items_set_updated_at
+BEFORE UPDATE ON ai_edit_job_items
+FOR EACH ROW
+EXECUTE FUNCTION set_updated_at();
+
+COMMIT;
@@ -0,0 +1,80 @@
+-- Migration: Add change feed notifications
+-- Description: Row-level triggers publish every insert/update/delete on the tables
+-- the UI lists to the "playbook_changes" channel. The API runs one LISTEN
+-- connection per worker and fans the events out to browsers over SSE
+-- (GET /api/changes) and to its response cache. Payloads carry ids only
+-- (NOTIFY is capped at 8000 bytes); clients fetch the rows they care about.
+
+BEGIN;
+
+-- Reads only the id and the optional parent column (trigger argument) of the
+-- changed row; the rest of the row is never converted.
+CREATE OR REPLACE FUNCTION notify_change()
+RETURNS TRIGGER AS $$
+DECLARE
+    changed_id TEXT;
+    parent_id TEXT;
+    payload JSON;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        changed_id := OLD.id::TEXT;
+    ELSE
+        changed_id := NEW.id::TEXT;
+    END IF;
+
+    -- Optional trigger argument: the parent key to include (project_id, thread_id)
+    IF TG_NARGS > 0 THEN
+        IF TG_OP = 'DELETE' THEN
+            EXECUTE format('SELECT ($1).%I::TEXT', TG_ARGV[0]) INTO parent_id USING OLD;
+        ELSE
+            EXECUTE format('SELECT ($1).%I::TEXT', TG_ARGV[0]) INTO parent_id USING NEW;
+        END IF;
+        payload := json_build_object(
+            'topic', TG_TABLE_NAME, 'op', lower(TG_OP), 'id', changed_id, TG_ARGV[0], parent_id
+        );
+    ELSE
+        payload := json_build_object('topic', TG_TABLE_NAME, 'op', lower(TG_OP), 'id', changed_id);
+    END IF;
+
+    PERFORM pg_notify('playbook_changes', payload::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sops_notify_change ON sops;
+CREATE TRIGGER sops_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON sops
+FOR EACH ROW
+EXECUTE FUNCTION notify_change();
+
+DROP TRIGGER IF EXISTS project_sops_notify_change ON project_sops;
+CREATE TRIGGER project_sops_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON project_sops
+FOR EACH ROW
+EXECUTE FUNCTION notify_change();
+
+DROP TRIGGER IF EXISTS projects_notify_change ON projects;
+CREATE TRIGGER projects_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON projects
+FOR EACH ROW
+EXECUTE FUNCTION notify_change();
+
+DROP TRIGGER IF EXISTS business_cases_notify_change ON business_cases;
+CREATE TRIGGER business_cases_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON business_cases
+FOR EACH ROW
+EXECUTE FUNCTION notify_change('project_id');
+
+DROP TRIGGER IF EXISTS project_charters_notify_change ON project_charters;
+CREATE TRIGGER project_charters_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON project_charters
+FOR EACH ROW
+EXECUTE FUNCTION notify_change('project_id');
+
+DROP TRIGGER IF EXISTS chat_messages_notify_change ON chat_messages;
+CREATE TRIGGER chat_messages_notify_change
+AFTER INSERT OR UPDATE OR DELETE ON chat_messages
+FOR EACH ROW
+EXECUTE FUNCTION notify_change('thread_id');
+
+COMMIT;
@@ -0,0 +1,30 @@
+-- Migration: Add project code counters
+-- Description: One row per project code prefix (initials + year, e.g. "PRJ-2024").
+-- New codes take the next number with a single upsert-and-increment instead of
+-- scanning projects.project_code with LIKE, so allocation is O(1) and two
+-- concurrent creates can never be handed the same code.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS project_code_counters (
+    prefix VARCHAR(50) PRIMARY KEY,
+    last_value INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Seed from existing <prefix>-NNN codes so numbering continues where it left off
+INSERT INTO project_code_counters (prefix, last_value)
+SELECT substring(project_code FROM '^(.*)-[0-9]+$') AS prefix,
+       MAX(substring(project_code FROM '-([0-9]+)$')::INTEGER) AS last_value
+FROM projects
+WHERE project_code ~ '^[^-]+-[^-]+-[0-9]+$'
+GROUP BY 1
+ON CONFLICT (prefix) DO UPDATE
+SET last_value = GREATEST(project_code_counters.last_value, EXCLUDED.last_value);
+
+CREATE TRIGGER project_code_counters_set_updated_at
+BEFORE UPDATE ON project_code_counters
+FOR EACH ROW
+EXECUTE FUNCTION set_updated_at();
+
+COMMIT;